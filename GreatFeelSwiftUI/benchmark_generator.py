@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+"""
+Benchmarks for the Xcode project generator
+Times the generator's hot paths on synthetic source trees so regressions show up as numbers
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+
+import generate_xcode_project as gen
+
+def synthetic_files(file_count, files_per_dir=50, fanout=10):
+    """Build a {rel_path: filename} mapping shaped like find_swift_files output"""
+    files = {}
+    for i in range(file_count):
+        d = i // files_per_dir
+        parts = []
+        while True:
+            parts.append(f"Module{d % fanout}")
+            d //= fanout
+            if not d:
+                break
+        name = f"File{i}.swift"
+        files["/".join(reversed(parts)) + "/" + name] = name
+    return files
+
+def bench_group_emission(file_count):
+    """Time directory indexing plus PBXGroup emission for the whole tree"""
+    files = synthetic_files(file_count)
+    ids = gen.IdAllocator()
+    file_refs = gen.allocate_file_ids(files, ids)
+
+    start = time.perf_counter()
+    dir_index = gen.build_directory_index(files)
+    group_ids = gen.allocate_group_ids(dir_index, ids)
+    for _ in gen.iter_source_groups(dir_index, file_refs, group_ids):
+        pass
+    elapsed = time.perf_counter() - start
+
+    return {
+        'files': file_count,
+        'groups': len(dir_index),
+        'seconds': elapsed,
+        'us_per_file': elapsed / file_count * 1e6,
+    }
+
+def legacy_uuid(name):
+    """The generator's original ID scheme: truncated MD5, no collision checks"""
+    return hashlib.md5(name.encode()).hexdigest()[:24].upper()
+
+def legacy_file_ids(swift_files):
+    """The original per-file loop from create_pbxproj, using legacy_uuid"""
+    file_refs = {}
+    build_files = {}
+    for path, filename in swift_files.items():
+        file_id = legacy_uuid(f"FILE_{path}")
+        build_id = legacy_uuid(f"BUILD_{path}")
+        file_refs[path] = {'id': file_id, 'name': filename}
+        build_files[path] = {'id': build_id, 'file_ref_id': file_id, 'name': filename}
+    return file_refs, build_files
+
+def bench_id_allocation(file_count):
+    """Compare the original MD5 ID loop with the batched, collision-checked IdAllocator"""
+    files = synthetic_files(file_count)
+    keys = [f"FILE_{path}" for path in files] + [f"BUILD_{path}" for path in files]
+
+    # Raw digest cost for the same keys
+    start = time.perf_counter()
+    for key in keys:
+        legacy_uuid(key)
+    md5_hash = time.perf_counter() - start
+
+    start = time.perf_counter()
+    template = hashlib.blake2b(digest_size=12)
+    for key in keys:
+        h = template.copy()
+        h.update(key.encode())
+        h.hexdigest().upper()
+    blake2b_hash = time.perf_counter() - start
+
+    # The same keys through the allocator: hashing plus its collision checks
+    start = time.perf_counter()
+    gen.IdAllocator().allocate_many(keys)
+    allocator_ids = time.perf_counter() - start
+
+    # End to end: IDs plus the per-file records create_pbxproj builds from them
+    start = time.perf_counter()
+    legacy_file_ids(files)
+    legacy = time.perf_counter() - start
+
+    start = time.perf_counter()
+    ids = gen.IdAllocator()
+    file_refs = gen.allocate_file_ids(files, ids)
+    gen.allocate_build_files(file_refs, sorted(files), ids)
+    allocator = time.perf_counter() - start
+
+    return {
+        'files': file_count,
+        'md5_hash_seconds': md5_hash,
+        'blake2b_hash_seconds': blake2b_hash,
+        'allocator_ids_seconds': allocator_ids,
+        'legacy_seconds': legacy,
+        'allocator_seconds': allocator,
+    }
+
+def legacy_file_records(project_files, ids):
+    """The per-file dicts create_pbxproj used before FileTable: a reference and a build file dict each"""
+    paths = sorted(project_files)
+    file_ids = ids.allocate_many([f"FILE_{path}" for path in paths])
+    file_refs = {}
+    for path, file_id in zip(paths, file_ids):
+        filename = project_files[path]
+        file_type, phase = gen.classify_file(filename)
+        file_refs[path] = {'id': file_id, 'name': filename, 'type': file_type, 'phase': phase}
+    build_ids = ids.allocate_many([f"BUILD_{path}" for path in paths])
+    build_files = {}
+    for path, build_id in zip(paths, build_ids):
+        ref = file_refs[path]
+        build_files[path] = {'id': build_id, 'file_ref_id': ref['id'], 'name': ref['name'], 'phase': ref['phase']}
+    # Every section sorted its own copy
+    sorted(file_refs.values(), key=lambda info: info['id'])
+    sorted(build_files.values(), key=lambda info: info['id'])
+    return file_refs, build_files
+
+def compact_file_records(project_files, ids):
+    """The same records as FileRef/BuildFile in a FileTable, sorted once"""
+    file_refs = gen.allocate_file_ids(project_files, ids)
+    build_files = gen.allocate_build_files(file_refs, file_refs.paths, ids)
+    file_refs.by_id()
+    sorted(build_files.values(), key=lambda info: info.id)
+    return file_refs, build_files
+
+def bench_file_table_memory(file_count):
+    """Retained and peak memory (tracemalloc) of the per-file dicts versus the compact file table
+
+    Object IDs are included: both keep them in the allocator, and the records point at them.
+    """
+    import gc
+    import tracemalloc
+
+    # Real scans produce a fresh string per file name, repeated names included
+    files = {path: ''.join(name) for path, name in synthetic_files(file_count).items()}
+    result = {'files': file_count}
+    for label, build in (('legacy', legacy_file_records), ('compact', compact_file_records)):
+        # Timed untraced; tracemalloc slows every allocation down. The two builders are within
+        # a few tens of percent of each other, so one noisy run could reverse them: take the best of 3
+        elapsed = None
+        for _ in range(3):
+            gc.collect()
+            start = time.perf_counter()
+            records = build(files, gen.IdAllocator())
+            run = time.perf_counter() - start
+            del records
+            elapsed = run if elapsed is None else min(elapsed, run)
+
+        gc.collect()
+        tracemalloc.start()
+        records = build(files, gen.IdAllocator())
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del records
+        result.update({f"{label}_seconds": elapsed, f"{label}_retained_bytes": retained,
+                       f"{label}_peak_bytes": peak})
+    return result
+
+# Directory shapes for on-disk trees: files per directory, subdirectories per directory,
+# and resources generated per Swift file
+TREE_SHAPES = {
+    'shallow': {'files_per_dir': 500, 'fanout': 20, 'resource_ratio': 0.0},
+    'deep': {'files_per_dir': 8, 'fanout': 2, 'resource_ratio': 0.0},
+    'resources': {'files_per_dir': 50, 'fanout': 10, 'resource_ratio': 1.0},
+}
+
+# Resource kinds cycled through in the "resources" shape; every 16th one is an asset catalog
+RESOURCE_EXTENSIONS = ('.json', '.mp3', '.ttf', '.mp4', '.wav', '.plist', '.m4a', '.otf')
+
+def make_tree(root, file_count, files_per_dir, fanout, resource_ratio):
+    """Write an empty-file source tree under root/GreatFeelSwiftUI, returning the file count written"""
+    base = os.path.join(root, "GreatFeelSwiftUI")
+    files = synthetic_files(file_count, files_per_dir, fanout)
+    resources = int(file_count * resource_ratio)
+    made = set()
+    written = 0
+
+    for i, path in enumerate(files):
+        directory = os.path.join(base, os.path.dirname(path))
+        if directory not in made:
+            os.makedirs(directory, exist_ok=True)
+            made.add(directory)
+        open(os.path.join(base, path), 'w').close()
+        written += 1
+        if i < resources:
+            stem = os.path.join(directory, f"Resource{i}")
+            if i % 16 == 15:
+                # Asset catalogs are bundles: a directory the scanner must not descend into
+                os.makedirs(stem + ".xcassets/AppIcon.appiconset", exist_ok=True)
+                open(stem + ".xcassets/Contents.json", 'w').close()
+                stem += ".xcassets"
+            else:
+                open(stem + RESOURCE_EXTENSIONS[i % len(RESOURCE_EXTENSIONS)], 'w').close()
+            written += 1
+
+    open(os.path.join(root, "Info.plist"), 'w').close()
+    return written
+
+def peak_rss_bytes():
+    """Peak resident set size of this process, or None where getrusage is unavailable"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def run_tree_case(file_count, shape):
+    """Generate a project for one synthetic tree, timing each phase of main() separately"""
+    params = TREE_SHAPES[shape]
+    phases = {}
+
+    def timed(name, func, *args):
+        start = time.perf_counter()
+        result = func(*args)
+        phases[name] = time.perf_counter() - start
+        return result
+
+    with tempfile.TemporaryDirectory(prefix="xcodegen-bench-") as root:
+        start = time.perf_counter()
+        written = make_tree(root, file_count, *params.values())
+        setup = time.perf_counter() - start
+        old_cwd = os.getcwd()
+        os.chdir(root)
+        try:
+            base_path = "GreatFeelSwiftUI"
+            files = timed('discovery', gen.find_swift_files, base_path)
+            dir_index = timed('directory_index', gen.build_directory_index, files)
+
+            # ID generation: the same allocations iter_pbxproj makes, done up front so the
+            # assembly phase below only looks IDs up
+            ids = gen.IdAllocator()
+            def allocate_ids():
+                file_refs = gen.allocate_file_ids(files, ids)
+                gen.allocate_group_ids(dir_index, ids)
+                gen.build_targets(gen.DEFAULT_SPEC, file_refs, ids)
+            timed('id_generation', allocate_ids)
+
+            content = timed('assembly', gen.create_pbxproj, files, dir_index, ids)
+            contents, checks = gen.create_workspace_files()
+            outputs = {
+                f"{gen.PROJECT_DIR}/project.pbxproj": content,
+                f"{gen.PROJECT_DIR}/project.xcworkspace/contents.xcworkspacedata": contents,
+                f"{gen.PROJECT_DIR}/project.xcworkspace/xcshareddata/IDEWorkspaceChecks.plist": checks,
+            }
+            def write_all():
+                for path, data in outputs.items():
+                    gen.write_if_changed(path, data)
+            timed('write', write_all)
+            timed('write_unchanged', write_all)
+
+            # The whole pipeline as users run it, on a cold scan cache
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                timed('main', gen.main, ['--incremental'])
+        finally:
+            os.chdir(old_cwd)
+
+    return {
+        'files': file_count,
+        'shape': shape,
+        'paths_scanned': len(files),
+        'paths_written': written,
+        'directories': len(dir_index),
+        'pbxproj_bytes': len(content.encode('utf-8')),
+        'setup_seconds': setup,
+        'phases': phases,
+        'peak_rss_bytes': peak_rss_bytes(),
+    }
+
+def run_tree_case_isolated(file_count, shape):
+    """Run one tree case in a fresh interpreter so its peak RSS isn't inflated by earlier cases"""
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--tree-case', f"{file_count}:{shape}"],
+        check=True, capture_output=True, text=True)
+    return json.loads(result.stdout)
+
+# Phases faster than this in both runs are never reported as regressions
+NOISE_FLOOR_SECONDS = 0.005
+
+def compare_reports(baseline, current, threshold):
+    """List (case, phase, old, new) for phases that got slower than baseline by more than threshold"""
+    old_cases = {(case['files'], case['shape']): case for case in baseline.get('cases', [])}
+    regressions = []
+    for case in current['cases']:
+        old = old_cases.get((case['files'], case['shape']))
+        if old is None:
+            continue
+        for phase, seconds in case['phases'].items():
+            before = old['phases'].get(phase)
+            # Ignore phases too short to time reliably
+            if before and max(before, seconds) >= NOISE_FLOOR_SECONDS and seconds > before * (1 + threshold):
+                regressions.append((f"{case['files']}:{case['shape']}", phase, before, seconds))
+    return regressions
+
+def bench_trees(sizes, shapes, report_path=None, baseline_path=None, threshold=0.2):
+    """Run the on-disk tree suite, print a phase table and optionally write/compare JSON reports"""
+    phase_names = ('discovery', 'id_generation', 'assembly', 'write', 'main')
+    print("⏱️  Synthetic trees on disk (seconds per phase, peak RSS)")
+    print(f"   {'files':>7} {'shape':>9} " + ' '.join(f"{name[:10]:>10}" for name in phase_names) + f" {'rss MB':>8}")
+
+    cases = []
+    for size in sizes:
+        for shape in shapes:
+            case = run_tree_case_isolated(size, shape)
+            cases.append(case)
+            rss = case['peak_rss_bytes']
+            rss_text = f"{rss / 2**20:>8.1f}" if rss is not None else f"{'n/a':>8}"
+            print(f"   {size:>7} {shape:>9} " +
+                  ' '.join(f"{case['phases'][name]:>10.4f}" for name in phase_names) + f" {rss_text}")
+
+    report = {
+        'generator_version': gen.GENERATOR_VERSION,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'cases': cases,
+    }
+    if report_path:
+        with open(report_path, 'w') as f:
+            json.dump(report, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"   📄 Report written to {report_path}")
+
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, threshold)
+        if regressions:
+            print(f"   ❌ {len(regressions)} phase(s) more than {threshold:.0%} slower than {baseline_path}:")
+            for case, phase, before, after in regressions:
+                print(f"      {case} {phase}: {before:.4f}s -> {after:.4f}s")
+            return 1
+        print(f"   ✅ No phase more than {threshold:.0%} slower than {baseline_path}")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Xcode project generator")
+    parser.add_argument('--suite', choices=('micro', 'trees', 'all'), default='all',
+                        help="in-memory hot paths, on-disk synthetic trees, or both (default: %(default)s)")
+    parser.add_argument('--sizes', default="1000,10000,100000",
+                        help="comma-separated synthetic file counts for the micro suite (default: %(default)s)")
+    parser.add_argument('--tree-sizes', default="100,10000,100000",
+                        help="comma-separated Swift file counts for the tree suite (default: %(default)s)")
+    parser.add_argument('--shapes', default=','.join(TREE_SHAPES),
+                        help="comma-separated tree shapes (default: %(default)s)")
+    parser.add_argument('--json', metavar='PATH', help="write the tree suite report as JSON")
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="compare the tree suite against an earlier --json report; exit 1 on regressions")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="slowdown per phase tolerated by --compare (default: %(default)s)")
+    parser.add_argument('--tree-case', help=argparse.SUPPRESS)
+    args = parser.parse_args(sys.argv[1:] if argv is None else argv)
+
+    if args.tree_case:
+        size, shape = args.tree_case.split(':')
+        json.dump(run_tree_case(int(size), shape), sys.stdout)
+        return 0
+
+    if args.suite in ('trees', 'all'):
+        shapes = args.shapes.split(',')
+        unknown = [shape for shape in shapes if shape not in TREE_SHAPES]
+        if unknown:
+            parser.error(f"unknown shape(s): {', '.join(unknown)}")
+        status = bench_trees([int(size) for size in args.tree_sizes.split(',')], shapes,
+                             args.json, args.compare, args.threshold)
+        if args.suite == 'trees':
+            return status
+        print()
+    else:
+        status = 0
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    print("⏱️  Group emission (directory index + PBXGroup section)")
+    print(f"   {'files':>8} {'groups':>8} {'seconds':>10} {'µs/file':>9}")
+    for size in sizes:
+        result = bench_group_emission(size)
+        print(f"   {result['files']:>8} {result['groups']:>8} "
+              f"{result['seconds']:>10.4f} {result['us_per_file']:>9.2f}")
+
+    print()
+    print("⏱️  ID generation (IDs only: MD5 loop, raw blake2b, IdAllocator; then IDs + per-file records)")
+    print(f"   {'files':>8} {'md5':>9} {'blake2b':>9} {'allocator':>10} {'legacy':>9} {'allocator':>10}")
+    for size in sizes:
+        result = bench_id_allocation(size)
+        print(f"   {result['files']:>8} {result['md5_hash_seconds']:>9.4f} "
+              f"{result['blake2b_hash_seconds']:>9.4f} {result['allocator_ids_seconds']:>10.4f} "
+              f"{result['legacy_seconds']:>9.4f} {result['allocator_seconds']:>10.4f}")
+
+    print()
+    print("🧠 File records: per-file dicts vs FileTable (tracemalloc, MB)")
+    print(f"   {'files':>8} {'legacy kept':>12} {'legacy peak':>12} {'table kept':>11} {'table peak':>11} "
+          f"{'legacy s':>9} {'table s':>8}")
+    for size in sizes:
+        result = bench_file_table_memory(size)
+        print(f"   {result['files']:>8} {result['legacy_retained_bytes'] / 1e6:>12.2f} "
+              f"{result['legacy_peak_bytes'] / 1e6:>12.2f} {result['compact_retained_bytes'] / 1e6:>11.2f} "
+              f"{result['compact_peak_bytes'] / 1e6:>11.2f} {result['legacy_seconds']:>9.4f} "
+              f"{result['compact_seconds']:>8.4f}")
+
+    return status
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+
+"""
+Build-log analyzer for xcodebuild output
+Streams logs in blocks of whole lines and totals the Swift type-checking times printed by
+-debug-time-function-bodies and -warn-long-function-bodies per function, per file and per build phase
+"""
+
+import os
+import re
+import sys
+
+# -debug-time-function-bodies: "12.34ms\t/path/File.swift:42:17\tinstance method load()";
+# -debug-time-expression-type-checking prints the same lines without the declaration
+TIMING_RE = re.compile(r'^[ \t]*(\d+(?:\.\d+)?)ms\t([^\t\n]+?):(\d+):(\d+)(?:\t([^\n]*?))?[ \t\r]*$', re.M)
+# -warn-long-function-bodies and -warn-long-expression-type-checking
+WARNING_RE = re.compile(r"(.+?):(\d+):(\d+): warning: (.+) took (\d+)ms to type-check \(limit: (\d+)ms\)")
+# xcodebuild task lines: "SwiftCompile normal arm64 /path/File.swift (in target 'App' from project 'App')"
+TASK_RE = re.compile(r"([A-Z][A-Za-z]+) .*\(in target '([^']*)' from project '[^']*'\)")
+# -showBuildTimingSummary: "SwiftCompile (45 tasks) | 12.345 seconds"
+SUMMARY_RE = re.compile(r"([A-Z][A-Za-z]+) \((\d+) tasks?\) \| (\d+(?:\.\d+)?) seconds")
+
+# Logs are read in blocks of whole lines, however long the log is
+READ_BLOCK_SIZE = 1 << 20
+
+def lines_containing(text, needle):
+    """Yield each line of text that contains needle, found with str.find rather than a regex per line"""
+    at = text.find(needle)
+    while at != -1:
+        start = text.rfind('\n', 0, at) + 1
+        end = text.find('\n', at)
+        if end == -1:
+            end = len(text)
+        yield text[start:end]
+        at = text.find(needle, end)
+
+class LogStats:
+    """Running totals for one or more build logs, fed a block of whole lines at a time
+
+    A function type-checked by several builds in one log (clean, then build; or one
+    pass per architecture) adds up, with count saying how often it was seen.
+    """
+
+    def __init__(self):
+        self.logs = []
+        self.lines = 0
+        self.functions = {}    # (file, line, column, declaration) -> [ms, count]
+        self.expressions = {}  # (file, line, column) -> [ms, count]
+        self.warnings = {}     # (file, line, column, what) -> [slowest ms, count, limit]
+        self.tasks = {}        # phase -> tasks started
+        self.targets = {}      # target -> tasks started
+        self.summary = {}      # phase -> [tasks, seconds] from -showBuildTimingSummary
+        self.paths = {}        # one string per file path, however many lines name it
+
+    def feed(self, text):
+        """Account for a block of complete log lines
+
+        Timing lines are most of a timed log and are matched by one multi-line regex over
+        the block; the rarer warnings, task lines and summaries are found by substring first.
+        """
+        self.lines += text.count('\n')
+        paths = self.paths
+        functions = self.functions
+        expressions = self.expressions
+        for ms, path, row, column, declaration in TIMING_RE.findall(text):
+            path = paths.setdefault(path, path)
+            if declaration:
+                entry = functions.get((path, row, column, declaration))
+                if entry is None:
+                    entry = functions[path, row, column, declaration] = [0.0, 0]
+            else:
+                entry = expressions.get((path, row, column))
+                if entry is None:
+                    entry = expressions[path, row, column] = [0.0, 0]
+            entry[0] += float(ms)
+            entry[1] += 1
+
+        for line in lines_containing(text, 'to type-check'):
+            m = WARNING_RE.match(line)
+            if m is not None:
+                path, row, column, what, ms, limit = m.groups()
+                entry = self.warnings.setdefault((path, row, column, what), [0, 0, int(limit)])
+                entry[0] = max(entry[0], int(ms))
+                entry[1] += 1
+        for line in lines_containing(text, "(in target '"):
+            m = TASK_RE.match(line)
+            if m is not None:
+                phase, target = m.groups()
+                self.tasks[phase] = self.tasks.get(phase, 0) + 1
+                self.targets[target] = self.targets.get(target, 0) + 1
+        for line in lines_containing(text, ' seconds'):
+            m = SUMMARY_RE.match(line)
+            if m is not None:
+                entry = self.summary.setdefault(m.group(1), [0, 0.0])
+                entry[0] += int(m.group(2))
+                entry[1] += float(m.group(3))
+
+    def read(self, path):
+        """Feed the log at path ("-" for stdin) in blocks of whole lines, never holding all of it"""
+        self.logs.append(path)
+        f = sys.stdin if path == '-' else open(path, encoding='utf-8', errors='replace')
+        try:
+            rest = ''
+            while True:
+                block = f.read(READ_BLOCK_SIZE)
+                if not block:
+                    break
+                cut = block.rfind('\n') + 1
+                if cut == 0:
+                    rest += block
+                    continue
+                self.feed(rest + block[:cut])
+                rest = block[cut:]
+            if rest:
+                self.feed(rest + '\n')
+        finally:
+            if f is not sys.stdin:
+                f.close()
+
+def analyze(paths):
+    """LogStats for the logs at paths, read one after the other"""
+    stats = LogStats()
+    for path in paths:
+        stats.read(path)
+    return stats
+
+def report(stats, limit=None):
+    """Machine-readable analysis, slowest first: files, then the limit slowest functions,
+    expressions and warnings (all of them without a limit), then build phases
+
+    Without -debug-time-function-bodies output the functions over the
+    -warn-long-function-bodies limit stand in, so files are still ranked.
+    """
+    import heapq
+
+    source = 'timing'
+    functions = stats.functions
+    if not functions:
+        source = 'warnings'
+        functions = {key: [ms, count] for key, (ms, count, _) in stats.warnings.items() if key[3] != 'expression'}
+
+    files = {}
+    for (path, _, _, _), (ms, _) in functions.items():
+        entry = files.get(path)
+        if entry is None:
+            entry = files[path] = {'file': path, 'ms': 0.0, 'functions': 0, 'expression_ms': 0.0}
+        entry['ms'] += ms
+        entry['functions'] += 1
+    for (path, _, _), (ms, _) in stats.expressions.items():
+        entry = files.get(path)
+        if entry is None:
+            entry = files[path] = {'file': path, 'ms': 0.0, 'functions': 0, 'expression_ms': 0.0}
+        entry['expression_ms'] += ms
+    for entry in files.values():
+        entry['ms'] = round(entry['ms'], 2)
+        entry['expression_ms'] = round(entry['expression_ms'], 2)
+
+    def slowest(entries):
+        """(key, totals) pairs of the limit slowest entries with time spent, slowest first"""
+        timed = ((key, totals) for key, totals in entries.items() if totals[0] > 0)
+        order = lambda item: (-item[1][0], item[0])
+        return sorted(timed, key=order) if limit is None else heapq.nsmallest(limit, timed, key=order)
+
+    # Task counts come from the timing summary when the log has one, else from the task lines
+    phases = {phase: {'tasks': count, 'seconds': None} for phase, count in stats.tasks.items()}
+    for phase, (count, seconds) in stats.summary.items():
+        phases[phase] = {'tasks': count, 'seconds': round(seconds, 3)}
+
+    return {
+        'logs': stats.logs,
+        'lines': stats.lines,
+        'source': source,
+        'total_ms': round(sum(ms for ms, _ in functions.values()), 2),
+        'function_count': len(functions),
+        'expression_count': len(stats.expressions),
+        'warning_count': len(stats.warnings),
+        'files': sorted(files.values(), key=lambda entry: (-entry['ms'], -entry['expression_ms'], entry['file'])),
+        'functions': [{'file': path, 'line': int(row), 'column': int(column), 'name': name, 'ms': round(ms, 2),
+                       'count': count}
+                      for (path, row, column, name), (ms, count) in slowest(functions)],
+        'expressions': [{'file': path, 'line': int(row), 'column': int(column), 'ms': round(ms, 2), 'count': count}
+                        for (path, row, column), (ms, count) in slowest(stats.expressions)],
+        'warnings': [{'file': path, 'line': int(row), 'column': int(column), 'name': what, 'ms': ms,
+                      'limit': limit_ms, 'count': count}
+                     for (path, row, column, what), (ms, count, limit_ms) in slowest(stats.warnings)],
+        'phases': dict(sorted(phases.items(), key=lambda item: (-(item[1]['seconds'] or 0), -item[1]['tasks'],
+                                                                item[0]))),
+        'targets': dict(sorted(stats.targets.items(), key=lambda item: (-item[1], item[0]))),
+    }
+
+def short_paths(analysis):
+    """Map each file in the analysis to its path below the directory all of them share"""
+    paths = {entry['file'] for key in ('files', 'functions', 'expressions', 'warnings') for entry in analysis[key]}
+    if len(paths) < 2:
+        return {path: os.path.basename(path) for path in paths}
+    try:
+        root = os.path.commonpath(paths)
+    except ValueError:
+        return {path: path for path in paths}
+    return {path: os.path.relpath(path, root) for path in paths}
+
+def report_lines(analysis, limit=10):
+    """Human-readable ranking of report(), at most limit entries per list"""
+    short = short_paths(analysis)
+    lines = [f"   {len(analysis['logs'])} log(s), {analysis['lines']} lines"]
+    if analysis['files']:
+        what = "type-checking" if analysis['source'] == 'timing' else "type-checking over the warning limit"
+        lines.append(f"   {analysis['total_ms'] / 1000:.2f} s of {what}: {analysis['function_count']} functions "
+                     f"in {len(analysis['files'])} files")
+        lines.append("   Slowest files:")
+        for entry in analysis['files'][:limit]:
+            lines.append(f"      {entry['ms']:>10.1f} ms  {short[entry['file']]} "
+                         f"({entry['functions']} function{'s' if entry['functions'] != 1 else ''})")
+    if analysis['functions']:
+        lines.append("   Slowest functions:")
+        for entry in analysis['functions'][:limit]:
+            seen = f" ×{entry['count']}" if entry['count'] > 1 else ""
+            lines.append(f"      {entry['ms']:>10.1f} ms  {short[entry['file']]}:{entry['line']}  {entry['name']}{seen}")
+    if analysis['expressions']:
+        lines.append("   Slowest expressions:")
+        for entry in analysis['expressions'][:limit]:
+            lines.append(f"      {entry['ms']:>10.1f} ms  {short[entry['file']]}:{entry['line']}:{entry['column']}")
+    if analysis['warnings']:
+        lines.append(f"   Over the type-check limit: {analysis['warning_count']}")
+        for entry in analysis['warnings'][:limit]:
+            lines.append(f"      {entry['ms']:>10} ms  {short[entry['file']]}:{entry['line']}  {entry['name']} "
+                         f"(limit {entry['limit']} ms)")
+    if analysis['phases']:
+        lines.append("   Build phases:")
+        for phase, entry in list(analysis['phases'].items())[:limit]:
+            took = f", {entry['seconds']:.2f} s" if entry['seconds'] is not None else ""
+            lines.append(f"      {phase}: {entry['tasks']} task{'s' if entry['tasks'] != 1 else ''}{took}")
+    if not analysis['files'] and not analysis['warnings']:
+        lines.append("   No type-checking times in the log: generate with --compile-timing, rebuild, "
+                     "and analyze the new log")
+    return lines
@@ -39,32 +39,80 @@ SIMULATOR="iPhone 15 Pro"
 echo -e "${BLUE}Selected Simulator:${NC} $SIMULATOR"
 echo ""
 
-# Step 3: Clean previous builds
-echo "🧹 Cleaning previous builds..."
-rm -rf ~/Library/Developer/Xcode/DerivedData/GreatFeelSwiftUI-*
-xcodebuild -project GreatFeelSwiftUI.xcodeproj -scheme GreatFeelSwiftUI clean > /dev/null 2>&1
-echo -e "${GREEN}✓${NC} Clean complete"
-echo ""
+# Step 3: Ask the generator what changed since the last successful simulator build
+# (FULL_BUILD=1 ./build_simulator.sh always cleans and rebuilds; COMPILE_TIMING=1 also
+# times every Swift function body and ranks the slowest once the build is done)
+GENERATOR_FLAGS=""
+if [ -n "$COMPILE_TIMING" ]; then
+    GENERATOR_FLAGS="--compile-timing"
+fi
+BUILD_NEEDED="clean"
+if command -v python3 &> /dev/null; then
+    # --quiet keeps the progress output out of the build log but still prints why generation failed
+    if ! python3 generate_xcode_project.py --incremental --quiet $GENERATOR_FLAGS; then
+        echo -e "${RED}❌ Generating the Xcode project failed; fix the error above before building${NC}"
+        exit 1
+    fi
+    if ! VALIDATION=$(python3 generate_xcode_project.py --validate); then
+        echo "$VALIDATION"
+        echo -e "${RED}❌ The generated project is inconsistent; fix it before building${NC}"
+        exit 1
+    fi
+    BUILD_NEEDED=$(python3 generate_xcode_project.py --build-status simulator)
+fi
+if [ -n "$FULL_BUILD" ]; then
+    BUILD_NEEDED="clean"
+fi
+APP_PATH=$(find ~/Library/Developer/Xcode/DerivedData/GreatFeelSwiftUI-*/Build/Products/Debug-iphonesimulator -name "GreatFeelSwiftUI.app" -print -quit 2>/dev/null || true)
+if [ "$BUILD_NEEDED" = "none" ] && [ -z "$APP_PATH" ]; then
+    BUILD_NEEDED="incremental"
+fi
 
-# Step 4: Build for simulator
-echo "🔨 Building for simulator..."
-echo "   This may take a minute..."
+if [ "$BUILD_NEEDED" = "clean" ]; then
+    echo "🧹 Cleaning previous builds..."
+    rm -rf ~/Library/Developer/Xcode/DerivedData/GreatFeelSwiftUI-*
+    xcodebuild -project GreatFeelSwiftUI.xcodeproj -scheme GreatFeelSwiftUI clean > /dev/null 2>&1
+    echo -e "${GREEN}✓${NC} Clean complete"
+else
+    echo -e "${GREEN}✓${NC} Settings unchanged since the last build, keeping DerivedData"
+fi
 echo ""
 
+# Step 4: Build for simulator
 BUILD_LOG="simulator_build.txt"
 
-if xcodebuild -project GreatFeelSwiftUI.xcodeproj \
-    -scheme GreatFeelSwiftUI \
-    -destination "platform=iOS Simulator,name=$SIMULATOR" \
-    -sdk iphonesimulator \
-    -configuration Debug \
-    CODE_SIGN_IDENTITY="" \
-    CODE_SIGNING_REQUIRED=NO \
-    CODE_SIGNING_ALLOWED=NO \
-    build > "$BUILD_LOG" 2>&1; then
-
-    echo -e "${GREEN}✅ Build succeeded!${NC}"
+if [ "$BUILD_NEEDED" = "none" ]; then
+    echo -e "${GREEN}✓${NC} No sources or resources changed since the last build, skipping xcodebuild"
     echo ""
+    BUILD_OK=true
+else
+    echo "🔨 Building for simulator ($BUILD_NEEDED)..."
+    echo "   This may take a minute..."
+    echo ""
+
+    BUILD_OK=false
+    if xcodebuild -project GreatFeelSwiftUI.xcodeproj \
+        -scheme GreatFeelSwiftUI \
+        -destination "platform=iOS Simulator,name=$SIMULATOR" \
+        -sdk iphonesimulator \
+        -configuration Debug \
+        -showBuildTimingSummary \
+        CODE_SIGN_IDENTITY="" \
+        CODE_SIGNING_REQUIRED=NO \
+        CODE_SIGNING_ALLOWED=NO \
+        build > "$BUILD_LOG" 2>&1; then
+        BUILD_OK=true
+        python3 generate_xcode_project.py --mark-built simulator > /dev/null 2>&1 || true
+        echo -e "${GREEN}✅ Build succeeded!${NC}"
+        echo ""
+    fi
+    if [ -n "$COMPILE_TIMING" ]; then
+        python3 generate_xcode_project.py --build-log "$BUILD_LOG" --build-log-json simulator_build_timing.json
+        echo ""
+    fi
+fi
+
+if [ "$BUILD_OK" = true ]; then
 
     # Step 5: Install and run on simulator
     echo "🚀 Launching simulator..."
@@ -2,294 +2,1693 @@
 
 """
 Xcode Project Generator for GreatFeel SwiftUI
-Generates a complete, valid Xcode project with all Swift files properly configured
+Generates a complete, valid Xcode project with all Swift files and resources properly configured
 """
 
 import os
+import sys
 import hashlib
 import json
+import contextlib
+import re
+import stat
+import time
+
+GENERATOR_VERSION = 4
+PROJECT_DIR = "GreatFeelSwiftUI.xcodeproj"
+MANIFEST_PATH = ".xcodegen_manifest.json"
 
 def generate_uuid(name):
     """Generate a consistent 24-character hex ID for Xcode"""
-    hash_obj = hashlib.md5(name.encode())
-    return hash_obj.hexdigest()[:24].upper()
+    return hashlib.blake2b(name.encode(), digest_size=12).hexdigest().upper()
 
-def find_swift_files(base_path):
-    """Find all Swift files and organize by directory"""
-    files = {}
-    for root, dirs, filenames in os.walk(base_path):
-        # Skip hidden directories and build artifacts
-        dirs[:] = [d for d in dirs if not d.startswith('.') and d != 'build']
+DISCOVERY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+SCAN_CACHE_PATH = ".xcodegen_cache.json"
 
-        for filename in filenames:
-            if filename.endswith('.swift'):
-                rel_path = os.path.relpath(os.path.join(root, filename), base_path)
-                files[rel_path] = filename
+# Files the scanner collects: extension -> (lastKnownFileType, build phase)
+FILE_TYPES = {
+    '.swift': ('sourcecode.swift', 'Sources'),
+    '.xcassets': ('folder.assetcatalog', 'Resources'),
+    '.mp4': ('file', 'Resources'),
+    '.mov': ('video.quicktime', 'Resources'),
+    '.m4v': ('video.mpeg4', 'Resources'),
+    '.mp3': ('audio.mp3', 'Resources'),
+    '.wav': ('audio.wav', 'Resources'),
+    '.aiff': ('audio.aiff', 'Resources'),
+    '.m4a': ('file', 'Resources'),
+    '.caf': ('file', 'Resources'),
+    '.ttf': ('file', 'Resources'),
+    '.otf': ('file', 'Resources'),
+    '.json': ('text.json', 'Resources'),
+    '.plist': ('text.plist.xml', 'Resources'),
+}
 
-    return files
+# Directory bundles added as a single reference; the scanner never descends into them
+BUNDLE_EXTENSIONS = ('.xcassets',)
 
-def create_pbxproj(swift_files):
-    """Generate complete project.pbxproj content"""
+# Referenced by build settings rather than copied into the bundle
+UNBUNDLED_FILES = ('Info.plist',)
+
+# Anything that changes which files a scan returns besides the ignore rules; part of the scan cache key
+SCAN_RULES = {
+    'extensions': sorted(FILE_TYPES),
+    'bundles': list(BUNDLE_EXTENSIONS),
+}
+
+# .gitignore-style rules applied before any from .gitignore files or SCAN_IGNORE_PATH, so those can
+# re-include a directory with "!": hidden directories, build output and dependency checkouts
+DEFAULT_IGNORE = ('.*/', 'build/', 'DerivedData/', 'Pods/', 'Carthage/', 'node_modules/')
+SCAN_IGNORE_PATH = ".xcodegenignore"
+
+# Directories modified this close to a scan may change again within the same
+# mtime tick, so their listings are not cached
+RACY_WINDOW_NS = 2 * 10**9
+
+def classify_file(name):
+    """Return (lastKnownFileType, build phase or None) for a scanned file name"""
+    # The scanner only returns names ending in a FILE_TYPES extension, so the last dot starts it
+    file_type, phase = FILE_TYPES[name[name.rfind('.'):].lower()]
+    if name in UNBUNDLED_FILES:
+        phase = None
+    return file_type, phase
+
+@contextlib.contextmanager
+def gc_paused():
+    """Hold off the cyclic garbage collector while building many records that never form cycles
+
+    Slotted records are tracked by the collector (string-only dicts aren't), so creating
+    100k of them would otherwise set off a collection every few hundred allocations.
+    """
+    import gc
+
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+def quote(value):
+    """Quote a pbxproj string value the way Xcode does when it isn't a plain word"""
+    if value and all(c.isalnum() or c in '_$/:.' for c in value) and '___' not in value and '//' not in value:
+        return value
+    escaped = value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\t', '\\t')
+    return f'"{escaped}"'
+
+def parse_ignore_line(line):
+    """Split a .gitignore line into (glob, negated, directory only, anchored), or None for blanks and comments"""
+    stripped = line.rstrip()
+    if not stripped or stripped.startswith('#'):
+        return None
+    negated = stripped.startswith('!')
+    if negated:
+        stripped = stripped[1:]
+    if stripped[:1] == '\\' and stripped[1:2] in ('#', '!'):
+        stripped = stripped[1:]
+    directory = stripped.endswith('/')
+    glob = stripped.rstrip('/')
+    # As in git, a slash anywhere but at the end ties the pattern to the directory of its file
+    anchored = '/' in glob
+    glob = glob.lstrip('/')
+    if not glob:
+        return None
+    return glob, negated, directory, anchored
+
+class ScanRules:
+    """.gitignore-style rules deciding which directories and files the scanner skips
+
+    Rules are (pattern, origin) pairs, patterns relative to the source root, in
+    precedence order: as in git the last rule that matches decides, a "!" rule
+    re-includes what an earlier one excluded, and nothing below an excluded directory
+    is looked at. They are compiled once into at most two regexes per entry kind, one
+    for rules without a slash (matched against the entry's name) and one for the rest
+    (matched against its path), with alternatives ordered last rule first so a single
+    match finds the deciding rule.
+    """
+
+    def __init__(self, rules):
+        self.rules = []
+        parsed = []
+        for pattern, origin in rules:
+            parts = parse_ignore_line(pattern)
+            if parts is not None:
+                self.rules.append((pattern, origin, parts[1]))
+                parsed.append(parts)
+        self.patterns = [rule[0] for rule in self.rules]
+        self._dir_matchers = self._compile(parsed, lambda parts: True)
+        self._file_matchers = self._compile(parsed, lambda parts: not parts[2])
+        # The scanner only asks about files of a type it collects, so rules ending in another
+        # extension ("*.pbxuser") can't decide anything there and are left out of its regexes
+        self._scanned_file_matchers = self._compile(
+            parsed, lambda parts: not parts[2] and scannable_suffix(parts[0]))
+
+    @staticmethod
+    def _compile(parsed, applies):
+        """[(regex, rule index of each group, matches the path rather than the name)] for the rules applies() accepts"""
+        matchers = []
+        for anchored in (True, False):
+            indices = [n for n in range(len(parsed) - 1, -1, -1) if parsed[n][3] == anchored and applies(parsed[n])]
+            if indices:
+                alternatives = [f"({glob_regex(parsed[n][0])}\\Z)" for n in indices]
+                matchers.append((re.compile('|'.join(alternatives), re.DOTALL), indices, anchored))
+        return matchers
+
+    def _decide(self, matchers, rel_path):
+        best = -1
+        for regex, indices, anchored in matchers:
+            m = regex.match(rel_path if anchored else rel_path.rpartition('/')[2])
+            if m is not None and indices[m.lastindex - 1] > best:
+                best = indices[m.lastindex - 1]
+        return self.rules[best] if best >= 0 else None
+
+    def match(self, rel_path, is_dir=False):
+        """The rule deciding rel_path as (pattern, origin, negated), or None if no rule matches it"""
+        return self._decide(self._dir_matchers if is_dir else self._file_matchers, rel_path)
+
+    def excluded(self, rel_path, is_dir=False):
+        """Whether the scanner skips rel_path, a directory or a file of a type it collects"""
+        rule = self._decide(self._dir_matchers if is_dir else self._scanned_file_matchers, rel_path)
+        return rule is not None and not rule[2]
+
+def scannable_suffix(glob):
+    """Whether a glob could match a file the scanner collects, judging by the literal text it ends with"""
+    tail = re.split(r'[*?\[\]]', glob)[-1]
+    if '.' not in tail:
+        return True
+    return tail[tail.rfind('.'):].lower() in FILE_TYPES
+
+def read_ignore_file(path, source=None):
+    """The rule lines of a .gitignore-style file as (line number, pattern); none if the file is missing
+
+    With a source (see project_generator), path is read from that tree instead of the disk.
+    """
+    if source is not None:
+        text = source.read_text(path)
+        if text is None:
+            return []
+        lines = text.splitlines()
+    else:
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return []
+    return [(number, line.rstrip()) for number, line in enumerate(lines, 1) if parse_ignore_line(line) is not None]
+
+def rebase_ignore_pattern(pattern, prefix):
+    """Rewrite a rule from a .gitignore above the source root to be relative to the source root
+
+    prefix is the source root's path from that .gitignore's directory, as a list of
+    names. Rules without a slash match at any depth and are kept; anchored rules lose
+    the part matching prefix, become several when a "**" could end anywhere in it, and
+    disappear when they can't match anything below the source root.
+    """
+    glob, negated, directory, anchored = parse_ignore_line(pattern)
+    if not anchored or not prefix:
+        return [pattern]
+    segments = glob.split('/')
+    rebased = []
+
+    def walk(i, j):
+        if i == len(segments):
+            return  # the rule names the source root or one of its parents
+        if j == len(prefix):
+            rebased.append('/'.join(segments[i:]))
+        elif segments[i] == '**':
+            walk(i + 1, j)
+            walk(i, j + 1)
+        elif re.fullmatch(glob_regex(segments[i]), prefix[j], re.DOTALL):
+            walk(i + 1, j + 1)
+
+    walk(0, 0)
+    return [f"{'!' if negated else ''}/{rest}{'/' if directory else ''}" for rest in dict.fromkeys(rebased)]
+
+def ignore_file_dirs(base_path, top=None):
+    """Directories whose .gitignore applies to the source root, outermost first
+
+    That's every directory from the repository root down to the source root; outside
+    a git repository only top (the current directory by default) and the source root count.
+    """
+    root = os.path.abspath(base_path)
+    dirs = []
+    directory = root
+    while True:
+        dirs.append(directory)
+        if os.path.exists(os.path.join(directory, '.git')):
+            return dirs[::-1]
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            break
+        directory = parent
+    top = os.path.abspath(top) if top is not None else os.getcwd()
+    return [directory for directory in dirs[::-1] if directory in (root, top)]
+
+def load_scan_rules(base_path, path=SCAN_IGNORE_PATH, source=None):
+    """The scanner's ignore rules: DEFAULT_IGNORE, the repository's .gitignore files, then path
+
+    path uses .gitignore syntax with patterns relative to the source root and, being
+    read last, can override the others. Only .gitignore files from the repository root
+    down to the source root are read, not ones further down the source tree. With a
+    source, every path is relative to its root and every file is read from it.
+    """
+    if source is None:
+        root = os.path.abspath(base_path)
+        dirs = ignore_file_dirs(base_path)
+    else:
+        root = os.path.normpath(base_path)
+        dirs = [os.path.normpath(directory) for directory in source.ignore_dirs(base_path)]
+    rules = [(pattern, "built-in") for pattern in DEFAULT_IGNORE]
+    for directory in dirs:
+        gitignore = os.path.join(directory, '.gitignore')
+        prefix = os.path.relpath(root, directory).split(os.sep) if directory != root else []
+        label = os.path.relpath(gitignore)
+        for number, line in read_ignore_file(gitignore, source):
+            for pattern in rebase_ignore_pattern(line, prefix):
+                origin = f"{label}:{number}" if pattern == line else f"{label}:{number} \"{line}\""
+                rules.append((pattern, origin))
+    rules.extend((line, f"{path}:{number}") for number, line in read_ignore_file(path, source))
+    return ScanRules(rules)
+
+def explain_path(base_path, path):
+    """Print which ignore rule decides whether path is scanned and whether its type is collected"""
+    rules = load_scan_rules(base_path)
+    rel = path.strip('/')
+    if rel.startswith(base_path + '/'):
+        rel = rel[len(base_path) + 1:]
+    is_dir = path.endswith('/') or os.path.isdir(os.path.join(base_path, rel))
+    print(f"🔎 {base_path}/{rel}{'/' if is_dir else ''} ({len(rules.rules)} ignore rules)")
+
+    def describe(rule):
+        return f"\"{rule[0]}\" ({rule[1]})"
+
+    parts = rel.split('/')
+    for depth in range(1, len(parts)):
+        parent = '/'.join(parts[:depth])
+        rule = rules.match(parent, True)
+        if rule is not None and not rule[2]:
+            print(f"   Not scanned: {parent}/ is excluded by {describe(rule)}")
+            return 0
+    rule = rules.match(rel, is_dir)
+    if rule is None:
+        print("   No rule matches")
+    elif rule[2]:
+        print(f"   Re-included by {describe(rule)}")
+    else:
+        print(f"   Not scanned: excluded by {describe(rule)}")
+        return 0
+
+    extension = os.path.splitext(rel)[1].lower()
+    if is_dir and not extension.endswith(BUNDLE_EXTENSIONS):
+        print("   Scanned: the scanner lists this directory")
+    elif extension in FILE_TYPES:
+        print("   Scanned: added to the project")
+    else:
+        print(f"   Not collected: the scanner only adds {', '.join(sorted(FILE_TYPES))} files")
+    return 0
+
+class ScanCache:
+    """Directory listings from the previous scan, reused while a directory's mtime is unchanged"""
+
+    def __init__(self, base_path, rules, path=SCAN_CACHE_PATH):
+        self.path = path
+        self.key = {
+            'version': GENERATOR_VERSION,
+            'rules': dict(SCAN_RULES, ignore=rules.patterns),
+            'base_path': base_path,
+        }
+        self.previous = {}
+        self.dirs = {}
+        self.id_memo = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = False
+        self.started_ns = time.time_ns()
+
+    @classmethod
+    def load(cls, base_path, rules, path=SCAN_CACHE_PATH):
+        cache = cls(base_path, rules, path)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if data.get('key') == cache.key:
+            cache.previous = data.get('dirs', {})
+            cache.id_memo = data.get('ids', {})
+        else:
+            cache.invalidated = True
+        return cache
+
+    def lookup(self, rel_dir, mtime_ns):
+        """Return the cached (file names, subdir names) for rel_dir if its mtime still matches"""
+        entry = self.previous.get(rel_dir)
+        if entry is not None and entry[0] == mtime_ns:
+            self.hits += 1
+            self.dirs[rel_dir] = entry
+            return entry[1], entry[2]
+        self.misses += 1
+        return None
+
+    def store(self, rel_dir, mtime_ns, file_names, subdir_names):
+        if mtime_ns < self.started_ns - RACY_WINDOW_NS:
+            self.dirs[rel_dir] = [mtime_ns, file_names, subdir_names]
+
+    def unchanged(self):
+        """Whether every directory was served from the loaded cache, so saving would write it back as it was"""
+        return not self.misses and not self.invalidated
+
+    def save(self):
+        data = {'key': self.key, 'dirs': self.dirs, 'ids': self.id_memo}
+        write_if_changed(self.path, json.dumps(data, separators=(',', ':'), sort_keys=True))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'directories': total,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+            'invalidated': self.invalidated,
+        }
+
+def classify_entries(prefix, entries, rules):
+    """Split one directory's entries (os.DirEntry, or anything with a name, is_dir() and
+    is_symlink()) into project file names and subdirectories to walk, applying rules"""
+    extensions = tuple(FILE_TYPES)
+    file_names = []
+    subdir_names = []
+    for entry in entries:
+        name = entry.name
+        lower_name = name.lower()
+        if entry.is_dir():
+            if rules.excluded(prefix + name, True):
+                # Pruned here, so nothing below an excluded directory is ever listed
+                continue
+            if lower_name.endswith(BUNDLE_EXTENSIONS):
+                # Asset catalogs are one reference; their interior is never walked
+                file_names.append(name)
+            elif not entry.is_symlink():
+                # Like os.walk, symlinked directories are not followed
+                subdir_names.append(name)
+        elif lower_name.endswith(extensions) and not rules.excluded(prefix + name):
+            file_names.append(name)
+    return file_names, subdir_names
+
+def scan_directory(base_path, rel_dir, rules, cache=None):
+    """List one directory: its project files as (rel_path, name) and its subdirectories"""
+    prefix = f"{rel_dir}/" if rel_dir else ""
+    dir_path = os.path.join(base_path, rel_dir)
+
+    try:
+        if cache is not None:
+            # Stat before listing so a change made during the listing shows up next run
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+            listing = cache.lookup(rel_dir, mtime_ns)
+            if listing is not None:
+                file_names, subdir_names = listing
+                return ([(prefix + name, name) for name in file_names],
+                        [prefix + name for name in subdir_names])
+
+        with os.scandir(dir_path) as entries:
+            file_names, subdir_names = classify_entries(prefix, entries, rules)
+    except OSError:
+        return [], []
+
+    if cache is not None:
+        cache.store(rel_dir, mtime_ns, file_names, subdir_names)
+    return ([(prefix + name, name) for name in file_names],
+            [prefix + name for name in subdir_names])
+
+def find_swift_files(base_path, workers=None, cache=None, rules=None):
+    """Find all Swift files and bundle resources, keyed by path relative to base_path in sorted order
+
+    Directories are listed with os.scandir on a thread pool that fans out as
+    subdirectories are discovered; results are sorted so thread timing never
+    affects the output. With a ScanCache, directories whose mtime is unchanged
+    are served from the previous scan instead of being listed again. rules
+    defaults to load_scan_rules(base_path).
+    """
+    workers = workers or DISCOVERY_WORKERS
+    if rules is None:
+        rules = load_scan_rules(base_path)
+    found = []
+
+    if workers == 1:
+        pending = ['']
+        while pending:
+            files, subdirs = scan_directory(base_path, pending.pop(), rules, cache)
+            found.extend(files)
+            pending.extend(subdirs)
+    else:
+        from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = {pool.submit(scan_directory, base_path, '', rules, cache)}
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs = future.result()
+                    found.extend(files)
+                    pending.update(pool.submit(scan_directory, base_path, d, rules, cache) for d in subdirs)
+
+    found.sort()
+    return dict(found)
+
+def build_directory_index(project_files):
+    """Index scanned files by directory in one pass: dir -> sorted subdirs and files"""
+    index = {'': {'dirs': [], 'files': []}}
+    for path in sorted(project_files):
+        directory, _, name = path.rpartition('/')
+        entry = index.get(directory)
+        if entry is None:
+            # Register the directory and any ancestors not seen yet
+            entry = index[directory] = {'dirs': [], 'files': []}
+            child = directory
+            while child:
+                parent, _, child_name = child.rpartition('/')
+                parent_entry = index.get(parent)
+                if parent_entry is not None:
+                    parent_entry['dirs'].append(child_name)
+                    break
+                index[parent] = {'dirs': [child_name], 'files': []}
+                child = parent
+        entry['files'].append((name, path))
+
+    for entry in index.values():
+        entry['dirs'].sort()
+    return index
+
+SPEC_PATH = "project_spec.json"
+
+class SpecError(Exception):
+    """Raised when the project spec is malformed or inconsistent"""
+
+# productType, product explicitFileType and product extension for each target type
+TARGET_TYPES = {
+    'application': ("com.apple.product-type.application", "wrapper.application", ".app"),
+    'unit-test': ("com.apple.product-type.bundle.unit-test", "wrapper.cfbundle", ".xctest"),
+    'ui-test': ("com.apple.product-type.bundle.ui-testing", "wrapper.cfbundle", ".xctest"),
+    'app-extension': ("com.apple.product-type.app-extension", "wrapper.app-extension", ".appex"),
+    'framework': ("com.apple.product-type.framework", "wrapper.framework", ".framework"),
+}
+
+# Copy-files phase (name, dstSubfolderSpec, ATTRIBUTES) that embeds a product of this type in its host
+EMBED_PHASES = {
+    'app-extension': ("Embed Foundation Extensions", 13, "RemoveHeadersOnCopy"),
+    'framework': ("Embed Frameworks", 10, "CodeSignOnCopy, RemoveHeadersOnCopy"),
+}
+
+# Used when there is no project_spec.json: the single app target this script has always generated.
+# Settings are layered: "base" is shared by every configuration, and each configuration only
+# lists what it overrides (a null value removes an inherited setting).
+DEFAULT_SPEC = {
+    'name': "GreatFeelSwiftUI",
+    'configurations': [
+        {'name': "Debug"},
+        {'name': "Release"},
+    ],
+    'default_configuration': "Release",
+    'settings': {
+        'base': {
+            'ALWAYS_SEARCH_USER_PATHS': "NO",
+            'ASASSETCATALOG_COMPILER_GENERATE_SWIFT_ASSET_SYMBOL_EXTENSIONS': "YES",
+            'CLANG_ANALYZER_NONNULL': "YES",
+            'CLANG_ANALYZER_NUMBER_OBJECT_CONVERSION': "YES_AGGRESSIVE",
+            'CLANG_CXX_LANGUAGE_STANDARD': "gnu++20",
+            'CLANG_ENABLE_MODULES': "YES",
+            'CLANG_ENABLE_OBJC_ARC': "YES",
+            'CLANG_ENABLE_OBJC_WEAK': "YES",
+            'CLANG_WARN_BLOCK_CAPTURE_AUTORELEASING': "YES",
+            'CLANG_WARN_BOOL_CONVERSION': "YES",
+            'CLANG_WARN_COMMA': "YES",
+            'CLANG_WARN_CONSTANT_CONVERSION': "YES",
+            'CLANG_WARN_DEPRECATED_OBJC_IMPLEMENTATIONS': "YES",
+            'CLANG_WARN_DIRECT_OBJC_ISA_USAGE': "YES_ERROR",
+            'CLANG_WARN_DOCUMENTATION_COMMENTS': "YES",
+            'CLANG_WARN_EMPTY_BODY': "YES",
+            'CLANG_WARN_ENUM_CONVERSION': "YES",
+            'CLANG_WARN_INFINITE_RECURSION': "YES",
+            'CLANG_WARN_INT_CONVERSION': "YES",
+            'CLANG_WARN_NON_LITERAL_NULL_CONVERSION': "YES",
+            'CLANG_WARN_OBJC_IMPLICIT_RETAIN_SELF': "YES",
+            'CLANG_WARN_OBJC_LITERAL_CONVERSION': "YES",
+            'CLANG_WARN_OBJC_ROOT_CLASS': "YES_ERROR",
+            'CLANG_WARN_QUOTED_INCLUDE_IN_FRAMEWORK_HEADER': "YES",
+            'CLANG_WARN_RANGE_LOOP_ANALYSIS': "YES",
+            'CLANG_WARN_STRICT_PROTOTYPES': "YES",
+            'CLANG_WARN_SUSPICIOUS_MOVE': "YES",
+            'CLANG_WARN_UNGUARDED_AVAILABILITY': "YES_AGGRESSIVE",
+            'CLANG_WARN_UNREACHABLE_CODE': "YES",
+            'CLANG_WARN__DUPLICATE_METHOD_MATCH': "YES",
+            'COPY_PHASE_STRIP': "NO",
+            'ENABLE_STRICT_OBJC_MSGSEND': "YES",
+            'ENABLE_USER_SCRIPT_SANDBOXING': "YES",
+            'GCC_C_LANGUAGE_STANDARD': "gnu17",
+            'GCC_NO_COMMON_BLOCKS': "YES",
+            'GCC_WARN_64_TO_32_BIT_CONVERSION': "YES",
+            'GCC_WARN_ABOUT_RETURN_TYPE': "YES_ERROR",
+            'GCC_WARN_UNDECLARED_SELECTOR': "YES",
+            'GCC_WARN_UNINITIALIZED_AUTOS': "YES_AGGRESSIVE",
+            'GCC_WARN_UNUSED_FUNCTION': "YES",
+            'GCC_WARN_UNUSED_VARIABLE': "YES",
+            'IPHONEOS_DEPLOYMENT_TARGET': "16.0",
+            'LOCALIZATION_PREFERS_STRING_CATALOGS': "YES",
+            'MTL_FAST_MATH': "YES",
+            'SDKROOT': "iphoneos",
+        },
+        'configurations': {
+            'Debug': {
+                'DEBUG_INFORMATION_FORMAT': "dwarf",
+                'ENABLE_TESTABILITY': "YES",
+                'GCC_DYNAMIC_NO_PIC': "NO",
+                'GCC_OPTIMIZATION_LEVEL': "0",
+                'GCC_PREPROCESSOR_DEFINITIONS': ["DEBUG=1", "$(inherited)"],
+                'MTL_ENABLE_DEBUG_INFO': "INCLUDE_SOURCE",
+                'ONLY_ACTIVE_ARCH': "YES",
+                'SWIFT_ACTIVE_COMPILATION_CONDITIONS': "DEBUG",
+                'SWIFT_OPTIMIZATION_LEVEL': "-Onone",
+            },
+            'Release': {
+                'DEBUG_INFORMATION_FORMAT': "dwarf-with-dsym",
+                'ENABLE_NS_ASSERTIONS': "NO",
+                'MTL_ENABLE_DEBUG_INFO': "NO",
+                'SWIFT_COMPILATION_MODE': "wholemodule",
+                'VALIDATE_PRODUCT': "YES",
+            },
+        },
+    },
+    'targets': [
+        {
+            'name': "GreatFeelSwiftUI",
+            'type': "application",
+            'sources': ["**"],
+            'settings': {
+                'base': {
+                    'ASASSETCATALOG_COMPILER_APPICON_NAME': "AppIcon",
+                    'ASASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME': "AccentColor",
+                    'CODE_SIGN_STYLE': "Automatic",
+                    'CURRENT_PROJECT_VERSION': "1",
+                    'DEVELOPMENT_ASSET_PATHS': "",
+                    'ENABLE_PREVIEWS': "YES",
+                    'GENERATE_INFOPLIST_FILE': "NO",
+                    'INFOPLIST_FILE': "Info.plist",
+                    'INFOPLIST_KEY_UIApplicationSceneManifest_Generation': "YES",
+                    'INFOPLIST_KEY_UIApplicationSupportsIndirectInputEvents': "YES",
+                    'INFOPLIST_KEY_UILaunchScreen_Generation': "YES",
+                    'INFOPLIST_KEY_UISupportedInterfaceOrientations_iPad': "UIInterfaceOrientationPortrait UIInterfaceOrientationPortraitUpsideDown UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight",
+                    'INFOPLIST_KEY_UISupportedInterfaceOrientations_iPhone': "UIInterfaceOrientationPortrait UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight",
+                    'LD_RUNPATH_SEARCH_PATHS': ["$(inherited)", "@executable_path/Frameworks"],
+                    'MARKETING_VERSION': "1.0",
+                    'PRODUCT_BUNDLE_IDENTIFIER': "com.greatfeel.GreatFeelSwiftUI",
+                    'PRODUCT_NAME': "GreatFeelSwiftUI",
+                    'SWIFT_EMIT_LOC_STRINGS': "YES",
+                    'SWIFT_VERSION': "5.0",
+                    'TARGETED_DEVICE_FAMILY': "1,2",
+                },
+            },
+        },
+    ],
+}
+
+# Defaults for the spec's "schemes" section: builds and tests use every core, tests keep their
+# order and skip coverage unless asked, and the primary app gets a Fast Debug scheme
+SCHEME_OPTIONS = {
+    'parallel_builds': True,
+    'parallel_tests': True,
+    'random_order': False,
+    'code_coverage': False,
+    'fast_debug': True,
+    'fast_debug_configuration': None,
+}
+
+# The spec's "resources" section and its defaults: size budgets in bytes (None for no budget), with
+# "budgets" mapping source globs to a budget for the files they match, and whether identical files
+# are copied into a bundle only once
+RESOURCE_OPTIONS = {
+    'max_file_bytes': None,
+    'max_total_bytes': None,
+    'budgets': {},
+    'single_copy': False,
+}
+
+def load_spec(path=None):
+    """Load and check the project spec; without a spec file the built-in DEFAULT_SPEC is used"""
+    if path is None:
+        if not os.path.exists(SPEC_PATH):
+            return DEFAULT_SPEC
+        path = SPEC_PATH
+    try:
+        with open(path) as f:
+            spec = json.load(f)
+    except OSError as e:
+        raise SpecError(f"cannot read {path}: {e.strerror}")
+    except ValueError as e:
+        raise SpecError(f"{path} is not valid JSON: {e}")
+    check_spec(spec)
+    return spec
+
+def configuration_chains(spec):
+    """Map each configuration to the configurations whose overrides it applies, base-most first"""
+    parents = {}
+    for config in spec['configurations']:
+        if config['name'] in parents:
+            raise SpecError(f"configuration '{config['name']}' is defined twice")
+        parents[config['name']] = config.get('inherits')
+
+    chains = {}
+    for name in parents:
+        chain = [name]
+        while parents[chain[-1]] is not None:
+            parent = parents[chain[-1]]
+            if parent not in parents:
+                raise SpecError(f"configuration '{chain[-1]}' inherits unknown configuration '{parent}'")
+            if parent in chain:
+                raise SpecError(f"configuration '{name}' has an inheritance cycle")
+            chain.append(parent)
+        chains[name] = chain[::-1]
+    return chains
+
+def check_spec(spec):
+    """Reject specs that would produce a project Xcode can't open"""
+    for key in ('name', 'configurations', 'targets'):
+        if not spec.get(key):
+            raise SpecError(f"spec is missing '{key}'")
+    chains = configuration_chains(spec)
+    if spec.get('default_configuration', spec['configurations'][-1]['name']) not in chains:
+        raise SpecError(f"default configuration '{spec['default_configuration']}' is not defined")
+
+    names = set()
+    for target in spec['targets']:
+        name = target.get('name')
+        if not name:
+            raise SpecError("every target needs a 'name'")
+        if name in names:
+            raise SpecError(f"target '{name}' is defined twice")
+        names.add(name)
+        if target.get('type') not in TARGET_TYPES:
+            raise SpecError(f"target '{name}' has unknown type '{target.get('type')}' "
+                            f"(expected one of: {', '.join(TARGET_TYPES)})")
+
+    by_name = {target['name']: target for target in spec['targets']}
+    for target in spec['targets']:
+        for dep in target_dependencies(target):
+            if dep not in by_name:
+                raise SpecError(f"target '{target['name']}' depends on unknown target '{dep}'")
+            if dep == target['name']:
+                raise SpecError(f"target '{dep}' depends on itself")
+        frameworks = target.get('frameworks', [])
+        if not isinstance(frameworks, list) or not all(isinstance(name, str) and name for name in frameworks):
+            raise SpecError(f"target '{target['name']}': 'frameworks' must be a list of framework names")
+        roots = target.get('roots', [])
+        if not isinstance(roots, list) or not all(isinstance(root, str) and root for root in roots):
+            raise SpecError(f"target '{target['name']}': 'roots' must be a list of source globs")
+        for dep in target.get('embed', ()):
+            if by_name.get(dep, {}).get('type') not in EMBED_PHASES:
+                raise SpecError(f"target '{target['name']}' can't embed '{dep}' "
+                                f"(only {' and '.join(EMBED_PHASES)} targets can be embedded)")
+
+    schemes = spec.get('schemes', {})
+    if not isinstance(schemes, dict):
+        raise SpecError("'schemes' must be an object of scheme options")
+    for key, value in schemes.items():
+        if key not in SCHEME_OPTIONS:
+            raise SpecError(f"unknown scheme option '{key}' (expected one of: {', '.join(SCHEME_OPTIONS)})")
+        if key == 'fast_debug_configuration':
+            if value is not None and value not in chains:
+                raise SpecError(f"fast debug configuration '{value}' is not defined")
+        elif not isinstance(value, bool):
+            raise SpecError(f"scheme option '{key}' must be true or false")
+
+    resources = spec.get('resources', {})
+    if not isinstance(resources, dict):
+        raise SpecError("'resources' must be an object of resource options")
+    for key, value in resources.items():
+        if key not in RESOURCE_OPTIONS:
+            raise SpecError(f"unknown resource option '{key}' (expected one of: {', '.join(RESOURCE_OPTIONS)})")
+        if key == 'single_copy':
+            if not isinstance(value, bool):
+                raise SpecError("resource option 'single_copy' must be true or false")
+        elif key == 'budgets':
+            if not isinstance(value, dict) or not all(isinstance(glob, str) and glob and is_byte_count(budget)
+                                                      for glob, budget in value.items()):
+                raise SpecError("resource option 'budgets' must map source globs to byte counts")
+        elif value is not None and not is_byte_count(value):
+            raise SpecError(f"resource option '{key}' must be a byte count")
+
+def is_byte_count(value):
+    """Whether a spec value is a size in bytes"""
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 0
+
+# -warn-long-function-bodies / -warn-long-expression-type-checking limit for --compile-timing, in ms
+COMPILE_TIMING_LIMIT = 100
+
+def with_compile_timing(spec, limit=COMPILE_TIMING_LIMIT):
+    """spec with Swift frontend flags in its Debug configuration that print how long every function
+    body takes to type-check and warn about bodies and expressions slower than limit ms
+
+    The flags go into the project-level OTHER_SWIFT_FLAGS after what it already has, and into
+    every target that sets its own without $(inherited), so no target misses them.
+    """
+    flags = ["-Xfrontend", "-debug-time-function-bodies",
+             "-Xfrontend", f"-warn-long-function-bodies={limit}",
+             "-Xfrontend", f"-warn-long-expression-type-checking={limit}"]
+    chains = configuration_chains(spec)
+    debug = scheme_configurations(spec)['debug']
+
+    def add_flags(layers, default):
+        current = resolve_settings(layers, chains)[debug].get('OTHER_SWIFT_FLAGS', default)
+        if current is None:
+            return layers
+        if isinstance(current, str):
+            current = current.split()
+        overrides = dict(layers.get('configurations', {}))
+        overrides[debug] = dict(overrides.get(debug, {}), OTHER_SWIFT_FLAGS=list(current) + flags)
+        return dict(layers, configurations=overrides)
+
+    targets = []
+    for target in spec['targets']:
+        own = resolve_settings(target.get('settings', {}), chains)[debug].get('OTHER_SWIFT_FLAGS')
+        inherits = own is None or "$(inherited)" in (own.split() if isinstance(own, str) else own)
+        targets.append(target if inherits else dict(target, settings=add_flags(target['settings'], None)))
+    return dict(spec, settings=add_flags(spec.get('settings', {}), ["$(inherited)"]), targets=targets)
+
+def target_dependencies(target):
+    """Targets this one depends on: explicit dependencies, embedded products and the test host"""
+    deps = list(target.get('dependencies', ()))
+    deps.extend(target.get('embed', ()))
+    if target.get('host'):
+        deps.append(target['host'])
+    return list(dict.fromkeys(deps))
+
+def resolve_settings(layers, chains):
+    """Flatten a settings layer set into one dict per configuration
+
+    Each configuration starts from the shared "base" layer and applies the overrides
+    of every configuration in its chain, so Profile can inherit Release and only
+    state what differs. Shared settings are stored once in the spec and here.
+    """
+    base = layers.get('base', {})
+    overrides = layers.get('configurations', {})
+    resolved = {}
+    for name, chain in chains.items():
+        settings = dict(base)
+        for link in chain:
+            for key, value in overrides.get(link, {}).items():
+                if value is None:
+                    settings.pop(key, None)
+                else:
+                    settings[key] = value
+        resolved[name] = settings
+    return resolved
+
+def glob_regex(pattern):
+    """Regex source for one glob: "**" spans directories, "*", "?" and "[...]" don't"""
+    out = []
+    i = 0
+    while i < len(pattern):
+        close = pattern.find(']', i + 2) if pattern[i] == '[' else -1
+        if pattern.startswith('**/', i):
+            out.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            out.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            out.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            out.append('[^/]')
+            i += 1
+        elif close != -1:
+            members = pattern[i + 1:close].replace('\\', '\\\\')
+            out.append(f"[^/{members[1:]}]" if members[0] in '!^' else f"[{members}]")
+            i = close + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return ''.join(out)
+
+def compile_globs(patterns):
+    """Compile source globs into one regex: "**" spans directories, "*", "?" and "[...]" don't"""
+    alternatives = [glob_regex(pattern) for pattern in patterns]
+    if not alternatives:
+        return None
+    return re.compile('(?:' + '|'.join(alternatives) + r')\Z', re.DOTALL)
+
+def select_sources(target, paths):
+    """Paths (relative to the source root) that belong to a target according to its globs
+
+    A target whose Swift files were derived from its "roots" only keeps the Swift
+    files listed in its "members"; resources still follow the globs. Paths in
+    "omit" (copies left out by the resources' single_copy option) are dropped.
+    """
+    include = compile_globs(target.get('sources', ["**"]))
+    exclude = compile_globs(target.get('exclude', ()))
+    if include is None:
+        return []
+    selected = [path for path in paths if include.match(path) and not (exclude and exclude.match(path))]
+    if target.get('members') is not None:
+        members = set(target['members'])
+        selected = [path for path in selected if path in members or not path.endswith('.swift')]
+    if target.get('omit'):
+        omit = set(target['omit'])
+        selected = [path for path in selected if path not in omit]
+    return selected
+
+def needs_analysis(spec):
+    """Whether the spec derives anything from the Swift sources: target roots or automatic module dependencies"""
+    if any(target.get('roots') for target in spec['targets']):
+        return True
+    modules = (spec.get('shards') or {}).get('modules', ())
+    return any(isinstance(entry, dict) and entry.get('dependencies') == 'auto' for entry in modules)
+
+def analyze_sources(base_path, project_files, workers=None):
+    """Scan the Swift files for imports and declarations on a process pool: (scan, file dependency graph)"""
+    import swift_deps
+
+    scanned = swift_deps.scan_sources(base_path, project_files, workers)
+    return scanned, swift_deps.build_graph(scanned)
+
+def derive_members(spec, project_files, graph):
+    """Give every target with "roots" only the Swift files its roots depend on
+
+    A target's sources and excludes still say which files it may compile; of those
+    it compiles the files matching its roots and everything they use, directly or
+    not, so a widget that shares one theme file doesn't compile the whole app.
+    Returns the spec with "members" set on those targets.
+    """
+    import swift_deps
+
+    paths = sorted(project_files)
+    targets = []
+    for target in spec['targets']:
+        if target.get('roots'):
+            allowed = {path for path in select_sources(target, paths) if path.endswith('.swift')}
+            roots = select_sources({'sources': target['roots']}, sorted(allowed))
+            if not roots:
+                raise SpecError(f"target '{target['name']}': 'roots' match none of its Swift sources")
+            target = dict(target, members=sorted(swift_deps.closure(graph, roots, allowed)))
+        targets.append(target)
+    return dict(spec, targets=targets)
+
+def resource_options(spec):
+    """The spec's resource options over RESOURCE_OPTIONS"""
+    return dict(RESOURCE_OPTIONS, **spec.get('resources', {}))
+
+def needs_resource_audit(spec):
+    """Whether generating the spec needs the resources hashed: only for single_copy"""
+    return resource_options(spec)['single_copy']
+
+def resource_paths(project_files):
+    """The scanned files a build copies into a bundle, relative to the source root"""
+    return [path for path, name in project_files.items() if classify_file(name)[1] == 'Resources']
+
+def resource_sizes(base_path, project_files):
+    """{path: bytes} for every resource, a bundle counting as each file inside it
+    ("Assets.xcassets/night-sky.mp4"); files that can't be read are left out"""
+    sizes = {}
+    for path in resource_paths(project_files):
+        full_path = os.path.join(base_path, path)
+        try:
+            if os.path.isdir(full_path):
+                for root, dirs, names in os.walk(full_path):
+                    dirs.sort()
+                    for name in sorted(names):
+                        file_path = os.path.join(root, name)
+                        sizes[f"{path}/{os.path.relpath(file_path, full_path)}"] = os.path.getsize(file_path)
+            else:
+                sizes[path] = os.path.getsize(full_path)
+        except OSError:
+            continue
+    return sizes
+
+def hash_resources(base_path, paths, workers=None, previous=None):
+    """{path: content hash} for resource files below base_path, hashed in chunks on a thread pool
+
+    previous is a build manifest's files; resources whose size and mtime it still
+    matches keep the hash recorded there.
+    """
+    entries = hash_inputs([f"{base_path}/{path}" for path in paths], previous, workers)
+    return {path[len(base_path) + 1:]: entry[2] for path, entry in entries.items()}
+
+def catalog_metadata(sizes, project_files):
+    """The Contents.json files inside asset catalogs, which actool reads rather than copies and which
+    are often identical, so they are left out of the duplicate search"""
+    return {path for path in sizes if path not in project_files and os.path.basename(path) == 'Contents.json'}
+
+def resource_budget(options):
+    """A function mapping a resource path to its size budget and the rule that set it: the first of
+    "budgets" whose glob matches, else max_file_bytes; (None, None) without a budget"""
+    rules = [(re.compile(glob_regex(glob) + r'\Z', re.DOTALL), budget, f'"{glob}"')
+             for glob, budget in options['budgets'].items()]
+    default = options['max_file_bytes']
+
+    def budget_of(path):
+        for pattern, budget, rule in rules:
+            if pattern.match(path):
+                return budget, rule
+        return (default, 'max_file_bytes') if default is not None else (None, None)
+    return budget_of
+
+def single_copy_resources(spec, groups, project_files):
+    """Give every target's Resources phase one copy of each group of identical files
+
+    Copies inside a bundle aren't build files of their own and can't be left out, so
+    when a target selects a bundle holding a copy it omits every loose copy; otherwise
+    it keeps the first loose copy by path and the rest go to its "omit". Returns the
+    spec and the paths some target omits.
+    """
+    paths = sorted(project_files)
+    # The bundle each copy inside one belongs to ("Assets.xcassets/a.dataset/a.mp4" -> "Assets.xcassets")
+    bundle_of = {}
+    for _, _, group in groups:
+        for path in group:
+            if path not in project_files:
+                parts = path.split('/')
+                bundle_of[path] = next((prefix for prefix in ('/'.join(parts[:i]) for i in range(1, len(parts)))
+                                        if prefix in project_files), None)
+    omitted = set()
+    targets = []
+    for target in spec['targets']:
+        selected = set(select_sources(target, paths))
+        omit = []
+        for _, _, group in groups:
+            copies = [path for path in group if path in selected]
+            bundled = any(bundle_of.get(path) in selected for path in group if path in bundle_of)
+            omit.extend(copies if bundled else copies[1:])
+        if omit:
+            target = dict(target, omit=sorted(set(target.get('omit', ())) | set(omit)))
+            omitted.update(omit)
+        targets.append(target)
+    return dict(spec, targets=targets), omitted
+
+def duplicate_resources(base_path, project_files, sizes, workers=None, previous=None):
+    """Groups of resources below base_path with identical content, as resource_audit.duplicates()"""
+    import resource_audit
+
+    return resource_audit.duplicates(sizes, lambda paths: hash_resources(base_path, paths, workers, previous),
+                                     catalog_metadata(sizes, project_files))
+
+def audit_resources(spec, project_files, sizes, groups):
+    """(spec, audit report) for resources of the given sizes and groups of identical content
+
+    With the spec's single_copy option, the spec returned leaves the extra copies out.
+    """
+    import resource_audit
+
+    options = resource_options(spec)
+    omitted = ()
+    if options['single_copy']:
+        spec, omitted = single_copy_resources(spec, groups, project_files)
+    return spec, resource_audit.report(sizes, groups, omitted, resource_budget(options), options['max_total_bytes'])
 
-    # Generate IDs for files
-    file_refs = {}
-    build_files = {}
-
-    for path, filename in swift_files.items():
-        file_id = generate_uuid(f"FILE_{path}")
-        build_id = generate_uuid(f"BUILD_{path}")
-        file_refs[path] = {'id': file_id, 'name': filename}
-        build_files[path] = {'id': build_id, 'file_ref_id': file_id, 'name': filename}
-
-    # Fixed IDs for main structure
-    PROJECT_ID = "1F1234567890ABCDEF000001"
-    TARGET_ID = "1F1234567890ABCDEF000002"
-    PRODUCTS_GROUP_ID = "1F1234567890ABCDEF000003"
-    MAIN_GROUP_ID = "1F1234567890ABCDEF000004"
-    APP_PRODUCT_ID = "1F1234567890ABCDEF000005"
-    SOURCES_PHASE_ID = "1F1234567890ABCDEF000006"
-    FRAMEWORKS_PHASE_ID = "1F1234567890ABCDEF000007"
-    RESOURCES_PHASE_ID = "1F1234567890ABCDEF000008"
-    PROJECT_CONFIG_LIST_ID = "1F1234567890ABCDEF000009"
-    TARGET_CONFIG_LIST_ID = "1F1234567890ABCDEF00000A"
-    DEBUG_PROJECT_CONFIG_ID = "1F1234567890ABCDEF00000B"
-    RELEASE_PROJECT_CONFIG_ID = "1F1234567890ABCDEF00000C"
-    DEBUG_TARGET_CONFIG_ID = "1F1234567890ABCDEF00000D"
-    RELEASE_TARGET_CONFIG_ID = "1F1234567890ABCDEF00000E"
-    MAIN_SRC_GROUP_ID = "1F1234567890ABCDEF00000F"
-
-    # Group IDs
-    group_ids = {
-        'App': generate_uuid("GROUP_App"),
-        'Models': generate_uuid("GROUP_Models"),
-        'ViewModels': generate_uuid("GROUP_ViewModels"),
-        'Views': generate_uuid("GROUP_Views"),
-        'Views/Auth': generate_uuid("GROUP_Views_Auth"),
-        'Views/Main': generate_uuid("GROUP_Views_Main"),
-        'Views/Components': generate_uuid("GROUP_Views_Components"),
-        'Views/Shared': generate_uuid("GROUP_Views_Shared"),
-        'Services': generate_uuid("GROUP_Services"),
-        'Services/Network': generate_uuid("GROUP_Services_Network"),
-        'Services/Storage': generate_uuid("GROUP_Services_Storage"),
-        'Services/Audio': generate_uuid("GROUP_Services_Audio"),
-        'Theme': generate_uuid("GROUP_Theme"),
+# Settings every module framework starts from; a module's own "settings" layer goes on top
+FRAMEWORK_SETTINGS = {
+    'CODE_SIGN_STYLE': "Automatic",
+    'CURRENT_PROJECT_VERSION': "1",
+    'DEFINES_MODULE': "YES",
+    'DYLIB_INSTALL_NAME_BASE': "@rpath",
+    'GENERATE_INFOPLIST_FILE': "YES",
+    'INSTALL_PATH': "$(LOCAL_LIBRARY_DIR)/Frameworks",
+    'LD_RUNPATH_SEARCH_PATHS': ["$(inherited)", "@executable_path/Frameworks", "@loader_path/Frameworks"],
+    'PRODUCT_NAME': "$(TARGET_NAME:c99extidentifier)",
+    'SKIP_INSTALL': "YES",
+    'SWIFT_VERSION': "5.0",
+    'TARGETED_DEVICE_FAMILY': "1,2",
+    'VERSIONING_SYSTEM': "apple-generic",
+}
+
+def plan_shards(spec, dir_index, project_files, graph=None):
+    """Split a spec with a "shards" section into the app project and one framework project per module
+
+    Module paths may end in "/*" to make every subdirectory its own module. Targets
+    stop compiling module files and link the modules they used to compile instead.
+    Modules with "dependencies": "auto" take them from the file dependency graph.
+    Returns (main spec, main project files, shards), each shard a dict with the
+    module's name, pbxproj path, files and spec.
+    """
+    config = spec['shards']
+    primary = spec['targets'][0]
+    prefix = config.get('bundle_id_prefix') or primary.get('settings', {}).get('base', {}).get(
+        'PRODUCT_BUNDLE_IDENTIFIER', spec['name'])
+
+    modules = []
+    for entry in config.get('modules', ()):
+        path = entry.get('path', '').strip('/') if isinstance(entry, dict) else ''
+        if not path:
+            raise SpecError("every shard module needs a 'path'")
+        pattern = compile_globs([path])
+        dirs = sorted(d for d in dir_index if d and pattern.match(d))
+        if not dirs and '*' not in path:
+            raise SpecError(f"shard module '{path}' has no scanned files")
+        for module_dir in dirs:
+            name = entry.get('prefix', '') + (entry['name'] if 'name' in entry and '*' not in path
+                                               else module_dir.rpartition('/')[2])
+            modules.append({'name': name, 'path': module_dir, 'entry': entry})
+
+    by_name = {}
+    for module in modules:
+        if module['name'] in by_name:
+            raise SpecError(f"shard modules '{by_name[module['name']]['path']}' and '{module['path']}' "
+                            f"are both named '{module['name']}'")
+        if module['name'] in {target['name'] for target in spec['targets']}:
+            raise SpecError(f"shard module '{module['name']}' has the same name as a target")
+        by_name[module['name']] = module
+    for module in modules:
+        for other in modules:
+            if other is not module and other['path'].startswith(module['path'] + '/'):
+                raise SpecError(f"shard modules '{module['path']}' and '{other['path']}' overlap")
+
+    module_at = {module['path']: module['name'] for module in modules}
+    module_of = {}
+    for path in project_files:
+        directory = path.rpartition('/')[0]
+        while directory:
+            if directory in module_at:
+                module_of[path] = module_at[directory]
+                break
+            directory = directory.rpartition('/')[0]
+
+    # Dependencies name modules, or match module paths with the same globs as module paths;
+    # "auto" takes the modules declaring something the module's Swift files use
+    for module in modules:
+        deps = []
+        declared = module['entry'].get('dependencies', ())
+        if declared == 'auto':
+            if graph is None:
+                raise SpecError(f"shard module '{module['name']}' has automatic dependencies but no source analysis")
+            uses = [(path, dep) for path, name in module_of.items() if name == module['name']
+                    for dep in sorted(graph.get(path, ()))]
+            # A framework can't see the app it is linked into
+            stuck = next(((path, dep) for path, dep in uses if dep not in module_of), None)
+            if stuck is not None:
+                raise SpecError(f"shard module '{module['name']}' uses app code that stays in the app project "
+                                f"({stuck[0]} -> {stuck[1]}); make that a module too")
+            deps = sorted({module_of[dep] for _, dep in uses} - {module['name']})
+            declared = ()
+        for dep in declared:
+            if dep in by_name:
+                matched = [dep]
+            else:
+                dep_pattern = compile_globs([dep.strip('/')])
+                matched = [other['name'] for other in modules if dep_pattern.match(other['path'])]
+            if not matched:
+                raise SpecError(f"shard module '{module['name']}' depends on '{dep}', which matches no module")
+            deps.extend(name for name in matched if name != module['name'])
+        module['dependencies'] = list(dict.fromkeys(deps))
+
+    # Frameworks can't link in a cycle
+    state = {}
+    def visit(name, trail):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            cycle = trail[trail.index(name):] + [name]
+            raise SpecError(f"shard modules depend on each other in a cycle: {' -> '.join(cycle)} "
+                            f"(--deps shows the file references behind each dependency)")
+        state[name] = 'visiting'
+        for dep in by_name[name]['dependencies']:
+            visit(dep, trail + [name])
+        state[name] = 'done'
+    for module in modules:
+        visit(module['name'], [])
+
+    paths = sorted(project_files)
+    targets = []
+    for target in spec['targets']:
+        used = {module_of[path] for path in select_sources(target, paths) if path in module_of}
+        targets.append(dict(
+            target,
+            exclude=list(target.get('exclude', ())) + [f"{module['path']}/**" for module in modules],
+            frameworks=list(target.get('frameworks', ())) + [m['name'] for m in modules if m['name'] in used],
+        ))
+    main_spec = dict(spec, targets=targets)
+    del main_spec['shards']
+    main_files = {path: name for path, name in project_files.items() if path not in module_of}
+
+    shards = []
+    for module in modules:
+        layers = module['entry'].get('settings', {})
+        base = dict(FRAMEWORK_SETTINGS, PRODUCT_BUNDLE_IDENTIFIER=f"{prefix}.{module['name']}")
+        base.update(layers.get('base', {}))
+        shard_spec = {
+            'name': module['name'],
+            'configurations': spec['configurations'],
+            'default_configuration': spec.get('default_configuration', spec['configurations'][-1]['name']),
+            'settings': spec.get('settings', {}),
+            'schemes': spec.get('schemes', {}),
+            'targets': [{
+                'name': module['name'],
+                'type': 'framework',
+                'sources': [f"{module['path']}/**"],
+                'frameworks': module['dependencies'],
+                'settings': dict(layers, base=base),
+            }],
+        }
+        shards.append({
+            'name': module['name'],
+            'path': f"{module['name']}.xcodeproj/project.pbxproj",
+            'files': {path: name for path, name in project_files.items() if module_of.get(path) == module['name']},
+            'spec': shard_spec,
+        })
+    return main_spec, main_files, shards
+
+# Fixed IDs for main structure
+PROJECT_ID = "1F1234567890ABCDEF000001"
+TARGET_ID = "1F1234567890ABCDEF000002"
+PRODUCTS_GROUP_ID = "1F1234567890ABCDEF000003"
+MAIN_GROUP_ID = "1F1234567890ABCDEF000004"
+APP_PRODUCT_ID = "1F1234567890ABCDEF000005"
+SOURCES_PHASE_ID = "1F1234567890ABCDEF000006"
+FRAMEWORKS_PHASE_ID = "1F1234567890ABCDEF000007"
+RESOURCES_PHASE_ID = "1F1234567890ABCDEF000008"
+PROJECT_CONFIG_LIST_ID = "1F1234567890ABCDEF000009"
+TARGET_CONFIG_LIST_ID = "1F1234567890ABCDEF00000A"
+DEBUG_PROJECT_CONFIG_ID = "1F1234567890ABCDEF00000B"
+RELEASE_PROJECT_CONFIG_ID = "1F1234567890ABCDEF00000C"
+DEBUG_TARGET_CONFIG_ID = "1F1234567890ABCDEF00000D"
+RELEASE_TARGET_CONFIG_ID = "1F1234567890ABCDEF00000E"
+MAIN_SRC_GROUP_ID = "1F1234567890ABCDEF00000F"
+
+FIXED_IDS = (
+    PROJECT_ID, TARGET_ID, PRODUCTS_GROUP_ID, MAIN_GROUP_ID, APP_PRODUCT_ID,
+    SOURCES_PHASE_ID, FRAMEWORKS_PHASE_ID, RESOURCES_PHASE_ID,
+    PROJECT_CONFIG_LIST_ID, TARGET_CONFIG_LIST_ID,
+    DEBUG_PROJECT_CONFIG_ID, RELEASE_PROJECT_CONFIG_ID,
+    DEBUG_TARGET_CONFIG_ID, RELEASE_TARGET_CONFIG_ID, MAIN_SRC_GROUP_ID,
+)
+
+# The first target in the spec keeps the IDs of the original single-target project,
+# so shared schemes that reference it by BlueprintIdentifier keep working
+PRIMARY_TARGET_IDS = {
+    'id': TARGET_ID,
+    'product_id': APP_PRODUCT_ID,
+    'config_list_id': TARGET_CONFIG_LIST_ID,
+    'phase_ids': {'Sources': SOURCES_PHASE_ID, 'Frameworks': FRAMEWORKS_PHASE_ID, 'Resources': RESOURCES_PHASE_ID},
+    'config_ids': {'Debug': DEBUG_TARGET_CONFIG_ID, 'Release': RELEASE_TARGET_CONFIG_ID},
+}
+PROJECT_CONFIG_IDS = {'Debug': DEBUG_PROJECT_CONFIG_ID, 'Release': RELEASE_PROJECT_CONFIG_ID}
+
+class IdAllocator:
+    """Hands out stable object IDs derived from a key, unique across the whole project
+
+    IDs are a 96-bit blake2b digest of the key. If a digest is already taken (by
+    another key or one of the fixed IDs) the key is re-salted as "key#1", "key#2", ...
+    until it is free. Re-salted IDs are remembered in the scan cache so they stay
+    stable across runs even if the colliding object goes away.
+    """
+
+    def __init__(self, memo=None):
+        self.memo = memo or {}
+        # Object ID -> the key it was allocated for (None for fixed and reserved IDs). Keys
+        # that got their plain digest are found through it; only the others are in known.
+        self.owners = dict.fromkeys(FIXED_IDS)
+        self.known = {}
+
+    def __len__(self):
+        return len(self.owners)
+
+    def reserve(self, object_ids):
+        """Keep IDs an existing project already uses from being handed out"""
+        owners = self.owners
+        for object_id in object_ids:
+            owners.setdefault(object_id, None)
+
+    def allocate(self, key):
+        return self.allocate_many((key,))[0]
+
+    def allocate_many(self, keys):
+        """Allocate IDs for a batch of keys, returned in the same order"""
+        keys = list(keys)
+        owners = self.owners
+        known = self.known
+        memo = self.memo
+
+        # Remembered IDs claim their slots first so they keep them
+        if memo:
+            for key in keys:
+                if key in memo and key not in known and memo[key] not in owners:
+                    owners[memo[key]] = key
+                    known[key] = memo[key]
+
+        # Hash the whole batch at once; collisions are rare enough to check in bulk.
+        # Copying a configured hasher skips blake2b's parameter parsing per key.
+        copy = hashlib.blake2b(digest_size=12).copy
+        digests = []
+        append = digests.append
+        for key in keys:
+            h = copy()
+            h.update(key.encode())
+            append(h.hexdigest().upper())
+        if owners.keys().isdisjoint(digests) and (not known or known.keys().isdisjoint(keys)):
+            count = len(owners)
+            owners.update(zip(digests, keys))
+            if len(owners) == count + len(digests):
+                return digests
+            # A digest repeats within the batch (a repeated key or a collision); every one of
+            # them was free, so dropping them again restores the state before the batch
+            for object_id in digests:
+                owners.pop(object_id, None)
+
+        # Some key was allocated before, repeats, or collides: settle them one at a time
+        for index, (key, object_id) in enumerate(zip(keys, digests)):
+            if key in known:
+                digests[index] = known[key]
+                continue
+            if owners.get(object_id) == key:
+                continue
+            salt = 0
+            while object_id in owners:
+                salt += 1
+                object_id = generate_uuid(f"{key}#{salt}")
+            owners[object_id] = key
+            if salt:
+                known[key] = digests[index] = object_id
+        return digests
+
+    def salted(self):
+        """IDs that differ from their key's plain digest; the only ones worth memoizing"""
+        return {key: object_id for key, object_id in self.known.items() if object_id != generate_uuid(key)}
+
+class FileRef:
+    """A PBXFileReference: a scanned file, or a product that build files point at
+
+    One slotted record per file instead of a dict. The name is interned and the ID
+    is the allocator's own string, so build files and sections share them rather
+    than holding copies.
+    """
+    __slots__ = ('id', 'name', 'type', 'phase')
+
+    def __init__(self, object_id, name, file_type=None, phase=None):
+        self.id = object_id
+        self.name = name
+        self.type = file_type
+        self.phase = phase
+
+class BuildFile:
+    """A PBXBuildFile: the reference it builds, its phase and, for embedded products, copy attributes"""
+    __slots__ = ('id', 'ref', 'phase', 'attributes')
+
+    def __init__(self, object_id, ref, phase, attributes=None):
+        self.id = object_id
+        self.ref = ref
+        self.phase = phase
+        self.attributes = attributes
+
+    @property
+    def name(self):
+        return self.ref.name
+
+class FileTable:
+    """Every scanned file's FileRef in path order, shared by all section emitters
+
+    Indexes like the {path: ref} dict it stands for; the ID order the file reference
+    section needs is sorted once, on first use.
+    """
+    __slots__ = ('paths', 'refs', 'index', '_by_id')
+
+    def __init__(self, paths, refs):
+        self.paths = paths
+        self.refs = refs
+        self.index = dict(zip(paths, refs))
+        self._by_id = None
+
+    def __getitem__(self, path):
+        return self.index[path]
+
+    def __contains__(self, path):
+        return path in self.index
+
+    def __iter__(self):
+        return iter(self.paths)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def values(self):
+        return self.refs
+
+    def by_id(self):
+        if self._by_id is None:
+            from operator import attrgetter
+            self._by_id = sorted(self.refs, key=attrgetter('id'))
+        return self._by_id
+
+def allocate_file_ids(project_files, ids):
+    """Generate a file reference ID for every scanned file, as a FileTable"""
+    paths = sorted(project_files)
+    file_ids = ids.allocate_many([f"FILE_{path}" for path in paths])
+
+    intern = sys.intern
+    file_types = FILE_TYPES
+    with gc_paused():
+        refs = []
+        append = refs.append
+        for path, file_id in zip(paths, file_ids):
+            filename = intern(project_files[path])
+            # Lower-case extensions are looked up directly; classify_file handles the rest
+            kind = file_types.get(filename[filename.rfind('.'):])
+            if kind is None or filename in UNBUNDLED_FILES:
+                kind = classify_file(filename)
+            append(FileRef(file_id, filename, *kind))
+        return FileTable(paths, refs)
+
+def allocate_build_files(file_refs, paths, ids, key_prefix="BUILD_"):
+    """Generate build file IDs for the bundled files among paths, which must be sorted"""
+    with gc_paused():
+        index = file_refs.index
+        refs = [(path, ref) for path, ref in zip(paths, map(index.__getitem__, paths)) if ref.phase is not None]
+        build_ids = ids.allocate_many([f"{key_prefix}{path}" for path, _ in refs])
+        return {path: BuildFile(build_id, ref, ref.phase) for (path, ref), build_id in zip(refs, build_ids)}
+
+def allocate_group_ids(dir_index, ids):
+    """Generate a PBXGroup ID for every directory below the source root"""
+    dirs = sorted(d for d in dir_index if d)
+    return dict(zip(dirs, ids.allocate_many([f"GROUP_{d}" for d in dirs])))
+
+def allocate_target_ids(target, primary, config_names, ids):
+    """Object IDs for one target: the fixed IDs for the primary target, derived ones otherwise"""
+    name = target['name']
+    if primary:
+        fixed = PRIMARY_TARGET_IDS
+        config_ids = {config: fixed['config_ids'].get(config) or ids.allocate(f"CONFIG@{name}/{config}")
+                      for config in config_names}
+        return dict(fixed, phase_ids=dict(fixed['phase_ids']), config_ids=config_ids)
+
+    target_id, product_id, config_list_id, *phase_ids = ids.allocate_many(
+        [f"TARGET@{name}", f"PRODUCT@{name}", f"CONFIGLIST@{name}"] +
+        [f"PHASE@{name}/{phase}" for phase in ('Sources', 'Frameworks', 'Resources')])
+    config_ids = ids.allocate_many([f"CONFIG@{name}/{config}" for config in config_names])
+    return {
+        'id': target_id,
+        'product_id': product_id,
+        'config_list_id': config_list_id,
+        'phase_ids': dict(zip(('Sources', 'Frameworks', 'Resources'), phase_ids)),
+        'config_ids': dict(zip(config_names, config_ids)),
     }
 
-    # Build PBXFileReference section
-    file_reference_section = ""
-    for path, info in sorted(file_refs.items()):
-        file_reference_section += f"\t\t{info['id']} /* {info['name']} */ = {{isa = PBXFileReference; lastKnownFileType = sourcecode.swift; path = {info['name']}; sourceTree = \"<group>\"; }};\n"
-
-    # Build PBXBuildFile section
-    build_file_section = ""
-    for path, info in sorted(build_files.items()):
-        build_file_section += f"\t\t{info['id']} /* {info['name']} in Sources */ = {{isa = PBXBuildFile; fileRef = {info['file_ref_id']} /* {info['name']} */; }};\n"
-
-    # Build PBXSourcesBuildPhase section
-    sources_phase_files = ""
-    for path, info in sorted(build_files.items()):
-        sources_phase_files += f"\t\t\t\t{info['id']} /* {info['name']} in Sources */,\n"
-
-    # Build PBXGroup sections
-    def get_files_in_directory(dir_path):
-        """Get file IDs for files in a specific directory"""
-        files_in_dir = []
-        for path, info in sorted(file_refs.items()):
-            file_dir = os.path.dirname(path)
-            if file_dir == dir_path:
-                files_in_dir.append(f"\t\t\t\t{info['id']} /* {info['name']} */,\n")
-        return ''.join(files_in_dir)
-
-    # Generate the complete pbxproj file
-    pbxproj_content = f'''// !$*UTF8*$!
-{{
-\tarchiveVersion = 1;
-\tclasses = {{
-\t}};
-\tobjectVersion = 56;
-\tobjects = {{
-
-/* Begin PBXBuildFile section */
-{build_file_section}/* End PBXBuildFile section */
-
-/* Begin PBXFileReference section */
-\t\t{APP_PRODUCT_ID} /* GreatFeelSwiftUI.app */ = {{isa = PBXFileReference; explicitFileType = wrapper.application; includeInIndex = 0; path = GreatFeelSwiftUI.app; sourceTree = BUILT_PRODUCTS_DIR; }};
-{file_reference_section}/* End PBXFileReference section */
-
-/* Begin PBXFrameworksBuildPhase section */
-\t\t{FRAMEWORKS_PHASE_ID} /* Frameworks */ = {{
-\t\t\tisa = PBXFrameworksBuildPhase;
-\t\t\tbuildActionMask = 2147483647;
-\t\t\tfiles = (
-\t\t\t);
-\t\t\trunOnlyForDeploymentPostprocessing = 0;
+def allocate_project_config_ids(spec, ids):
+    """Project-level configuration IDs: fixed for Debug and Release, derived for anything else"""
+    names = [config['name'] for config in spec['configurations']]
+    return {name: PROJECT_CONFIG_IDS.get(name) or ids.allocate(f"CONFIG@{name}") for name in names}
+
+def build_targets(spec, file_refs, ids):
+    """Resolve every spec target into its IDs, build files, dependencies and settings"""
+    chains = configuration_chains(spec)
+    config_names = list(chains)
+    paths = sorted(file_refs)
+
+    # Frameworks built by other projects in the workspace, referenced by product name
+    external = {}
+    for target in spec['targets']:
+        for framework in target.get('frameworks', ()):
+            if framework not in external:
+                external[framework] = {
+                    'name': framework, 'type': 'framework', 'product_id': ids.allocate(f"FRAMEWORK@{framework}"),
+                    'product_path': f"{framework}.framework", 'product_file_type': "wrapper.framework",
+                }
+
+    targets = []
+    for index, target in enumerate(spec['targets']):
+        name = target['name']
+        product_type, product_file_type, extension = TARGET_TYPES[target['type']]
+        product_name = target.get('product_name', name)
+        model = allocate_target_ids(target, index == 0, config_names, ids)
+        model.update({
+            'name': name,
+            'type': target['type'],
+            'product_type': product_type,
+            'product_file_type': product_file_type,
+            'product_path': product_name + extension,
+            'product_name': product_name,
+            'spec': target,
+        })
+        # The primary target keeps the original BUILD_ keys; others get their own namespace
+        key_prefix = "BUILD_" if index == 0 else f"BUILD@{name}/"
+        model['build_files'] = allocate_build_files(file_refs, select_sources(target, paths), ids, key_prefix)
+        # Path-ordered build files per phase, split once for the phase emitters
+        model['phase_files'] = {'Sources': [], 'Resources': []}
+        for info in model['build_files'].values():
+            model['phase_files'][info.phase].append(info)
+        targets.append(model)
+
+    by_name = {model['name']: model for model in targets}
+    for model in targets:
+        target = model['spec']
+        name = model['name']
+
+        # Test bundles run inside their host app
+        host_settings = {}
+        host = by_name.get(target.get('host'))
+        if host is not None and target['type'] == 'unit-test':
+            host_settings = {
+                'BUNDLE_LOADER': "$(TEST_HOST)",
+                'TEST_HOST': f"$(BUILT_PRODUCTS_DIR)/{host['product_path']}/{host['product_name']}",
+            }
+        elif host is not None and target['type'] == 'ui-test':
+            host_settings = {'TEST_TARGET_NAME': host['name']}
+        model['host_id'] = host['id'] if host is not None else None
+
+        layers = target.get('settings', {})
+        layers = dict(layers, base=dict(host_settings, **layers.get('base', {})))
+        model['settings'] = resolve_settings(layers, chains)
+
+        deps = target_dependencies(target)
+        dep_ids = ids.allocate_many([f"DEPENDENCY@{name}/{dep}" for dep in deps] +
+                                    [f"PROXY@{name}/{dep}" for dep in deps])
+        model['dependencies'] = [
+            {'id': dep_id, 'proxy_id': proxy_id, 'target': by_name[dep]}
+            for dep, dep_id, proxy_id in zip(deps, dep_ids[:len(deps)], dep_ids[len(deps):])
+        ]
+
+        # Embedded products are copied by one copy-files phase per kind; frameworks are also linked.
+        # Workspace frameworks are linked, and embedded by applications.
+        model['copy_phases'] = []
+        model['links'] = {}
+        model['frameworks'] = [external[framework] for framework in target.get('frameworks', ())]
+        products = [(by_name[dep], True) for dep in target.get('embed', ())]
+        products.extend((product, target['type'] == 'application') for product in model['frameworks'])
+        for product, embed in products:
+            dep = product['name']
+            ref = FileRef(product['product_id'], product['product_path'])
+            if embed:
+                phase_name, subfolder, attributes = EMBED_PHASES[product['type']]
+                phase = next((p for p in model['copy_phases'] if p['name'] == phase_name), None)
+                if phase is None:
+                    phase = {'id': ids.allocate(f"COPY@{name}/{phase_name}"), 'name': phase_name,
+                             'subfolder': subfolder, 'files': {}}
+                    model['copy_phases'].append(phase)
+                phase['files'][product['product_path']] = BuildFile(
+                    ids.allocate(f"EMBED@{name}/{dep}"), ref, phase_name, attributes)
+            if product['type'] == 'framework':
+                model['links'][product['product_path']] = BuildFile(
+                    ids.allocate(f"LINK@{name}/{dep}"), ref, 'Frameworks')
+    return targets
+
+def iter_group_children(dir_index, file_refs, dir_path):
+    """Yield file reference lines for the files directly inside dir_path"""
+    entry = dir_index.get(dir_path)
+    if entry is None:
+        return
+    for name, path in entry['files']:
+        yield f"\t\t\t\t{file_refs[path].id} /* {name} */,\n"
+
+def group_object(group_id, name, children):
+    """One PBXGroup for a directory, given its newline-terminated child lines"""
+    return (f"\t\t{group_id} /* {name} */ = {{\n\t\t\tisa = PBXGroup;\n\t\t\tchildren = (\n"
+            f"{''.join(children)}\t\t\t);\n\t\t\tpath = {quote(name)};\n\t\t\tsourceTree = \"<group>\";\n\t\t}};\n")
+
+def source_group_object(dir_index, file_refs, group_ids, dir_path):
+    """The PBXGroup for one scanned directory; '' is the source root"""
+    prefix = f"{dir_path}/" if dir_path else ""
+    children = [f"\t\t\t\t{group_ids[prefix + sub]} /* {sub} */,\n" for sub in dir_index[dir_path]['dirs']]
+    children.extend(iter_group_children(dir_index, file_refs, dir_path))
+    if not dir_path:
+        return group_object(MAIN_SRC_GROUP_ID, "GreatFeelSwiftUI", children)
+    return group_object(group_ids[dir_path], dir_path.rpartition('/')[2], children)
+
+def iter_source_groups(dir_index, file_refs, group_ids, others=None):
+    """Yield a PBXGroup for the source root and every directory below it, in object ID order
+
+    others maps the IDs of further groups to their text, to be emitted in order alongside.
+    """
+    dirs = {group_id: dir_path for dir_path, group_id in group_ids.items()}
+    dirs[MAIN_SRC_GROUP_ID] = ''
+    others = others or {}
+    for group_id in sorted(dirs.keys() | others.keys()):
+        if group_id in others:
+            yield others[group_id]
+        else:
+            yield source_group_object(dir_index, file_refs, group_ids, dirs[group_id])
+
+def build_file_line(info):
+    """One PBXBuildFile object, with copy attributes for embedded products"""
+    settings = ""
+    if info.attributes:
+        settings = f" settings = {{ATTRIBUTES = ({info.attributes}, ); }};"
+    name = info.ref.name
+    return (f"\t\t{info.id} /* {name} in {info.phase} */ = {{isa = PBXBuildFile; "
+            f"fileRef = {info.ref.id} /* {name} */;{settings} }};\n")
+
+def by_id(item):
+    """Sort key putting objects in Xcode's canonical order: by object ID within a section"""
+    return item['id']
+
+def iter_build_file_section(targets):
+    """Yield the PBXBuildFile section for every target, in object ID order"""
+    build_files = []
+    for target in targets:
+        build_files.extend(target['build_files'].values())
+        build_files.extend(target['links'].values())
+        for phase in target['copy_phases']:
+            build_files.extend(phase['files'].values())
+    from operator import attrgetter
+
+    yield "/* Begin PBXBuildFile section */\n"
+    for info in sorted(build_files, key=attrgetter('id')):
+        yield build_file_line(info)
+    yield "/* End PBXBuildFile section */\n\n"
+
+def iter_container_item_proxy_section(targets):
+    """Yield the PBXContainerItemProxy section that target dependencies point through"""
+    yield "/* Begin PBXContainerItemProxy section */\n"
+    proxies = sorted((dep for target in targets for dep in target['dependencies']), key=lambda dep: dep['proxy_id'])
+    for dep in proxies:
+        yield f'''\t\t{dep['proxy_id']} /* PBXContainerItemProxy */ = {{
+\t\t\tisa = PBXContainerItemProxy;
+\t\t\tcontainerPortal = {PROJECT_ID} /* Project object */;
+\t\t\tproxyType = 1;
+\t\t\tremoteGlobalIDString = {dep['target']['id']};
+\t\t\tremoteInfo = {quote(dep['target']['name'])};
 \t\t}};
-/* End PBXFrameworksBuildPhase section */
+'''
+    yield "/* End PBXContainerItemProxy section */\n\n"
+
+def iter_copy_files_phase_section(targets):
+    """Yield the PBXCopyFilesBuildPhase section that embeds extensions and frameworks"""
+    yield "/* Begin PBXCopyFilesBuildPhase section */\n"
+    for phase in sorted((phase for target in targets for phase in target['copy_phases']), key=by_id):
+        yield f"\t\t{phase['id']} /* {phase['name']} */ = {{\n\t\t\tisa = PBXCopyFilesBuildPhase;\n\t\t\tbuildActionMask = 2147483647;\n"
+        yield f"\t\t\tdstPath = \"\";\n\t\t\tdstSubfolderSpec = {phase['subfolder']};\n\t\t\tfiles = (\n"
+        for info in phase['files'].values():
+            yield f"\t\t\t\t{info.id} /* {info.ref.name} in {phase['name']} */,\n"
+        yield f"\t\t\t);\n\t\t\tname = {quote(phase['name'])};\n\t\t\trunOnlyForDeploymentPostprocessing = 0;\n\t\t}};\n"
+    yield "/* End PBXCopyFilesBuildPhase section */\n\n"
 
-/* Begin PBXGroup section */
-\t\t{MAIN_GROUP_ID} /* Main */ = {{
+def file_reference_line(info):
+    """One PBXFileReference object for a scanned file"""
+    return (f"\t\t{info.id} /* {info.name} */ = {{isa = PBXFileReference; lastKnownFileType = {info.type}; "
+            f"path = {quote(info.name)}; sourceTree = \"<group>\"; }};\n")
+
+def product_reference_line(target):
+    """One PBXFileReference object for a target's built product"""
+    return (f"\t\t{target['product_id']} /* {target['product_path']} */ = {{isa = PBXFileReference; "
+            f"explicitFileType = {quote(target['product_file_type'])}; includeInIndex = 0; "
+            f"path = {quote(target['product_path'])}; sourceTree = BUILT_PRODUCTS_DIR; }};\n")
+
+def iter_file_reference_section(targets, file_refs, frameworks=None):
+    """Yield the PBXFileReference section: target products, workspace frameworks and scanned files, by ID"""
+    from heapq import merge
+
+    products = {target['product_id']: target for target in targets}
+    products.update(frameworks or {})
+    # The scanned files are already in ID order; only the few products need sorting in
+    references = merge(((info.id, info) for info in file_refs.by_id()),
+                       ((product_id, None) for product_id in sorted(products)), key=lambda entry: entry[0])
+    yield "/* Begin PBXFileReference section */\n"
+    for object_id, info in references:
+        yield file_reference_line(info) if info is not None else product_reference_line(products[object_id])
+    yield "/* End PBXFileReference section */\n\n"
+
+def iter_build_phase(phase_id, phase, build_files):
+    """Yield one build phase object listing build_files, which are in path order"""
+    yield f"\t\t{phase_id} /* {phase} */ = {{\n\t\t\tisa = PBX{phase}BuildPhase;\n\t\t\tbuildActionMask = 2147483647;\n\t\t\tfiles = (\n"
+    for info in build_files:
+        yield f"\t\t\t\t{info.id} /* {info.ref.name} in {phase} */,\n"
+    yield "\t\t\t);\n\t\t\trunOnlyForDeploymentPostprocessing = 0;\n\t\t};\n"
+
+def iter_frameworks_phase_section(targets):
+    """Yield the PBXFrameworksBuildPhase section, linking embedded frameworks"""
+    yield "/* Begin PBXFrameworksBuildPhase section */\n"
+    for target in sorted(targets, key=lambda target: target['phase_ids']['Frameworks']):
+        links = [info for _, info in sorted(target['links'].items())]
+        yield from iter_build_phase(target['phase_ids']['Frameworks'], 'Frameworks', links)
+    yield "/* End PBXFrameworksBuildPhase section */\n\n"
+
+def iter_group_section(dir_index, file_refs, group_ids, targets, frameworks=None, frameworks_group_id=None):
+    """Yield the PBXGroup section: main, products and frameworks groups plus one group per source directory"""
+    others = {}
+    frameworks_child = ""
+    if frameworks:
+        children = ''.join(f"\t\t\t\t{product_id} /* {product['product_path']} */,\n"
+                           for product_id, product in sorted(frameworks.items(), key=lambda item: item[1]['name']))
+        others[frameworks_group_id] = (f"\t\t{frameworks_group_id} /* Frameworks */ = {{\n\t\t\tisa = PBXGroup;\n"
+                                       f"\t\t\tchildren = (\n{children}\t\t\t);\n\t\t\tname = Frameworks;\n"
+                                       f"\t\t\tsourceTree = \"<group>\";\n\t\t}};\n")
+        frameworks_child = f"\t\t\t\t{frameworks_group_id} /* Frameworks */,\n"
+    main_group = f'''\t\t{MAIN_GROUP_ID} /* Main */ = {{
 \t\t\tisa = PBXGroup;
 \t\t\tchildren = (
 \t\t\t\t{MAIN_SRC_GROUP_ID} /* GreatFeelSwiftUI */,
 \t\t\t\t{PRODUCTS_GROUP_ID} /* Products */,
-\t\t\t);
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{MAIN_SRC_GROUP_ID} /* GreatFeelSwiftUI */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-\t\t\t\t{group_ids['App']} /* App */,
-\t\t\t\t{group_ids['Models']} /* Models */,
-\t\t\t\t{group_ids['ViewModels']} /* ViewModels */,
-\t\t\t\t{group_ids['Views']} /* Views */,
-\t\t\t\t{group_ids['Services']} /* Services */,
-\t\t\t\t{group_ids['Theme']} /* Theme */,
-\t\t\t);
-\t\t\tpath = GreatFeelSwiftUI;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{PRODUCTS_GROUP_ID} /* Products */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-\t\t\t\t{APP_PRODUCT_ID} /* GreatFeelSwiftUI.app */,
-\t\t\t);
-\t\t\tname = Products;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['App']} /* App */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('App')}\t\t\t);
-\t\t\tpath = App;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Models']} /* Models */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Models')}\t\t\t);
-\t\t\tpath = Models;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['ViewModels']} /* ViewModels */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('ViewModels')}\t\t\t);
-\t\t\tpath = ViewModels;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Views']} /* Views */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-\t\t\t\t{group_ids['Views/Auth']} /* Auth */,
-\t\t\t\t{group_ids['Views/Main']} /* Main */,
-\t\t\t\t{group_ids['Views/Components']} /* Components */,
-\t\t\t\t{group_ids['Views/Shared']} /* Shared */,
-\t\t\t);
-\t\t\tpath = Views;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Views/Auth']} /* Auth */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Views/Auth')}\t\t\t);
-\t\t\tpath = Auth;
+{frameworks_child}\t\t\t);
 \t\t\tsourceTree = "<group>";
 \t\t}};
-\t\t{group_ids['Views/Main']} /* Main */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Views/Main')}\t\t\t);
-\t\t\tpath = Main;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Views/Components']} /* Components */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Views/Components')}\t\t\t);
-\t\t\tpath = Components;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Views/Shared']} /* Shared */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Views/Shared')}\t\t\t);
-\t\t\tpath = Shared;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Services']} /* Services */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-\t\t\t\t{group_ids['Services/Network']} /* Network */,
-\t\t\t\t{group_ids['Services/Storage']} /* Storage */,
-\t\t\t\t{group_ids['Services/Audio']} /* Audio */,
-\t\t\t);
-\t\t\tpath = Services;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Services/Network']} /* Network */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Services/Network')}\t\t\t);
-\t\t\tpath = Network;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Services/Storage']} /* Storage */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Services/Storage')}\t\t\t);
-\t\t\tpath = Storage;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Services/Audio']} /* Audio */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Services/Audio')}\t\t\t);
-\t\t\tpath = Audio;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-\t\t{group_ids['Theme']} /* Theme */ = {{
-\t\t\tisa = PBXGroup;
-\t\t\tchildren = (
-{get_files_in_directory('Theme')}\t\t\t);
-\t\t\tpath = Theme;
-\t\t\tsourceTree = "<group>";
-\t\t}};
-/* End PBXGroup section */
+'''
+    products = ''.join(f"\t\t\t\t{target['product_id']} /* {target['product_path']} */,\n" for target in targets)
+    products_group = (f"\t\t{PRODUCTS_GROUP_ID} /* Products */ = {{\n\t\t\tisa = PBXGroup;\n\t\t\tchildren = (\n"
+                      f"{products}\t\t\t);\n\t\t\tname = Products;\n\t\t\tsourceTree = \"<group>\";\n\t\t}};\n")
+    yield "/* Begin PBXGroup section */\n"
+    others.update({MAIN_GROUP_ID: main_group, PRODUCTS_GROUP_ID: products_group})
+    yield from iter_source_groups(dir_index, file_refs, group_ids, others)
+    yield "/* End PBXGroup section */\n\n"
 
-/* Begin PBXNativeTarget section */
-\t\t{TARGET_ID} /* GreatFeelSwiftUI */ = {{
+def iter_native_target_section(targets):
+    """Yield the PBXNativeTarget section, one object per spec target"""
+    yield "/* Begin PBXNativeTarget section */\n"
+    for target in sorted(targets, key=by_id):
+        name = target['name']
+        yield f'''\t\t{target['id']} /* {name} */ = {{
 \t\t\tisa = PBXNativeTarget;
-\t\t\tbuildConfigurationList = {TARGET_CONFIG_LIST_ID} /* Build configuration list for PBXNativeTarget "GreatFeelSwiftUI" */;
+\t\t\tbuildConfigurationList = {target['config_list_id']} /* Build configuration list for PBXNativeTarget "{name}" */;
 \t\t\tbuildPhases = (
-\t\t\t\t{SOURCES_PHASE_ID} /* Sources */,
-\t\t\t\t{FRAMEWORKS_PHASE_ID} /* Frameworks */,
-\t\t\t\t{RESOURCES_PHASE_ID} /* Resources */,
-\t\t\t);
-\t\t\tbuildRules = (
-\t\t\t);
-\t\t\tdependencies = (
-\t\t\t);
-\t\t\tname = GreatFeelSwiftUI;
-\t\t\tproductName = GreatFeelSwiftUI;
-\t\t\tproductReference = {APP_PRODUCT_ID} /* GreatFeelSwiftUI.app */;
-\t\t\tproductType = "com.apple.product-type.application";
+'''
+        for phase in ('Sources', 'Frameworks', 'Resources'):
+            yield f"\t\t\t\t{target['phase_ids'][phase]} /* {phase} */,\n"
+        for phase in target['copy_phases']:
+            yield f"\t\t\t\t{phase['id']} /* {phase['name']} */,\n"
+        yield "\t\t\t);\n\t\t\tbuildRules = (\n\t\t\t);\n\t\t\tdependencies = (\n"
+        for dep in target['dependencies']:
+            yield f"\t\t\t\t{dep['id']} /* PBXTargetDependency */,\n"
+        yield f'''\t\t\t);
+\t\t\tname = {quote(name)};
+\t\t\tproductName = {quote(target['product_name'])};
+\t\t\tproductReference = {target['product_id']} /* {target['product_path']} */;
+\t\t\tproductType = "{target['product_type']}";
 \t\t}};
-/* End PBXNativeTarget section */
+'''
+    yield "/* End PBXNativeTarget section */\n\n"
 
-/* Begin PBXProject section */
-\t\t{PROJECT_ID} /* Project object */ = {{
+def iter_project_section(spec, targets):
+    """Yield the PBXProject section"""
+    yield "/* Begin PBXProject section */\n"
+    yield f'''\t\t{PROJECT_ID} /* Project object */ = {{
 \t\t\tisa = PBXProject;
 \t\t\tattributes = {{
 \t\t\t\tBuildIndependentTargetsInParallel = 1;
 \t\t\t\tLastSwiftUpdateCheck = 1500;
 \t\t\t\tLastUpgradeCheck = 1500;
 \t\t\t\tTargetAttributes = {{
-\t\t\t\t\t{TARGET_ID} = {{
-\t\t\t\t\t\tCreatedOnToolsVersion = 15.0;
-\t\t\t\t\t}};
-\t\t\t\t}};
+'''
+    for target in sorted(targets, key=by_id):
+        yield f"\t\t\t\t\t{target['id']} = {{\n\t\t\t\t\t\tCreatedOnToolsVersion = 15.0;\n"
+        if target['host_id']:
+            yield f"\t\t\t\t\t\tTestTargetID = {target['host_id']};\n"
+        yield "\t\t\t\t\t};\n"
+    yield f'''\t\t\t\t}};
 \t\t\t}};
-\t\t\tbuildConfigurationList = {PROJECT_CONFIG_LIST_ID} /* Build configuration list for PBXProject "GreatFeelSwiftUI" */;
+\t\t\tbuildConfigurationList = {PROJECT_CONFIG_LIST_ID} /* Build configuration list for PBXProject "{spec['name']}" */;
 \t\t\tcompatibilityVersion = "Xcode 14.0";
 \t\t\tdevelopmentRegion = en;
 \t\t\thasScannedForEncodings = 0;
@@ -302,247 +1701,434 @@ def create_pbxproj(swift_files):
 \t\t\tprojectDirPath = "";
 \t\t\tprojectRoot = "";
 \t\t\ttargets = (
-\t\t\t\t{TARGET_ID} /* GreatFeelSwiftUI */,
-\t\t\t);
-\t\t}};
-/* End PBXProject section */
+'''
+    for target in targets:
+        yield f"\t\t\t\t{target['id']} /* {target['name']} */,\n"
+    yield "\t\t\t);\n\t\t};\n"
+    yield "/* End PBXProject section */\n\n"
 
-/* Begin PBXResourcesBuildPhase section */
-\t\t{RESOURCES_PHASE_ID} /* Resources */ = {{
-\t\t\tisa = PBXResourcesBuildPhase;
-\t\t\tbuildActionMask = 2147483647;
-\t\t\tfiles = (
-\t\t\t);
-\t\t\trunOnlyForDeploymentPostprocessing = 0;
-\t\t}};
-/* End PBXResourcesBuildPhase section */
-
-/* Begin PBXSourcesBuildPhase section */
-\t\t{SOURCES_PHASE_ID} /* Sources */ = {{
-\t\t\tisa = PBXSourcesBuildPhase;
-\t\t\tbuildActionMask = 2147483647;
-\t\t\tfiles = (
-{sources_phase_files}\t\t\t);
-\t\t\trunOnlyForDeploymentPostprocessing = 0;
-\t\t}};
-/* End PBXSourcesBuildPhase section */
-
-/* Begin XCBuildConfiguration section */
-\t\t{DEBUG_PROJECT_CONFIG_ID} /* Debug */ = {{
-\t\t\tisa = XCBuildConfiguration;
-\t\t\tbuildSettings = {{
-\t\t\t\tALWAYS_SEARCH_USER_PATHS = NO;
-\t\t\t\tASASSETCATALOG_COMPILER_GENERATE_SWIFT_ASSET_SYMBOL_EXTENSIONS = YES;
-\t\t\t\tCLANG_ANALYZER_NONNULL = YES;
-\t\t\t\tCLANG_ANALYZER_NUMBER_OBJECT_CONVERSION = YES_AGGRESSIVE;
-\t\t\t\tCLANG_CXX_LANGUAGE_STANDARD = "gnu++20";
-\t\t\t\tCLANG_ENABLE_MODULES = YES;
-\t\t\t\tCLANG_ENABLE_OBJC_ARC = YES;
-\t\t\t\tCLANG_ENABLE_OBJC_WEAK = YES;
-\t\t\t\tCLANG_WARN_BLOCK_CAPTURE_AUTORELEASING = YES;
-\t\t\t\tCLANG_WARN_BOOL_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_COMMA = YES;
-\t\t\t\tCLANG_WARN_CONSTANT_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_DEPRECATED_OBJC_IMPLEMENTATIONS = YES;
-\t\t\t\tCLANG_WARN_DIRECT_OBJC_ISA_USAGE = YES_ERROR;
-\t\t\t\tCLANG_WARN_DOCUMENTATION_COMMENTS = YES;
-\t\t\t\tCLANG_WARN_EMPTY_BODY = YES;
-\t\t\t\tCLANG_WARN_ENUM_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_INFINITE_RECURSION = YES;
-\t\t\t\tCLANG_WARN_INT_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_NON_LITERAL_NULL_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_OBJC_IMPLICIT_RETAIN_SELF = YES;
-\t\t\t\tCLANG_WARN_OBJC_LITERAL_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_OBJC_ROOT_CLASS = YES_ERROR;
-\t\t\t\tCLANG_WARN_QUOTED_INCLUDE_IN_FRAMEWORK_HEADER = YES;
-\t\t\t\tCLANG_WARN_RANGE_LOOP_ANALYSIS = YES;
-\t\t\t\tCLANG_WARN_STRICT_PROTOTYPES = YES;
-\t\t\t\tCLANG_WARN_SUSPICIOUS_MOVE = YES;
-\t\t\t\tCLANG_WARN_UNGUARDED_AVAILABILITY = YES_AGGRESSIVE;
-\t\t\t\tCLANG_WARN_UNREACHABLE_CODE = YES;
-\t\t\t\tCLANG_WARN__DUPLICATE_METHOD_MATCH = YES;
-\t\t\t\tCOPY_PHASE_STRIP = NO;
-\t\t\t\tDEBUG_INFORMATION_FORMAT = dwarf;
-\t\t\t\tENABLE_STRICT_OBJC_MSGSEND = YES;
-\t\t\t\tENABLE_TESTABILITY = YES;
-\t\t\t\tENABLE_USER_SCRIPT_SANDBOXING = YES;
-\t\t\t\tGCC_C_LANGUAGE_STANDARD = gnu17;
-\t\t\t\tGCC_DYNAMIC_NO_PIC = NO;
-\t\t\t\tGCC_NO_COMMON_BLOCKS = YES;
-\t\t\t\tGCC_OPTIMIZATION_LEVEL = 0;
-\t\t\t\tGCC_PREPROCESSOR_DEFINITIONS = (
-\t\t\t\t\t"DEBUG=1",
-\t\t\t\t\t"$$(inherited)",
-\t\t\t\t);
-\t\t\t\tGCC_WARN_64_TO_32_BIT_CONVERSION = YES;
-\t\t\t\tGCC_WARN_ABOUT_RETURN_TYPE = YES_ERROR;
-\t\t\t\tGCC_WARN_UNDECLARED_SELECTOR = YES;
-\t\t\t\tGCC_WARN_UNINITIALIZED_AUTOS = YES_AGGRESSIVE;
-\t\t\t\tGCC_WARN_UNUSED_FUNCTION = YES;
-\t\t\t\tGCC_WARN_UNUSED_VARIABLE = YES;
-\t\t\t\tIPHONEOS_DEPLOYMENT_TARGET = 16.0;
-\t\t\t\tLOCALIZATION_PREFERS_STRING_CATALOGS = YES;
-\t\t\t\tMTL_ENABLE_DEBUG_INFO = INCLUDE_SOURCE;
-\t\t\t\tMTL_FAST_MATH = YES;
-\t\t\t\tONLY_ACTIVE_ARCH = YES;
-\t\t\t\tSDKROOT = iphoneos;
-\t\t\t\tSWIFT_ACTIVE_COMPILATION_CONDITIONS = DEBUG;
-\t\t\t\tSWIFT_OPTIMIZATION_LEVEL = "-Onone";
-\t\t\t}};
-\t\t\tname = Debug;
-\t\t}};
-\t\t{RELEASE_PROJECT_CONFIG_ID} /* Release */ = {{
-\t\t\tisa = XCBuildConfiguration;
-\t\t\tbuildSettings = {{
-\t\t\t\tALWAYS_SEARCH_USER_PATHS = NO;
-\t\t\t\tASASSETCATALOG_COMPILER_GENERATE_SWIFT_ASSET_SYMBOL_EXTENSIONS = YES;
-\t\t\t\tCLANG_ANALYZER_NONNULL = YES;
-\t\t\t\tCLANG_ANALYZER_NUMBER_OBJECT_CONVERSION = YES_AGGRESSIVE;
-\t\t\t\tCLANG_CXX_LANGUAGE_STANDARD = "gnu++20";
-\t\t\t\tCLANG_ENABLE_MODULES = YES;
-\t\t\t\tCLANG_ENABLE_OBJC_ARC = YES;
-\t\t\t\tCLANG_ENABLE_OBJC_WEAK = YES;
-\t\t\t\tCLANG_WARN_BLOCK_CAPTURE_AUTORELEASING = YES;
-\t\t\t\tCLANG_WARN_BOOL_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_COMMA = YES;
-\t\t\t\tCLANG_WARN_CONSTANT_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_DEPRECATED_OBJC_IMPLEMENTATIONS = YES;
-\t\t\t\tCLANG_WARN_DIRECT_OBJC_ISA_USAGE = YES_ERROR;
-\t\t\t\tCLANG_WARN_DOCUMENTATION_COMMENTS = YES;
-\t\t\t\tCLANG_WARN_EMPTY_BODY = YES;
-\t\t\t\tCLANG_WARN_ENUM_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_INFINITE_RECURSION = YES;
-\t\t\t\tCLANG_WARN_INT_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_NON_LITERAL_NULL_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_OBJC_IMPLICIT_RETAIN_SELF = YES;
-\t\t\t\tCLANG_WARN_OBJC_LITERAL_CONVERSION = YES;
-\t\t\t\tCLANG_WARN_OBJC_ROOT_CLASS = YES_ERROR;
-\t\t\t\tCLANG_WARN_QUOTED_INCLUDE_IN_FRAMEWORK_HEADER = YES;
-\t\t\t\tCLANG_WARN_RANGE_LOOP_ANALYSIS = YES;
-\t\t\t\tCLANG_WARN_STRICT_PROTOTYPES = YES;
-\t\t\t\tCLANG_WARN_SUSPICIOUS_MOVE = YES;
-\t\t\t\tCLANG_WARN_UNGUARDED_AVAILABILITY = YES_AGGRESSIVE;
-\t\t\t\tCLANG_WARN_UNREACHABLE_CODE = YES;
-\t\t\t\tCLANG_WARN__DUPLICATE_METHOD_MATCH = YES;
-\t\t\t\tCOPY_PHASE_STRIP = NO;
-\t\t\t\tDEBUG_INFORMATION_FORMAT = "dwarf-with-dsym";
-\t\t\t\tENABLE_NS_ASSERTIONS = NO;
-\t\t\t\tENABLE_STRICT_OBJC_MSGSEND = YES;
-\t\t\t\tENABLE_USER_SCRIPT_SANDBOXING = YES;
-\t\t\t\tGCC_C_LANGUAGE_STANDARD = gnu17;
-\t\t\t\tGCC_NO_COMMON_BLOCKS = YES;
-\t\t\t\tGCC_WARN_64_TO_32_BIT_CONVERSION = YES;
-\t\t\t\tGCC_WARN_ABOUT_RETURN_TYPE = YES_ERROR;
-\t\t\t\tGCC_WARN_UNDECLARED_SELECTOR = YES;
-\t\t\t\tGCC_WARN_UNINITIALIZED_AUTOS = YES_AGGRESSIVE;
-\t\t\t\tGCC_WARN_UNUSED_FUNCTION = YES;
-\t\t\t\tGCC_WARN_UNUSED_VARIABLE = YES;
-\t\t\t\tIPHONEOS_DEPLOYMENT_TARGET = 16.0;
-\t\t\t\tLOCALIZATION_PREFERS_STRING_CATALOGS = YES;
-\t\t\t\tMTL_ENABLE_DEBUG_INFO = NO;
-\t\t\t\tMTL_FAST_MATH = YES;
-\t\t\t\tSDKROOT = iphoneos;
-\t\t\t\tSWIFT_COMPILATION_MODE = wholemodule;
-\t\t\t\tVALIDATE_PRODUCT = YES;
-\t\t\t}};
-\t\t\tname = Release;
-\t\t}};
-\t\t{DEBUG_TARGET_CONFIG_ID} /* Debug */ = {{
-\t\t\tisa = XCBuildConfiguration;
-\t\t\tbuildSettings = {{
-\t\t\t\tASASSETCATALOG_COMPILER_APPICON_NAME = AppIcon;
-\t\t\t\tASASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME = AccentColor;
-\t\t\t\tCODE_SIGN_STYLE = Automatic;
-\t\t\t\tCURRENT_PROJECT_VERSION = 1;
-\t\t\t\tDEVELOPMENT_ASSET_PATHS = "";
-\t\t\t\tENABLE_PREVIEWS = YES;
-\t\t\t\tGENERATE_INFOPLIST_FILE = NO;
-\t\t\t\tINFOPLIST_FILE = Info.plist;
-\t\t\t\tINFOPLIST_KEY_UIApplicationSceneManifest_Generation = YES;
-\t\t\t\tINFOPLIST_KEY_UIApplicationSupportsIndirectInputEvents = YES;
-\t\t\t\tINFOPLIST_KEY_UILaunchScreen_Generation = YES;
-\t\t\t\tINFOPLIST_KEY_UISupportedInterfaceOrientations_iPad = "UIInterfaceOrientationPortrait UIInterfaceOrientationPortraitUpsideDown UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-\t\t\t\tINFOPLIST_KEY_UISupportedInterfaceOrientations_iPhone = "UIInterfaceOrientationPortrait UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-\t\t\t\tLD_RUNPATH_SEARCH_PATHS = (
-\t\t\t\t\t"$$(inherited)",
-\t\t\t\t\t"@executable_path/Frameworks",
-\t\t\t\t);
-\t\t\t\tMARKETING_VERSION = 1.0;
-\t\t\t\tPRODUCT_BUNDLE_IDENTIFIER = com.greatfeel.GreatFeelSwiftUI;
-\t\t\t\tPRODUCT_NAME = "GreatFeelSwiftUI";
-\t\t\t\tSWIFT_EMIT_LOC_STRINGS = YES;
-\t\t\t\tSWIFT_VERSION = 5.0;
-\t\t\t\tTARGETED_DEVICE_FAMILY = "1,2";
-\t\t\t}};
-\t\t\tname = Debug;
-\t\t}};
-\t\t{RELEASE_TARGET_CONFIG_ID} /* Release */ = {{
-\t\t\tisa = XCBuildConfiguration;
-\t\t\tbuildSettings = {{
-\t\t\t\tASASSETCATALOG_COMPILER_APPICON_NAME = AppIcon;
-\t\t\t\tASASSETCATALOG_COMPILER_GLOBAL_ACCENT_COLOR_NAME = AccentColor;
-\t\t\t\tCODE_SIGN_STYLE = Automatic;
-\t\t\t\tCURRENT_PROJECT_VERSION = 1;
-\t\t\t\tDEVELOPMENT_ASSET_PATHS = "";
-\t\t\t\tENABLE_PREVIEWS = YES;
-\t\t\t\tGENERATE_INFOPLIST_FILE = NO;
-\t\t\t\tINFOPLIST_FILE = Info.plist;
-\t\t\t\tINFOPLIST_KEY_UIApplicationSceneManifest_Generation = YES;
-\t\t\t\tINFOPLIST_KEY_UIApplicationSupportsIndirectInputEvents = YES;
-\t\t\t\tINFOPLIST_KEY_UILaunchScreen_Generation = YES;
-\t\t\t\tINFOPLIST_KEY_UISupportedInterfaceOrientations_iPad = "UIInterfaceOrientationPortrait UIInterfaceOrientationPortraitUpsideDown UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-\t\t\t\tINFOPLIST_KEY_UISupportedInterfaceOrientations_iPhone = "UIInterfaceOrientationPortrait UIInterfaceOrientationLandscapeLeft UIInterfaceOrientationLandscapeRight";
-\t\t\t\tLD_RUNPATH_SEARCH_PATHS = (
-\t\t\t\t\t"$$(inherited)",
-\t\t\t\t\t"@executable_path/Frameworks",
-\t\t\t\t);
-\t\t\t\tMARKETING_VERSION = 1.0;
-\t\t\t\tPRODUCT_BUNDLE_IDENTIFIER = com.greatfeel.GreatFeelSwiftUI;
-\t\t\t\tPRODUCT_NAME = "GreatFeelSwiftUI";
-\t\t\t\tSWIFT_EMIT_LOC_STRINGS = YES;
-\t\t\t\tSWIFT_VERSION = 5.0;
-\t\t\t\tTARGETED_DEVICE_FAMILY = "1,2";
-\t\t\t}};
-\t\t\tname = Release;
-\t\t}};
-/* End XCBuildConfiguration section */
-
-/* Begin XCConfigurationList section */
-\t\t{PROJECT_CONFIG_LIST_ID} /* Build configuration list for PBXProject "GreatFeelSwiftUI" */ = {{
-\t\t\tisa = XCConfigurationList;
-\t\t\tbuildConfigurations = (
-\t\t\t\t{DEBUG_PROJECT_CONFIG_ID} /* Debug */,
-\t\t\t\t{RELEASE_PROJECT_CONFIG_ID} /* Release */,
-\t\t\t);
-\t\t\tdefaultConfigurationIsVisible = 0;
-\t\t\tdefaultConfigurationName = Release;
-\t\t}};
-\t\t{TARGET_CONFIG_LIST_ID} /* Build configuration list for PBXNativeTarget "GreatFeelSwiftUI" */ = {{
-\t\t\tisa = XCConfigurationList;
-\t\t\tbuildConfigurations = (
-\t\t\t\t{DEBUG_TARGET_CONFIG_ID} /* Debug */,
-\t\t\t\t{RELEASE_TARGET_CONFIG_ID} /* Release */,
-\t\t\t);
-\t\t\tdefaultConfigurationIsVisible = 0;
-\t\t\tdefaultConfigurationName = Release;
+def iter_resources_phase_section(targets):
+    """Yield the PBXResourcesBuildPhase section listing asset catalogs and media"""
+    yield "/* Begin PBXResourcesBuildPhase section */\n"
+    for target in sorted(targets, key=lambda target: target['phase_ids']['Resources']):
+        yield from iter_build_phase(target['phase_ids']['Resources'], 'Resources', target['phase_files']['Resources'])
+    yield "/* End PBXResourcesBuildPhase section */\n\n"
+
+def iter_sources_phase_section(targets):
+    """Yield the PBXSourcesBuildPhase section listing every Swift build file"""
+    yield "/* Begin PBXSourcesBuildPhase section */\n"
+    for target in sorted(targets, key=lambda target: target['phase_ids']['Sources']):
+        yield from iter_build_phase(target['phase_ids']['Sources'], 'Sources', target['phase_files']['Sources'])
+    yield "/* End PBXSourcesBuildPhase section */\n\n"
+
+def iter_target_dependency_section(targets):
+    """Yield the PBXTargetDependency section"""
+    yield "/* Begin PBXTargetDependency section */\n"
+    for dep in sorted((dep for target in targets for dep in target['dependencies']), key=by_id):
+        yield f'''\t\t{dep['id']} /* PBXTargetDependency */ = {{
+\t\t\tisa = PBXTargetDependency;
+\t\t\ttarget = {dep['target']['id']} /* {dep['target']['name']} */;
+\t\t\ttargetProxy = {dep['proxy_id']} /* PBXContainerItemProxy */;
 \t\t}};
-/* End XCConfigurationList section */
-\t}};
-\trootObject = {PROJECT_ID} /* Project object */;
-}}
 '''
+    yield "/* End PBXTargetDependency section */\n\n"
+
+def render_build_settings(settings):
+    """Render a flattened settings dict as the body of a buildSettings block"""
+    lines = []
+    for key in sorted(settings):
+        value = settings[key]
+        if isinstance(value, list):
+            lines.append(f"\t\t\t\t{key} = (\n")
+            lines.extend(f"\t\t\t\t\t{quote(str(item))},\n" for item in value)
+            lines.append("\t\t\t\t);\n")
+        else:
+            lines.append(f"\t\t\t\t{key} = {quote(str(value))};\n")
+    return ''.join(lines)
+
+def iter_build_configuration_section(spec, project_config_ids, targets):
+    """Yield one build configuration per configuration for the project and every target"""
+    project_settings = resolve_settings(spec.get('settings', {}), configuration_chains(spec))
+
+    # Configurations that resolve to the same settings share one rendering
+    rendered = {}
+    def configuration(config_id, name, settings):
+        key = json.dumps(settings, sort_keys=True)
+        if key not in rendered:
+            rendered[key] = render_build_settings(settings)
+        return (f"\t\t{config_id} /* {name} */ = {{\n\t\t\tisa = XCBuildConfiguration;\n\t\t\tbuildSettings = {{\n"
+                f"{rendered[key]}\t\t\t}};\n\t\t\tname = {quote(name)};\n\t\t}};\n")
+
+    configurations = [(project_config_ids[name], name, settings) for name, settings in project_settings.items()]
+    for target in targets:
+        configurations.extend((target['config_ids'][name], name, settings) for name, settings in target['settings'].items())
+    yield "/* Begin XCBuildConfiguration section */\n"
+    for config_id, name, settings in sorted(configurations, key=lambda entry: entry[0]):
+        yield configuration(config_id, name, settings)
+    yield "/* End XCBuildConfiguration section */\n\n"
+
+def iter_configuration_list(list_id, owner, config_ids, default):
+    """Yield one XCConfigurationList object"""
+    yield f"\t\t{list_id} /* Build configuration list for {owner} */ = {{\n\t\t\tisa = XCConfigurationList;\n\t\t\tbuildConfigurations = (\n"
+    for name, config_id in config_ids.items():
+        yield f"\t\t\t\t{config_id} /* {name} */,\n"
+    yield f"\t\t\t);\n\t\t\tdefaultConfigurationIsVisible = 0;\n\t\t\tdefaultConfigurationName = {quote(default)};\n\t\t}};\n"
+
+def iter_configuration_list_section(spec, project_config_ids, targets):
+    """Yield the configuration lists for the project and every target"""
+    default = spec.get('default_configuration', spec['configurations'][-1]['name'])
+    lists = [(PROJECT_CONFIG_LIST_ID, f'PBXProject "{spec["name"]}"', project_config_ids)]
+    lists.extend((target['config_list_id'], f'PBXNativeTarget "{target["name"]}"', target['config_ids'])
+                 for target in targets)
+    yield "/* Begin XCConfigurationList section */\n"
+    for list_id, owner, config_ids in sorted(lists, key=lambda entry: entry[0]):
+        yield from iter_configuration_list(list_id, owner, config_ids, default)
+    yield "/* End XCConfigurationList section */\n"
+
+class Profiler:
+    """Records wall time, counts and bytes per generation phase for --profile and --trace
+
+    Phases are timed with phase(); pbxproj sections are generators consumed while
+    the file is being written, so wrap() only counts time spent inside the section
+    itself (self time) alongside the span from its first to its last chunk.
+    """
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.origin = time.perf_counter_ns()
+        self.events = []
+
+    @contextlib.contextmanager
+    def phase(self, name, **counts):
+        """Time a block; the yielded dict collects counts to report with it"""
+        if not self.enabled:
+            yield counts
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield counts
+        finally:
+            elapsed = time.perf_counter_ns() - start
+            self.events.append({'name': name, 'kind': 'phase', 'start_ns': start - self.origin,
+                                'wall_ns': elapsed, 'self_ns': elapsed, 'counts': counts})
+
+    def wrap(self, name, chunks):
+        """Pass chunks through, recording the time spent producing them"""
+        if not self.enabled:
+            return chunks
+        return self._wrap(name, chunks)
+
+    def _wrap(self, name, chunks):
+        clock = time.perf_counter_ns
+        chunks = iter(chunks)
+        produced = 0
+        size = 0
+        inside = 0
+        first = clock()
+        while True:
+            start = clock()
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                inside += clock() - start
+                break
+            inside += clock() - start
+            produced += 1
+            size += len(chunk.encode('utf-8'))
+            yield chunk
+        self.events.append({'name': name, 'kind': 'section', 'start_ns': first - self.origin,
+                            'wall_ns': clock() - first, 'self_ns': inside,
+                            'counts': {'chunks': produced, 'bytes': size}})
+
+    def report(self):
+        """Machine-readable profile: every event in start order, times in milliseconds
+
+        Events that run inside another (sections inside the pbxproj write) get a
+        depth, and their self time is taken out of the enclosing event's.
+        """
+        events = sorted(self.events, key=lambda event: (event['start_ns'], -event['wall_ns']))
+        self_ns = [event['self_ns'] for event in events]
+        depths = []
+        open_events = []
+        for i, event in enumerate(events):
+            while open_events and events[open_events[-1]]['start_ns'] + events[open_events[-1]]['wall_ns'] <= event['start_ns']:
+                open_events.pop()
+            if open_events:
+                self_ns[open_events[-1]] -= event['self_ns']
+            depths.append(len(open_events))
+            open_events.append(i)
+
+        return {
+            'total_ms': (time.perf_counter_ns() - self.origin) / 1e6,
+            'phases': [
+                {'name': event['name'], 'kind': event['kind'], 'depth': depth,
+                 'start_ms': event['start_ns'] / 1e6, 'wall_ms': event['wall_ns'] / 1e6,
+                 'self_ms': own / 1e6, **event['counts']}
+                for event, depth, own in zip(events, depths, self_ns)
+            ],
+        }
+
+    def trace(self):
+        """Chrome trace-event document (chrome://tracing, Perfetto) with one complete event per phase"""
+        pid = os.getpid()
+        return {
+            'displayTimeUnit': 'ms',
+            'traceEvents': [
+                {'name': event['name'], 'cat': event['kind'], 'ph': 'X', 'pid': pid, 'tid': 1,
+                 'ts': event['start_ns'] / 1e3, 'dur': event['wall_ns'] / 1e3,
+                 'args': dict(event['counts'], self_ms=event['self_ns'] / 1e6)}
+                for event in self.events
+            ],
+        }
+
+    def summary_lines(self):
+        """Human-readable table, nested events indented under the phase that ran them"""
+        report = self.report()
+        lines = [f"   {'phase':<34} {'self ms':>9} {'wall ms':>9}  counts"]
+        for event in report['phases']:
+            indent = "  " * event['depth']
+            counts = ', '.join(f"{key}={value}" for key, value in event.items()
+                               if key not in ('name', 'kind', 'depth', 'start_ms', 'wall_ms', 'self_ms'))
+            lines.append(f"   {indent + event['name']:<34} {event['self_ms']:>9.2f} {event['wall_ms']:>9.2f}  {counts}")
+        lines.append(f"   {'total':<34} {'':>9} {report['total_ms']:>9.2f}")
+        return lines
+
+def iter_pbxproj(project_files, dir_index=None, ids=None, spec=None, profiler=None):
+    """Yield project.pbxproj content section by section, without building it in memory"""
+    if dir_index is None:
+        dir_index = build_directory_index(project_files)
+    if ids is None:
+        ids = IdAllocator()
+    if spec is None:
+        spec = DEFAULT_SPEC
+    if profiler is None:
+        profiler = Profiler(enabled=False)
+
+    with profiler.phase('id allocation') as counts:
+        file_refs = allocate_file_ids(project_files, ids)
+        group_ids = allocate_group_ids(dir_index, ids)
+        project_config_ids = allocate_project_config_ids(spec, ids)
+        targets = build_targets(spec, file_refs, ids)
+        frameworks = {product['product_id']: product for target in targets for product in target['frameworks']}
+        frameworks_group_id = ids.allocate("GROUP@Frameworks") if frameworks else None
+        counts['ids'] = len(ids)
+    has_dependencies = any(target['dependencies'] for target in targets)
 
-    return pbxproj_content
+    sections = [
+        ('PBXBuildFile', iter_build_file_section(targets)),
+        ('PBXContainerItemProxy', iter_container_item_proxy_section(targets) if has_dependencies else ()),
+        ('PBXCopyFilesBuildPhase', iter_copy_files_phase_section(targets)
+            if any(target['copy_phases'] for target in targets) else ()),
+        ('PBXFileReference', iter_file_reference_section(targets, file_refs, frameworks)),
+        ('PBXFrameworksBuildPhase', iter_frameworks_phase_section(targets)),
+        ('PBXGroup', iter_group_section(dir_index, file_refs, group_ids, targets, frameworks, frameworks_group_id)),
+        ('PBXNativeTarget', iter_native_target_section(targets)),
+        ('PBXProject', iter_project_section(spec, targets)),
+        ('PBXResourcesBuildPhase', iter_resources_phase_section(targets)),
+        ('PBXSourcesBuildPhase', iter_sources_phase_section(targets)),
+        ('PBXTargetDependency', iter_target_dependency_section(targets) if has_dependencies else ()),
+        ('XCBuildConfiguration', iter_build_configuration_section(spec, project_config_ids, targets)),
+        ('XCConfigurationList', iter_configuration_list_section(spec, project_config_ids, targets)),
+    ]
 
-def create_workspace_files():
-    """Create workspace metadata files"""
-    contents_xcworkspacedata = '''<?xml version="1.0" encoding="UTF-8"?>
+    yield "// !$*UTF8*$!\n{\n\tarchiveVersion = 1;\n\tclasses = {\n\t};\n\tobjectVersion = 56;\n\tobjects = {\n\n"
+    for name, chunks in sections:
+        if chunks:
+            yield from profiler.wrap(name, chunks)
+    yield f"\t}};\n\trootObject = {PROJECT_ID} /* Project object */;\n}}\n"
+
+def create_pbxproj(project_files, dir_index=None, ids=None, spec=None):
+    """Generate complete project.pbxproj content"""
+    return ''.join(iter_pbxproj(project_files, dir_index, ids, spec))
+
+def merge_pbxproj(text, project_files, ids, spec=None, base_path="GreatFeelSwiftUI", moved=()):
+    """Patch an existing project.pbxproj so its file references match the scanned files
+
+    Only file references below the source group, their build files and phase entries,
+    and the groups that hold them are added or removed; every other line, including
+    anything edited by hand in Xcode, is kept as it is. Files in moved now belong to
+    another project and are removed although they exist. Returns (text, added, removed).
+    """
+    from bisect import bisect_right
+    from pbxproj_parser import PbxProject, Patch, PbxprojError
+
+    if spec is None:
+        spec = DEFAULT_SPEC
+    project = PbxProject(text)
+    objects = project.objects
+    ids.reserve(objects)
+
+    # Paths are read a whole section at a time. Groups outside the source tree (SDK or
+    # absolute paths) are skipped; file references are only checked before removal.
+    group_trees = project.values('PBXGroup', 'sourceTree')
+    paths = {object_id: path for object_id, path in project.values('PBXGroup', 'path').items()
+             if group_trees.get(object_id) == '<group>'}
+    paths.update(project.values('PBXFileReference', 'path'))
+
+    def group_path(obj):
+        return paths.get(obj.id)
+
+    main_group = objects.get(project.root.get('mainGroup'))
+    source_group = next((objects[child] for child in (main_group.list_ids('children') if main_group else ())
+                         if child in objects and objects[child].isa == 'PBXGroup'
+                         and group_path(objects[child]) == base_path), None)
+    if source_group is None:
+        raise PbxprojError(f"no '{base_path}' group in the project's main group")
+
+    # Map the source group tree back to directories and files
+    dir_groups = {'': source_group.id}
+    existing = {}   # rel_path -> file reference ID
+    parent_of = {}  # child ID -> group ID
+    stack = [('', source_group)]
+    while stack:
+        rel_dir, group = stack.pop()
+        for child_id in group.list_ids('children'):
+            child = objects.get(child_id)
+            if child is None:
+                continue
+            parent_of[child_id] = group.id
+            path = group_path(child)
+            if child.isa == 'PBXGroup':
+                # Groups without a path only organise the navigator; their children share the directory
+                sub_dir = f"{rel_dir}/{path}".lstrip('/') if path else rel_dir
+                dir_groups.setdefault(sub_dir, child_id)
+                stack.append((sub_dir, child))
+            elif child.isa == 'PBXFileReference' and path:
+                existing[f"{rel_dir}/{path}".lstrip('/')] = child_id
+
+    native_targets = {target.get('name'): target for target in project.objects_of('PBXNativeTarget')}
+    patch = Patch(project)
+
+    # Files that are gone from disk lose their reference, build files and phase entries.
+    # Files that still exist but aren't scanned (excluded, or types the generator skips) stay.
+    removed = sorted(path for path in existing
+                     if path not in project_files
+                     and (path in moved or not os.path.lexists(os.path.join(base_path, path)))
+                     and objects[existing[path]].get('sourceTree') == '<group>')
+    # The build file section is read once, for removals here and for placing new phase entries below
+    added = [path for path in project_files if path not in existing]
+    build_refs = project.values('PBXBuildFile', 'fileRef') if removed or added else {}
+    build_files_of = {}
+    phase_of = {}
+    if removed:
+        removed_refs = {existing[path] for path in removed}
+        for build_id, ref_id in build_refs.items():
+            if ref_id in removed_refs:
+                build_files_of.setdefault(ref_id, []).append(build_id)
+        for target in native_targets.values():
+            for phase_id in target.list_ids('buildPhases'):
+                if phase_id in objects:
+                    for build_id in objects[phase_id].list_ids('files'):
+                        phase_of[build_id] = phase_id
+    for path in removed:
+        ref_id = existing[path]
+        patch.remove_object(ref_id)
+        patch.remove_list_entry(parent_of[ref_id], 'children', ref_id)
+        for build_id in build_files_of.get(ref_id, ()):
+            patch.remove_object(build_id)
+            if build_id in phase_of:
+                patch.remove_list_entry(phase_of[build_id], 'files', build_id)
+    def ancestors(paths):
+        dirs = set()
+        for path in paths:
+            directory = path.rpartition('/')[0]
+            while directory and directory not in dirs:
+                dirs.add(directory)
+                directory = directory.rpartition('/')[0]
+        return dirs
+
+    # A directory whose files all moved to another project leaves this one too
+    emptied = ancestors(moved) - ancestors(project_files) if moved else set()
+    for rel_dir, group_id in dir_groups.items():
+        if not rel_dir or group_id not in parent_of:
+            continue
+        if rel_dir in emptied or not os.path.isdir(os.path.join(base_path, rel_dir)):
+            patch.remove_object(group_id)
+            patch.remove_list_entry(parent_of[group_id], 'children', group_id)
+
+    file_refs = allocate_file_ids({path: project_files[path] for path in added}, ids)
+
+    # List entries are placed where the generator would list them: subgroups then files by
+    # name in groups, build files by path in phases. Collected first, then sorted per list.
+    new_entries = {}  # (object ID, list key) -> [(sort key, line)]
+
+    # New directories become new groups, each listed in its parent (existing or new)
+    new_groups = {}  # rel_dir -> {'id', 'name', 'dirs', 'files'}
+
+    def ensure_group(rel_dir):
+        if rel_dir in dir_groups:
+            return
+        parent, _, name = rel_dir.rpartition('/')
+        ensure_group(parent)
+        group_id = ids.allocate(f"GROUP_{rel_dir}")
+        dir_groups[rel_dir] = group_id
+        new_groups[rel_dir] = {'id': group_id, 'name': name, 'dirs': [], 'files': []}
+        line = f"\t\t\t\t{group_id} /* {name} */,\n"
+        if parent in new_groups:
+            new_groups[parent]['dirs'].append((name, line))
+        else:
+            new_entries.setdefault((dir_groups[parent], 'children'), []).append(((False, name), line))
+
+    for path in added:
+        info = file_refs[path]
+        rel_dir = path.rpartition('/')[0]
+        ensure_group(rel_dir)
+        line = f"\t\t\t\t{info.id} /* {info.name} */,\n"
+        if rel_dir in new_groups:
+            new_groups[rel_dir]['files'].append((info.name, line))
+        else:
+            new_entries.setdefault((dir_groups[rel_dir], 'children'), []).append(((True, info.name), line))
+        patch.add_object('PBXFileReference', info.id, file_reference_line(info))
+
+    for rel_dir, group in sorted(new_groups.items()):
+        children = [line for _, line in sorted(group['dirs'])] + [line for _, line in sorted(group['files'])]
+        patch.add_object('PBXGroup', group['id'], group_object(group['id'], group['name'], children))
+
+    # Add new files to the phases of every spec target the project already has
+    for index, target in enumerate(spec['targets']):
+        native = native_targets.get(target['name'])
+        if native is None:
+            continue
+        phases = {objects[phase_id].isa: phase_id for phase_id in native.list_ids('buildPhases') if phase_id in objects}
+        key_prefix = "BUILD_" if index == 0 else f"BUILD@{target['name']}/"
+        build_files = allocate_build_files(file_refs, select_sources(target, sorted(added)), ids, key_prefix)
+        for path, info in build_files.items():
+            phase_id = phases.get(f"PBX{info.phase}BuildPhase")
+            if phase_id is None:
+                continue
+            patch.add_object('PBXBuildFile', info.id, build_file_line(info))
+            line = f"\t\t\t\t{info.id} /* {info.name} in {info.phase} */,\n"
+            new_entries.setdefault((phase_id, 'files'), []).append((path, line))
+
+    def child_key(entry_id):
+        obj = objects.get(entry_id)
+        return (obj is None or obj.isa != 'PBXGroup', paths.get(entry_id, ''))
+
+    build_paths = {}
+    if any(key == 'files' for _, key in new_entries):
+        ref_paths = {ref_id: path for path, ref_id in existing.items()}
+        build_paths = {build_id: ref_paths.get(ref_id, '') for build_id, ref_id in build_refs.items()}
+    for (object_id, key), lines in new_entries.items():
+        entry_key = child_key if key == 'children' else lambda entry_id: build_paths.get(entry_id, '')
+        entries = [(entry_key(entry_id), offset) for entry_id, offset in objects[object_id].list_entries(key)]
+        keys = [sort_key for sort_key, _ in entries]
+        for sort_key, line in sorted(lines):
+            at = bisect_right(keys, sort_key)
+            patch.add_list_entry(object_id, key, line, entries[at][1] if at < len(entries) else None)
+
+    return patch.apply() if patch else text, added, removed
+
+def create_workspace_files(projects=None):
+    """Create workspace metadata files; with projects, a workspace referencing each of them"""
+    locations = [f"group:{project}" for project in projects] if projects else ["self:"]
+    file_refs = ''.join(f'''   <FileRef
+      location = "{location}">
+   </FileRef>
+''' for location in locations)
+    contents_xcworkspacedata = f'''<?xml version="1.0" encoding="UTF-8"?>
 <Workspace
    version = "1.0">
-   <FileRef
-      location = "self:">
-   </FileRef>
-</Workspace>
+{file_refs}</Workspace>
 '''
 
     workspace_checks = '''<?xml version="1.0" encoding="UTF-8"?>
@@ -557,7 +2143,830 @@ def create_workspace_files():
 
     return contents_xcworkspacedata, workspace_checks
 
-def main():
+def xml_attr(value):
+    """Escape a value for a double-quoted XML attribute"""
+    return (value.replace('&', '&amp;').replace('"', '&quot;')
+            .replace('<', '&lt;').replace('>', '&gt;'))
+
+def scheme_options(spec):
+    """The spec's "schemes" section over SCHEME_OPTIONS"""
+    return dict(SCHEME_OPTIONS, **(spec.get('schemes') or {}))
+
+def scheme_configurations(spec):
+    """Configurations the scheme actions use: Debug to run, test and analyze, the default one to
+    archive, and Profile (if defined) to profile"""
+    names = [config['name'] for config in spec['configurations']]
+    debug = 'Debug' if 'Debug' in names else names[0]
+    release = spec.get('default_configuration', names[-1])
+    return {'debug': debug, 'release': release, 'profile': 'Profile' if 'Profile' in names else release}
+
+def buildable_reference(target, container, indent):
+    """A BuildableReference element naming target's product in container"""
+    pad = ' ' * indent
+    return (f'{pad}<BuildableReference\n'
+            f'{pad}   BuildableIdentifier = "primary"\n'
+            f'{pad}   BlueprintIdentifier = "{target["id"]}"\n'
+            f'{pad}   BuildableName = "{xml_attr(target["product"])}"\n'
+            f'{pad}   BlueprintName = "{xml_attr(target["name"])}"\n'
+            f'{pad}   ReferencedContainer = "container:{xml_attr(container)}">\n'
+            f'{pad}</BuildableReference>\n')
+
+def scheme_xml(target, testables, container, configs, options, fast=False):
+    """One .xcscheme building, running and testing target
+
+    testables are the test targets run by the Test action. The fast variant only builds
+    target for running and testing, runs unit tests alone and skips code coverage.
+    """
+    yes_no = lambda flag: "YES" if flag else "NO"
+    entries = [(target, ('YES',) * 5 if not fast else ('YES', 'YES', 'NO', 'NO', 'NO'))]
+    entries.extend((test, ('YES', 'NO', 'NO', 'NO', 'NO')) for test in testables)
+    build_entries = ''.join(f'''         <BuildActionEntry
+            buildForTesting = "{testing}"
+            buildForRunning = "{running}"
+            buildForProfiling = "{profiling}"
+            buildForArchiving = "{archiving}"
+            buildForAnalyzing = "{analyzing}">
+{buildable_reference(entry, container, 12)}         </BuildActionEntry>
+''' for entry, (testing, running, profiling, archiving, analyzing) in entries)
+
+    attributes = ['skipped = "NO"', f'parallelizable = "{yes_no(options["parallel_tests"] or fast)}"']
+    if options['random_order']:
+        attributes.append('testExecutionOrdering = "random"')
+    attributes = '\n            '.join(attributes)
+    testable_refs = ''.join(f'''         <TestableReference
+            {attributes}>
+{buildable_reference(test, container, 12)}         </TestableReference>
+''' for test in testables)
+    if testables:
+        tests = f'''      codeCoverageEnabled = "{yes_no(options['code_coverage'] and not fast)}">
+      <Testables>
+{testable_refs}      </Testables>
+'''
+    else:
+        tests = '''      shouldAutocreateTestPlan = "YES">
+'''
+
+    # Apps are launched; extensions and frameworks only name what the action is about
+    if target['type'] == 'application':
+        runnable = f'''      <BuildableProductRunnable
+         runnableDebuggingMode = "0">
+{buildable_reference(target, container, 9)}      </BuildableProductRunnable>
+'''
+    else:
+        runnable = f'''      <MacroExpansion>
+{buildable_reference(target, container, 9)}      </MacroExpansion>
+'''
+    debug = configs['fast'] if fast else configs['debug']
+
+    return f'''<?xml version="1.0" encoding="UTF-8"?>
+<Scheme
+   LastUpgradeVersion = "1540"
+   version = "1.7">
+   <BuildAction
+      parallelizeBuildables = "{yes_no(options['parallel_builds'] or fast)}"
+      buildImplicitDependencies = "YES"
+      buildArchitectures = "Automatic">
+      <BuildActionEntries>
+{build_entries}      </BuildActionEntries>
+   </BuildAction>
+   <TestAction
+      buildConfiguration = "{xml_attr(debug)}"
+      selectedDebuggerIdentifier = "Xcode.DebuggerFoundation.Debugger.LLDB"
+      selectedLauncherIdentifier = "Xcode.DebuggerFoundation.Launcher.LLDB"
+      shouldUseLaunchSchemeArgsEnv = "YES"
+{tests}   </TestAction>
+   <LaunchAction
+      buildConfiguration = "{xml_attr(debug)}"
+      selectedDebuggerIdentifier = ""
+      selectedLauncherIdentifier = "Xcode.IDEFoundation.Launcher.PosixSpawn"
+      launchStyle = "1"
+      useCustomWorkingDirectory = "NO"
+      ignoresPersistentStateOnLaunch = "NO"
+      debugDocumentVersioning = "{yes_no(not fast)}"
+      debugServiceExtension = "internal"
+      allowLocationSimulation = "YES">
+{runnable}   </LaunchAction>
+   <ProfileAction
+      buildConfiguration = "{xml_attr(configs['profile'])}"
+      shouldUseLaunchSchemeArgsEnv = "YES"
+      savedToolIdentifier = ""
+      useCustomWorkingDirectory = "NO"
+      debugDocumentVersioning = "YES">
+{runnable}   </ProfileAction>
+   <AnalyzeAction
+      buildConfiguration = "{xml_attr(debug)}">
+   </AnalyzeAction>
+   <ArchiveAction
+      buildConfiguration = "{xml_attr(configs['release'])}"
+      revealArchiveInOrganizer = "YES">
+   </ArchiveAction>
+</Scheme>
+'''
+
+def spec_target_ids(spec, ids):
+    """{target name: ID} as build_targets allocates them for a generated project
+
+    Every path calls this first with a fresh allocator, before the project.pbxproj (built
+    lazily or merged) or its schemes, so target IDs win any collision the same way no
+    matter which output is produced first.
+    """
+    return {target['name']: TARGET_ID if index == 0 else ids.allocate(f"TARGET@{target['name']}")
+            for index, target in enumerate(spec['targets'])}
+
+def create_schemes(spec, target_ids, project_dir=PROJECT_DIR):
+    """Shared schemes for the spec's targets: {path: contents}
+
+    Every target except test bundles gets a scheme named after it, testing the test
+    targets it hosts (hostless ones are tested by the primary target's scheme). The
+    primary application also gets a "<name> Fast Debug" scheme for local iteration.
+    target_ids maps target names to their IDs in the project; targets it lacks are left out.
+    """
+    options = scheme_options(spec)
+    configs = scheme_configurations(spec)
+    configs['fast'] = options.get('fast_debug_configuration') or configs['debug']
+    container = os.path.basename(project_dir)
+    targets = []
+    for index, target in enumerate(spec['targets']):
+        if target['name'] not in target_ids:
+            continue
+        extension = TARGET_TYPES[target['type']][2]
+        targets.append({
+            'id': target_ids[target['name']],
+            'name': target['name'],
+            'type': target['type'],
+            'host': target.get('host'),
+            'product': target.get('product_name', target['name']) + extension,
+        })
+
+    primary = targets[0] if targets and targets[0]['name'] == spec['targets'][0]['name'] else None
+    tests = [target for target in targets if target['type'] in ('unit-test', 'ui-test')]
+    schemes = {}
+    for target in targets:
+        if target in tests:
+            continue
+        testables = [test for test in tests if test['host'] == target['name'] or
+                     (target is primary and test['host'] is None)]
+        schemes[target['name']] = scheme_xml(target, testables, container, configs, options)
+        if target is primary and target['type'] == 'application' and options['fast_debug']:
+            unit_tests = [test for test in testables if test['type'] == 'unit-test']
+            schemes[f"{target['name']} Fast Debug"] = scheme_xml(
+                target, unit_tests, container, configs, options, fast=True)
+    return {f"{project_dir}/xcshareddata/xcschemes/{name}.xcscheme": xml for name, xml in schemes.items()}
+
+def generator_settings(base_path, spec=None):
+    """Settings that affect the generated output, recorded in the manifest"""
+    with open(os.path.abspath(__file__), 'rb') as f:
+        generator_hash = hashlib.sha1(f.read()).hexdigest()
+    spec_hash = hashlib.sha1(json.dumps(spec or DEFAULT_SPEC, sort_keys=True).encode()).hexdigest()
+
+    return {
+        'version': GENERATOR_VERSION,
+        'generator': generator_hash,
+        'base_path': base_path,
+        'spec': spec_hash,
+    }
+
+def scan_inputs(project_files):
+    """Summarize the scanned file set; the output depends only on these paths"""
+    digest = hashlib.sha1()
+    for path in sorted(project_files):
+        digest.update(path.encode('utf-8') + b'\0')
+    return {'files': len(project_files), 'digest': digest.hexdigest()}
+
+def stat_outputs(paths):
+    """Record (size, mtime) of generated files so outside edits are noticed"""
+    outputs = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        outputs[path] = [st.st_size, st.st_mtime_ns]
+    return outputs
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the manifest written by the previous run, if any"""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def manifest_is_current(manifest, settings, inputs):
+    """Check whether the previous run saw exactly these inputs and left its outputs intact"""
+    if not manifest:
+        return False
+    if manifest.get('settings') != settings or manifest.get('inputs') != inputs:
+        return False
+    outputs = manifest.get('outputs') or {}
+    return bool(outputs) and stat_outputs(outputs) == outputs
+
+WRITE_BUFFER_SIZE = 1 << 20
+
+def _open_temp(path, existing, prefix_length):
+    """Open a temp file beside path, pre-filled with the first prefix_length bytes of existing"""
+    import tempfile
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    out = os.fdopen(fd, 'wb', buffering=WRITE_BUFFER_SIZE)
+    if prefix_length:
+        existing.seek(0)
+        while prefix_length:
+            block = existing.read(min(prefix_length, WRITE_BUFFER_SIZE))
+            out.write(block)
+            prefix_length -= len(block)
+    return out, tmp_path
+
+def write_if_changed(path, chunks):
+    """Stream chunks into path atomically, leaving it untouched if it already holds the same bytes
+
+    The new content is compared against the existing file as it is produced; a temp
+    file is only started at the first difference, then renamed over path when complete.
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+
+    try:
+        existing = open(path, 'rb')
+    except FileNotFoundError:
+        existing = None
+
+    out = tmp_path = None
+    matched = 0
+    try:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            if out is None:
+                if existing is not None and existing.read(len(data)) == data:
+                    matched += len(data)
+                    continue
+                out, tmp_path = _open_temp(path, existing, matched)
+            out.write(data)
+
+        if out is None:
+            if existing is not None and not existing.read(1):
+                return False
+            # New content is a strict prefix of the old file, or there is no old file
+            out, tmp_path = _open_temp(path, existing, matched)
+
+        out.close()
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+        return True
+    except BaseException:
+        if out is not None:
+            out.close()
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+        raise
+    finally:
+        if existing is not None:
+            existing.close()
+
+def content_differs(path, chunks):
+    """Whether writing chunks to path would change it, reading no further than the first difference
+
+    Chunks are consumed lazily, so generation stops as soon as the answer is known.
+    """
+    if isinstance(chunks, str):
+        chunks = (chunks,)
+    try:
+        existing = open(path, 'rb')
+    except FileNotFoundError:
+        return True
+    with existing:
+        for chunk in chunks:
+            data = chunk.encode('utf-8')
+            if existing.read(len(data)) != data:
+                return True
+        return bool(existing.read(1))
+
+def compare_output(path, content, show_diff=False):
+    """(would change, unified diff text) for writing content to path; the diff only with show_diff"""
+    if not show_diff:
+        return content_differs(path, content), ""
+    new = content if isinstance(content, str) else ''.join(content)
+    try:
+        with open(path, encoding='utf-8') as f:
+            old = f.read()
+    except FileNotFoundError:
+        old = ""
+    if old == new:
+        return False, ""
+    import difflib
+
+    return True, ''.join(difflib.unified_diff(old.splitlines(True), new.splitlines(True), f"a/{path}", f"b/{path}"))
+
+def report_changes(outputs, show_diff=False):
+    """Compare the would-be outputs with the files on disk without writing anything
+
+    Returns the paths that would change; with show_diff a unified diff of each is printed.
+    """
+    changed = []
+    for path, content in outputs.items():
+        differs, diff = compare_output(path, content, show_diff)
+        if differs:
+            changed.append(path)
+            sys.stdout.write(diff)
+    return changed
+
+def build_shard(job):
+    """Generate one module's project.pbxproj in a worker process and write it, or only compare
+    it for --check ('check') and --diff ('diff'), along with its shared schemes.
+    Returns [(path, changed, diff text)] for the project.pbxproj and each scheme."""
+    path, project_files, spec, mode, merge = job
+    ids = IdAllocator()
+    target_ids = spec_target_ids(spec, ids)
+    merged = None
+    if merge and os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            content = merged = merge_pbxproj(f.read(), project_files, ids, spec)[0]
+    else:
+        content = iter_pbxproj(project_files, None, ids, spec)
+    outputs = {path: content}
+    outputs.update(scheme_outputs(spec, target_ids, os.path.dirname(path), merged))
+    if mode == 'write':
+        return [(output, write_if_changed(output, content), "") for output, content in outputs.items()]
+    return [(output, *compare_output(output, content, mode == 'diff')) for output, content in outputs.items()]
+
+def scheme_outputs(spec, target_ids, project_dir, merged=None):
+    """create_schemes() for a generated project (target_ids from spec_target_ids); for a merged
+    one (merged is its text), only the schemes missing on disk, pointing at the targets the
+    project already has"""
+    if merged is None:
+        return create_schemes(spec, target_ids, project_dir)
+    # --merge keeps schemes edited in Xcode, so the merged project is only read when one is missing
+    names = create_schemes(spec, dict.fromkeys(target['name'] for target in spec['targets']), project_dir)
+    missing = [path for path in names if not os.path.exists(path)]
+    if not missing:
+        return {}
+    from pbxproj_parser import PbxProject
+    target_ids = {target.get('name'): target.id for target in PbxProject(merged).objects_of('PBXNativeTarget')}
+    schemes = create_schemes(spec, target_ids, project_dir)
+    return {path: schemes[path] for path in missing if path in schemes}
+
+def stale_schemes(project_dir, outputs):
+    """Shared schemes in project_dir that outputs no longer include"""
+    scheme_dir = f"{project_dir}/xcshareddata/xcschemes"
+    try:
+        names = os.listdir(scheme_dir)
+    except OSError:
+        return []
+    return sorted(f"{scheme_dir}/{name}" for name in names
+                  if name.endswith('.xcscheme') and f"{scheme_dir}/{name}" not in outputs)
+
+def stale_projects(old_outputs, new_outputs):
+    """Module projects and workspaces an earlier run wrote that this run no longer produces"""
+    stale = set()
+    current = {path.split('/', 1)[0] for path in new_outputs}
+    for path in set(old_outputs) - set(new_outputs):
+        top = path.split('/', 1)[0]
+        if top not in current and top.endswith(('.xcodeproj', '.xcworkspace')) and os.path.isdir(top):
+            stale.add(top)
+    return sorted(stale)
+
+def report_dependencies(args, spec, project_files, scanned, graph):
+    """--deps: print the dependency analysis, and write it as JSON with --deps-json, instead of generating"""
+    import swift_deps
+
+    paths = sorted(project_files)
+    targets = {}
+    if any(target.get('roots') for target in spec['targets']):
+        derived = derive_members(spec, project_files, graph)
+        for target, derived_target in zip(spec['targets'], derived['targets']):
+            if derived_target.get('members') is not None:
+                selected = sum(1 for path in select_sources(target, paths) if path.endswith('.swift'))
+                targets[target['name']] = (selected, len(derived_target['members']))
+    analysis = swift_deps.report(scanned, graph, swift_deps.directory_module(args.deps_depth), targets)
+
+    print(f"🔗 Swift dependencies (modules are directories {args.deps_depth} level(s) deep):")
+    for line in swift_deps.report_lines(analysis):
+        print(line)
+    if args.deps_json:
+        write_if_changed(args.deps_json, json.dumps(analysis, indent=1) + "\n")
+        print(f"📄 Dependency analysis written to {args.deps_json}")
+    return 0
+
+def report_resources(args, analysis):
+    """Print the resource audit, and write it as JSON with --audit-json; 1 if --audit-strict fails it"""
+    import resource_audit
+
+    print("📦 Resource audit:")
+    for line in resource_audit.report_lines(analysis):
+        print(line)
+    if args.audit_json:
+        write_if_changed(args.audit_json, json.dumps(analysis, indent=1) + "\n")
+        print(f"📄 Resource audit written to {args.audit_json}")
+    if args.audit_strict and not analysis['ok']:
+        print("❌ Resources are over budget or bundled more than once (--audit-strict)")
+        return 1
+    return 0
+
+def analyze_build_logs(args):
+    """--build-log: rank the slowest files, functions and phases in xcodebuild logs, and write
+    the analysis as JSON with --build-log-json, instead of generating"""
+    import build_log
+
+    try:
+        stats = build_log.analyze(args.build_log)
+    except OSError as e:
+        print(f"❌ Error: cannot read {e.filename}: {e.strerror}")
+        return 1
+    analysis = build_log.report(stats, args.build_log_top)
+
+    print("⏱️  Swift compile times:")
+    for line in build_log.report_lines(analysis, args.build_log_top):
+        print(line)
+    if args.build_log_json:
+        write_if_changed(args.build_log_json, json.dumps(analysis, indent=1) + "\n")
+        print(f"📄 Build log analysis written to {args.build_log_json}")
+    return 0
+
+def validate_projects(paths=None):
+    """--validate: check project.pbxproj files without Xcode and print every problem found
+
+    Defaults to the app project and the module projects the last run generated.
+    """
+    import pbxproj_validator
+
+    if not paths:
+        outputs = (load_manifest() or {}).get('outputs') or {}
+        paths = [f"{PROJECT_DIR}/project.pbxproj"]
+        paths += sorted(path for path in outputs if path.endswith('/project.pbxproj') and path not in paths)
+    problems = 0
+    for path in paths:
+        start = time.perf_counter()
+        try:
+            issues = pbxproj_validator.validate_file(path)
+        except OSError as e:
+            print(f"❌ Error: cannot read {path}: {e.strerror}")
+            problems += 1
+            continue
+        elapsed = (time.perf_counter() - start) * 1000
+        if not issues:
+            print(f"✅ {path}: no problems ({elapsed:.0f} ms)")
+            continue
+        problems += len(issues)
+        print(f"❌ {path}: {len(issues)} problem{'s' if len(issues) != 1 else ''} ({elapsed:.0f} ms)")
+        for object_id, where, message in issues:
+            print(f"   • {object_id} {where}: {message}" if object_id else f"   • {message}")
+    return 1 if problems else 0
+
+def save_manifest(settings, inputs, output_paths, path=MANIFEST_PATH):
+    """Record this run's inputs and outputs for the next incremental run"""
+    manifest = {
+        'settings': settings,
+        'inputs': inputs,
+        'outputs': stat_outputs(output_paths),
+    }
+    write_if_changed(path, json.dumps(manifest, indent=1, sort_keys=True) + "\n")
+
+BUILD_MANIFEST_PATH = ".xcodegen_build.json"
+BUILD_MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+
+# Files outside the source root that still change what xcodebuild produces
+BUILD_EXTRA_INPUTS = ('Info.plist',)
+
+def input_stat(path):
+    """[size, mtime_ns] of a file, or total size and newest mtime of everything in a bundle directory"""
+    st = os.stat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        return [st.st_size, st.st_mtime_ns]
+    size = 0
+    newest = st.st_mtime_ns
+    for root, _, files in os.walk(path):
+        newest = max(newest, os.stat(root).st_mtime_ns)
+        for name in files:
+            st = os.stat(os.path.join(root, name))
+            size += st.st_size
+            newest = max(newest, st.st_mtime_ns)
+    return [size, newest]
+
+def hash_input(path):
+    """Content hash of a file, or of a bundle directory's relative paths and contents, read in chunks"""
+    digest = hashlib.blake2b(digest_size=16)
+    if os.path.isdir(path):
+        files = []
+        for root, dirs, names in os.walk(path):
+            dirs.sort()
+            files.extend(os.path.join(root, name) for name in sorted(names))
+    else:
+        files = [path]
+    for file_path in files:
+        if file_path != path:
+            digest.update(os.path.relpath(file_path, path).encode('utf-8') + b'\0')
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(HASH_CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_inputs(paths, previous=None, workers=None):
+    """{path: [size, mtime_ns, content hash]} for every input, rehashing only what changed
+
+    A file whose size and mtime match the previous manifest keeps its hash. The rest
+    are hashed on a thread pool (hashlib releases the GIL while it works through a
+    chunk), largest first so a big video starts at once rather than holding up the
+    tail. Files written within RACY_WINDOW_NS are recorded with mtime 0 so they are
+    hashed again next time.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    previous = previous or {}
+    entries = {}
+    pending = []
+    for path in paths:
+        try:
+            key = input_stat(path)
+        except OSError:
+            continue
+        old = previous.get(path)
+        if old is not None and old[:2] == key:
+            entries[path] = old
+        else:
+            pending.append((key, path))
+    pending.sort(key=lambda job: job[0][0], reverse=True)
+
+    racy_after = time.time_ns() - RACY_WINDOW_NS
+    with ThreadPoolExecutor(max_workers=workers or DISCOVERY_WORKERS) as pool:
+        for (key, path), digest in zip(pending, pool.map(hash_input, [path for _, path in pending])):
+            entries[path] = [key[0], 0 if key[1] >= racy_after else key[1], digest]
+    return dict(sorted(entries.items()))
+
+def build_settings_hash(settings):
+    """Hash of what changes every compiled file: the spec and the generator's output format"""
+    relevant = {key: value for key, value in settings.items() if key != 'generator'}
+    return hashlib.sha1(json.dumps(relevant, sort_keys=True).encode()).hexdigest()
+
+def inputs_digest(files):
+    """One hash over every input path and its content hash"""
+    digest = hashlib.blake2b(digest_size=16)
+    for path, entry in sorted(files.items()):
+        digest.update(f"{path}\0{entry[2]}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+def load_build_manifest(path=BUILD_MANIFEST_PATH):
+    """The build manifest, or None if it is missing or from another manifest version"""
+    manifest = load_manifest(path)
+    if not manifest or manifest.get('version') != BUILD_MANIFEST_VERSION:
+        return None
+    return manifest
+
+def build_input_paths(base_path, project_files):
+    """Every file the build manifest hashes: the project's files and the build inputs outside it"""
+    paths = [f"{base_path}/{rel_path}" for rel_path in project_files]
+    paths.extend(extra for extra in BUILD_EXTRA_INPUTS if os.path.isfile(extra))
+    return paths
+
+def build_inputs_current(base_path, project_files, settings, path=BUILD_MANIFEST_PATH):
+    """Whether the build manifest already records these inputs, by size and mtime, with nothing
+    changed since the run before; updating it then would only write the same file again"""
+    manifest = load_build_manifest(path)
+    if (manifest is None or manifest['added'] or manifest['removed'] or manifest['changed']
+            or manifest['settings'] != build_settings_hash(settings)):
+        return False
+    files = manifest['files']
+    paths = build_input_paths(base_path, project_files)
+    if len(paths) != len(files):
+        return False
+    try:
+        return all(p in files and files[p][:2] == input_stat(p) for p in paths)
+    except OSError:
+        return False
+
+def update_build_manifest(base_path, project_files, settings, workers=None, path=BUILD_MANIFEST_PATH):
+    """Hash every source and resource and record what changed since the previous run
+
+    The manifest keeps each input's content hash, the files added, removed and changed
+    since the previous run, the settings hash, and a snapshot per build recorded with
+    --mark-built, which --build-status compares against.
+    """
+    previous = load_build_manifest(path) or {}
+    old_files = previous.get('files', {})
+    files = hash_inputs(build_input_paths(base_path, project_files), old_files, workers)
+    manifest = {
+        'version': BUILD_MANIFEST_VERSION,
+        'settings': build_settings_hash(settings),
+        'files': files,
+        'added': sorted(files.keys() - old_files.keys()),
+        'removed': sorted(old_files.keys() - files.keys()),
+        'changed': sorted(p for p in files.keys() & old_files.keys() if files[p][2] != old_files[p][2]),
+        'built': previous.get('built', {}),
+    }
+    write_if_changed(path, json.dumps(manifest, separators=(',', ':'), sort_keys=True) + "\n")
+    return manifest
+
+def build_status(name, path=BUILD_MANIFEST_PATH):
+    """What the build called name needs: "clean" for new settings (or no record of it),
+    "incremental" when inputs changed since it last succeeded, "none" otherwise"""
+    manifest = load_build_manifest(path)
+    built = (manifest or {}).get('built', {}).get(name)
+    if not built or built.get('settings') != manifest['settings']:
+        return 'clean'
+    if built.get('digest') != inputs_digest(manifest['files']):
+        return 'incremental'
+    return 'none'
+
+def mark_built(name, path=BUILD_MANIFEST_PATH):
+    """Record that the build called name succeeded with the inputs of the last generator run"""
+    manifest = load_build_manifest(path)
+    if manifest is None:
+        return False
+    manifest['built'][name] = {'settings': manifest['settings'], 'digest': inputs_digest(manifest['files'])}
+    write_if_changed(path, json.dumps(manifest, separators=(',', ':'), sort_keys=True) + "\n")
+    return True
+
+def record_build_inputs(args, base_path, project_files, settings, profiler):
+    """Update the build manifest (unless --no-build-manifest) and say what changed since the last run"""
+    if args.no_build_manifest:
+        return
+    with profiler.phase('build manifest') as counts:
+        manifest = update_build_manifest(base_path, project_files, settings, args.jobs)
+        counts.update(files=len(manifest['files']), added=len(manifest['added']),
+                      removed=len(manifest['removed']), changed=len(manifest['changed']))
+    if manifest['added'] or manifest['removed'] or manifest['changed']:
+        print(f"🧾 Build inputs: {len(manifest['changed'])} changed, {len(manifest['added'])} added, "
+              f"{len(manifest['removed'])} removed since the last run ({BUILD_MANIFEST_PATH})")
+    else:
+        print(f"🧾 Build inputs unchanged since the last run ({BUILD_MANIFEST_PATH})")
+
+def parse_args(argv):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate the GreatFeelSwiftUI Xcode project")
+    parser.add_argument('--incremental', action='store_true',
+                        help="skip generation when nothing changed since the last run and only "
+                             "rewrite files whose contents differ, instead of recreating the project")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"list every directory instead of reusing {SCAN_CACHE_PATH}")
+    parser.add_argument('--cache-stats', action='store_true',
+                        help="report how many directories were served from the scan cache")
+    parser.add_argument('--explain', metavar='PATH',
+                        help=f"don't generate; print which ignore rule (built-in, .gitignore or "
+                             f"{SCAN_IGNORE_PATH}) decides whether PATH is scanned")
+    parser.add_argument('--spec', default=None,
+                        help=f"project spec describing targets, configurations and settings "
+                             f"(default: {SPEC_PATH} if present, else the built-in app target)")
+    parser.add_argument('-j', '--jobs', type=int, default=None,
+                        help=f"worker threads for file discovery (default: {DISCOVERY_WORKERS}) and "
+                             f"processes for the dependency scan and module projects (default: one per CPU)")
+    parser.add_argument('--merge', action='store_true',
+                        help="patch the existing project.pbxproj in place, adding and removing only the "
+                             "file references that changed and keeping edits made in Xcode")
+    parser.add_argument('--check', action='store_true',
+                        help="don't write anything; exit 1 if generating would change the project, printing "
+                             "only a one-line reason")
+    parser.add_argument('--diff', action='store_true',
+                        help="don't write anything; print a unified diff of what would change "
+                             "and exit 1 if anything would")
+    parser.add_argument('--quiet', action='store_true',
+                        help="print nothing while generating; if it fails, print only a one-line reason "
+                             "to stderr (for build scripts)")
+    parser.add_argument('--watch', action='store_true',
+                        help="after generating, keep running and patch project.pbxproj as --merge does "
+                             "whenever files are added, removed or renamed (with --merge, a project that "
+                             "can't be parsed is reported instead of regenerated)")
+    parser.add_argument('--watch-poll', action='store_true',
+                        help="with --watch, poll directory mtimes instead of using inotify")
+    parser.add_argument('--no-build-manifest', action='store_true',
+                        help=f"don't hash sources and resources into {BUILD_MANIFEST_PATH}")
+    parser.add_argument('--build-status', metavar='NAME',
+                        help="don't generate; print what the build NAME needs since it last succeeded: "
+                             "clean, incremental or none")
+    parser.add_argument('--mark-built', metavar='NAME',
+                        help="don't generate; record that the build NAME succeeded with the current inputs")
+    parser.add_argument('--validate', nargs='*', metavar='PATH',
+                        help="don't generate; check project.pbxproj files (default: the app project and its "
+                             "module projects) for dangling references, duplicate IDs, files outside the "
+                             "group tree and missing paths, and exit 1 if any are found")
+    parser.add_argument('--compile-timing', type=int, nargs='?', const=COMPILE_TIMING_LIMIT, metavar='MS',
+                        help=f"add -debug-time-function-bodies and warnings for function bodies and expressions "
+                             f"slower than MS (default: {COMPILE_TIMING_LIMIT}) to the Debug configuration's "
+                             f"OTHER_SWIFT_FLAGS, so build logs carry what --build-log reads")
+    parser.add_argument('--build-log', nargs='+', metavar='LOG',
+                        help="don't generate; stream xcodebuild logs ('-' for stdin) and rank files, functions "
+                             "and expressions by type-checking time, with task counts and times per build phase")
+    parser.add_argument('--build-log-json', metavar='PATH',
+                        help="with --build-log, also write the analysis as JSON")
+    parser.add_argument('--build-log-top', type=int, default=10, metavar='N',
+                        help="with --build-log, list (and write to --build-log-json) the N slowest files' "
+                             "functions, expressions and warnings (default: 10)")
+    parser.add_argument('--audit-resources', action='store_true',
+                        help="hash the resources in chunks on a thread pool and report identical files, the "
+                             "largest ones and those over the spec's size budgets")
+    parser.add_argument('--audit-json', metavar='PATH',
+                        help="write the resource audit as JSON (implies --audit-resources)")
+    parser.add_argument('--audit-strict', action='store_true',
+                        help="exit 1 after generating when a resource is over its budget or the same content "
+                             "is bundled more than once (implies --audit-resources)")
+    parser.add_argument('--deps', action='store_true',
+                        help="don't generate; scan Swift imports and declarations and report file and "
+                             "module dependency cycles, suggested module cuts and per-target file counts")
+    parser.add_argument('--deps-depth', type=int, default=1, metavar='N',
+                        help="with --deps, treat each directory N levels below the source root as a module "
+                             "(default: 1)")
+    parser.add_argument('--deps-json', metavar='PATH',
+                        help="with --deps, also write the analysis as JSON")
+    parser.add_argument('--profile', action='store_true',
+                        help="print wall time, counts and bytes for each phase and pbxproj section")
+    parser.add_argument('--profile-json', metavar='PATH',
+                        help="write the per-phase profile as JSON")
+    parser.add_argument('--trace', metavar='PATH',
+                        help="write a Chrome trace-event file (open in chrome://tracing or Perfetto)")
+    parser.add_argument('--cprofile', metavar='PATH',
+                        help="run under cProfile, dump pstats to PATH and print the hottest functions "
+                             "(discovery threads are only covered with -j 1)")
+    args = parser.parse_args(argv)
+    if args.watch and (args.check or args.diff):
+        parser.error("--check and --diff don't write, so they can't be combined with --watch")
+    if args.watch and args.deps:
+        parser.error("--deps only reports, so it can't be combined with --watch")
+    if args.watch and args.build_log:
+        parser.error("--build-log only reports, so it can't be combined with --watch")
+    if args.audit_json or args.audit_strict:
+        args.audit_resources = True
+    return args
+
+def write_profile(args, profiler):
+    """Emit the --profile summary and the --profile-json / --trace files"""
+    if args.profile:
+        print("⏱️  Generation profile:")
+        for line in profiler.summary_lines():
+            print(line)
+        print()
+    for path, document in ((args.profile_json, profiler.report), (args.trace, profiler.trace)):
+        if path:
+            write_if_changed(path, json.dumps(document(), indent=1) + "\n")
+            print(f"📄 Profile written to {path}")
+
+def failure_reason(output):
+    """The one line worth showing from a run's captured output when it failed: its first error,
+    or which files would change"""
+    lines = [line.strip() for line in output.splitlines() if line.strip()]
+    for line in lines:
+        if line.startswith("❌"):
+            return line
+    for n, line in enumerate(lines):
+        if line.endswith("would change:"):
+            paths = [path.lstrip('• ') for path in lines[n + 1:]]
+            more = f" and {len(paths) - 5} more" if len(paths) > 5 else ""
+            return f"{line} {', '.join(paths[:5])}{more}"
+    return lines[-1] if lines else "❌ Generation failed"
+
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
+    if args.explain:
+        return explain_path("GreatFeelSwiftUI", args.explain)
+    if args.validate is not None:
+        return validate_projects(args.validate)
+    if args.build_log:
+        return analyze_build_logs(args)
+    # Queries for the build scripts: plain output, nothing generated
+    if args.build_status:
+        print(build_status(args.build_status))
+        return 0
+    if args.mark_built:
+        if not mark_built(args.mark_built):
+            print(f"❌ Error: {BUILD_MANIFEST_PATH} is missing; run the generator first")
+            return 1
+        return 0
+    profiler = Profiler(enabled=bool(args.profile or args.profile_json or args.trace))
+
+    if args.cprofile:
+        import cProfile
+        import pstats
+
+        hot = cProfile.Profile()
+        status = hot.runcall(generate, args, profiler)
+        hot.dump_stats(args.cprofile)
+        print(f"🔥 Hottest functions (cumulative time, full stats in {args.cprofile}):")
+        pstats.Stats(hot).sort_stats('cumulative').print_stats(15)
+    elif (args.check or args.quiet) and not args.diff:
+        # --check answers with its exit status; the progress output would only bury the reason
+        import io
+        captured = io.StringIO()
+        with contextlib.redirect_stdout(captured):
+            status = generate(args, profiler)
+        if status:
+            print(failure_reason(captured.getvalue()), file=sys.stderr)
+    else:
+        status = generate(args, profiler)
+
+    if profiler.enabled:
+        write_profile(args, profiler)
+
+    if args.watch and status == 0:
+        import project_watcher
+        return project_watcher.watch(args)
+    return status
+
+def generate(args, profiler):
+    """Scan the sources and write the project; the body of main() without profiling setup"""
     print("🔨 Generating Complete Xcode Project for GreatFeel SwiftUI")
     print("=" * 60)
     print()
@@ -570,55 +2979,261 @@ def main():
         print(f"   Current directory: {os.getcwd()}")
         return 1
 
-    # Find all Swift files
-    print("📁 Finding Swift files...")
-    swift_files = find_swift_files(base_path)
-    print(f"   Found {len(swift_files)} Swift files")
+    try:
+        with profiler.phase('load spec'):
+            spec = load_spec(args.spec)
+            if args.compile_timing is not None:
+                spec = with_compile_timing(spec, args.compile_timing)
+    except SpecError as e:
+        print(f"❌ Error: {e}")
+        return 1
+
+    # Find all Swift files and resources
+    print("📁 Finding Swift files and resources...")
+    with profiler.phase('discovery') as counts:
+        rules = load_scan_rules(base_path)
+        cache = None if args.no_cache else ScanCache.load(base_path, rules)
+        project_files = find_swift_files(base_path, args.jobs, cache, rules)
+        swift_count = sum(1 for name in project_files.values() if name.endswith('.swift'))
+        resource_count = len(project_files) - swift_count
+        counts.update(swift_files=swift_count, resources=resource_count)
+        if cache is not None:
+            counts.update(cached_dirs=cache.hits, listed_dirs=cache.misses)
+    with profiler.phase('directory index') as counts:
+        dir_index = build_directory_index(project_files)
+        counts['directories'] = len(dir_index)
+    print(f"   Found {swift_count} Swift files and {resource_count} resources")
+    if cache is not None and args.cache_stats:
+        stats = cache.stats()
+        note = " (cache invalidated)" if stats['invalidated'] else ""
+        print(f"   Scan cache: {stats['hits']}/{stats['directories']} directories cached "
+              f"({stats['hit_rate']:.0%} hit rate){note}")
     print()
 
-    # Create project directory
-    project_dir = "GreatFeelSwiftUI.xcodeproj"
-    if os.path.exists(project_dir):
+    # Targets with "roots" and modules with automatic dependencies need the Swift sources read
+    graph = None
+    if args.deps or needs_analysis(spec):
+        print("🔗 Scanning Swift imports and declarations...")
+        with profiler.phase('dependency scan') as counts:
+            scanned, graph = analyze_sources(base_path, project_files, args.jobs)
+            counts.update(files=len(scanned), edges=sum(len(deps) for deps in graph.values()))
+        try:
+            if args.deps:
+                return report_dependencies(args, spec, project_files, scanned, graph)
+            spec = derive_members(spec, project_files, graph)
+        except SpecError as e:
+            print(f"❌ Error: {e}")
+            return 1
+        for target in spec['targets']:
+            if target.get('members') is not None:
+                print(f"   {target['name']}: {len(target['members'])} Swift files needed by its roots")
+        print()
+
+    # single_copy changes what the targets bundle, so the resources are hashed for it even without an audit
+    audit_status = 0
+    if args.audit_resources or needs_resource_audit(spec):
+        print("📦 Hashing resources...")
+        with profiler.phase('resource audit') as counts:
+            sizes = resource_sizes(base_path, project_files)
+            previous = (load_build_manifest() or {}).get('files')
+            groups = duplicate_resources(base_path, project_files, sizes, args.jobs, previous)
+            spec, analysis = audit_resources(spec, project_files, sizes, groups)
+            counts.update(files=len(sizes), bytes=analysis['total_bytes'], duplicates=len(groups))
+        if args.audit_resources:
+            audit_status = report_resources(args, analysis)
+        omitted = sum(len(entry['omitted']) for entry in analysis['duplicates'])
+        if omitted and not args.audit_resources:
+            print(f"   {omitted} identical cop{'ies' if omitted != 1 else 'y'} left out of the Resources phases")
+        print()
+
+    project_dir = PROJECT_DIR
+    # Derived target members are part of the spec, so a changed import regenerates the project
+    settings = generator_settings(base_path, spec)
+    inputs = scan_inputs(project_files)
+
+    # Split modules into framework projects before anything is removed, so a bad plan leaves the old ones
+    shards = []
+    workspace = None
+    main_files = project_files
+    if spec.get('shards'):
+        workspace = f"{spec['shards'].get('workspace', spec['name'])}.xcworkspace"
+        try:
+            with profiler.phase('plan shards') as counts:
+                spec, main_files, shards = plan_shards(spec, dir_index, project_files, graph)
+                dir_index = build_directory_index(main_files)
+                counts['modules'] = len(shards)
+        except SpecError as e:
+            print(f"❌ Error: {e}")
+            return 1
+
+    dry_run = args.check or args.diff
+    if args.incremental and not dry_run:
+        with profiler.phase('manifest check') as counts:
+            counts['current'] = manifest_is_current(load_manifest(), settings, inputs)
+            # Not even a directory listing or a file's contents changed, so there is no state to save
+            counts['untouched'] = (counts['current'] and (cache is None or cache.unchanged()) and
+                                   (args.no_build_manifest or build_inputs_current(base_path, project_files, settings)))
+        if counts['untouched']:
+            # Return before saving anything: a no-op run rewrites no file
+            print("✅ Xcode project is up to date, nothing to do")
+            return audit_status
+        if counts['current']:
+            if cache is not None:
+                cache.save()
+            # The project can be current while file contents changed; the build still needs to know
+            record_build_inputs(args, base_path, project_files, settings, profiler)
+            print("✅ Xcode project is up to date, nothing to do")
+            return audit_status
+    elif os.path.exists(project_dir) and not args.merge and not dry_run:
         print(f"🗑️  Removing existing project: {project_dir}")
         import shutil
-        shutil.rmtree(project_dir)
+        with profiler.phase('remove project'):
+            shutil.rmtree(project_dir)
 
-    os.makedirs(project_dir, exist_ok=True)
-    os.makedirs(f"{project_dir}/project.xcworkspace", exist_ok=True)
-    os.makedirs(f"{project_dir}/project.xcworkspace/xcshareddata", exist_ok=True)
+    shard_futures = []
+    executor = None
+    if shards:
+        # Module projects are generated by a process pool alongside the app project
+        from concurrent.futures import ProcessPoolExecutor
 
-    # Generate project file
-    print("⚙️  Generating project.pbxproj...")
-    pbxproj_content = create_pbxproj(swift_files)
+        mode = 'diff' if args.diff else 'check' if args.check else 'write'
+        executor = ProcessPoolExecutor(max_workers=min(len(shards), args.jobs or os.cpu_count() or 1))
+        shard_futures = [executor.submit(build_shard, (shard['path'], shard['files'], shard['spec'], mode, args.merge))
+                         for shard in shards]
+        print(f"🧩 Generating {len(shards)} module projects in parallel: {', '.join(shard['name'] for shard in shards)}")
 
-    with open(f"{project_dir}/project.pbxproj", 'w') as f:
-        f.write(pbxproj_content)
-    print("   ✓ project.pbxproj created")
+    try:
+        # Generate project file
+        ids = IdAllocator(cache.id_memo if cache is not None else None)
+        target_ids = spec_target_ids(spec, ids)
+        pbxproj_path = f"{project_dir}/project.pbxproj"
+        merged = None
+        if args.merge and os.path.exists(pbxproj_path):
+            print("🔀 Merging into the existing project.pbxproj...")
+            from pbxproj_parser import PbxprojError
+            try:
+                with profiler.phase('merge') as counts:
+                    with open(pbxproj_path, encoding='utf-8') as f:
+                        existing = f.read()
+                    moved = project_files.keys() - main_files.keys()
+                    pbxproj_content, added, removed = merge_pbxproj(existing, main_files, ids, spec, base_path, moved)
+                    merged = pbxproj_content
+                    counts.update(added=len(added), removed=len(removed))
+            except PbxprojError as e:
+                print(f"❌ Error: can't merge into {pbxproj_path}: {e}")
+                print("   Run without --merge to regenerate it from scratch")
+                return 1
+            print(f"   +{len(added)} −{len(removed)} files, everything else left as it was")
+        else:
+            print("⚙️  Generating project.pbxproj...")
+            pbxproj_content = iter_pbxproj(main_files, dir_index, ids, spec, profiler)
 
-    # Generate workspace files
-    print("⚙️  Generating workspace files...")
-    contents, checks = create_workspace_files()
+        # Generate workspace files
+        print("⚙️  Generating workspace files...")
+        contents, checks = create_workspace_files()
 
-    with open(f"{project_dir}/project.xcworkspace/contents.xcworkspacedata", 'w') as f:
-        f.write(contents)
-    print("   ✓ contents.xcworkspacedata created")
+        outputs = {
+            pbxproj_path: pbxproj_content,
+            f"{project_dir}/project.xcworkspace/contents.xcworkspacedata": contents,
+            f"{project_dir}/project.xcworkspace/xcshareddata/IDEWorkspaceChecks.plist": checks,
+        }
+        # Schemes live in the project, so they are recreated with it; --merge keeps ones edited in Xcode
+        outputs.update(scheme_outputs(spec, target_ids, project_dir, merged))
+        if workspace:
+            projects = [project_dir] + [os.path.dirname(shard['path']) for shard in shards]
+            contents, checks = create_workspace_files(projects)
+            outputs[f"{workspace}/contents.xcworkspacedata"] = contents
+            outputs[f"{workspace}/xcshareddata/IDEWorkspaceChecks.plist"] = checks
 
-    with open(f"{project_dir}/project.xcworkspace/xcshareddata/IDEWorkspaceChecks.plist", 'w') as f:
-        f.write(checks)
-    print("   ✓ IDEWorkspaceChecks.plist created")
+        def shard_results():
+            from pbxproj_parser import PbxprojError
+            with profiler.phase('module projects', modules=len(shard_futures)) as counts:
+                try:
+                    results = [result for future in shard_futures for result in future.result()]
+                except PbxprojError as e:
+                    print(f"❌ Error: can't merge into a module project: {e}")
+                    print("   Run without --merge to regenerate it from scratch")
+                    return None
+                counts['changed'] = sum(1 for _, changed, _ in results if changed)
+            return results
+
+        if dry_run:
+            with profiler.phase('compare') as counts:
+                changed = report_changes(outputs, args.diff)
+                counts['changed'] = len(changed)
+            results = shard_results()
+            if results is None:
+                return 1
+            for path, differs, diff in results:
+                if differs:
+                    changed.append(path)
+                    sys.stdout.write(diff)
+            print()
+            if not changed:
+                print("✅ Xcode project is up to date")
+                return audit_status
+            print(f"⚠️  {len(changed)} file(s) would change:")
+            for path in changed:
+                print(f"   • {path}")
+            return 1
+
+        for path, content in outputs.items():
+            # The app project's files go by name; the shared workspace's by path, its names repeat them
+            label = os.path.basename(path) if path.startswith(project_dir + '/') else path
+            with profiler.phase(f"write {label}") as counts:
+                changed = write_if_changed(path, content)
+                counts.update(bytes=os.path.getsize(path), changed=changed)
+            if changed:
+                print(f"   ✓ {label} created")
+            else:
+                print(f"   ✓ {label} unchanged")
+        results = shard_results()
+        if results is None:
+            return 1
+        for path, changed, _ in results:
+            print(f"   ✓ {path} {'created' if changed else 'unchanged'}")
+    finally:
+        if executor is not None:
+            # Every path out of here waits for the pool: modules not started yet are cancelled
+            # and running ones finish, so no worker is still writing once generate() returns
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    output_paths = list(outputs) + [path for path, _, _ in results]
+    if not args.merge:
+        for path in stale_schemes(project_dir, outputs):
+            print(f"   🗑️  Removed {os.path.basename(path)} (no longer generated)")
+            os.remove(path)
+    stale = stale_projects((load_manifest() or {}).get('outputs') or {}, output_paths)
+    if stale:
+        import shutil
+        for path in stale:
+            print(f"   🗑️  Removed {path} (no longer generated)")
+            shutil.rmtree(path)
+        if args.merge:
+            print("   ⚠️  --merge keeps removed modules linked; run without --merge to unlink them")
+
+    with profiler.phase('save state'):
+        save_manifest(settings, inputs, output_paths)
+        if cache is not None:
+            cache.id_memo = ids.salted()
+            cache.save()
+    record_build_inputs(args, base_path, project_files, settings, profiler)
 
     print()
     print("✅ Xcode project generated successfully!")
     print()
     print("📊 Project Summary:")
-    print(f"   • {len(swift_files)} Swift files added")
-    print(f"   • All files added to build target")
+    print(f"   • {swift_count} Swift files added")
+    print(f"   • {resource_count} resources added")
+    print(f"   • {len(spec['targets'])} target(s) × {len(spec['configurations'])} configurations")
+    if workspace:
+        print(f"   • {len(shards)} module framework projects in {workspace}")
     print(f"   • Proper group structure created")
     print(f"   • iOS 16.0+ deployment target")
     print()
     print("🚀 Next steps:")
     print("   1. Open the project:")
-    print("      open GreatFeelSwiftUI.xcodeproj")
+    print(f"      open {workspace or project_dir}")
     print()
     print("   2. Select your team in Signing & Capabilities")
     print()
@@ -628,7 +3243,7 @@ def main():
     print()
     print("✨ The project is complete and ready to build!")
 
-    return 0
+    return audit_status
 
 if __name__ == "__main__":
     exit(main())
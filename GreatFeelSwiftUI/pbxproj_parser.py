@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+
+"""
+Parser and patch engine for Xcode project.pbxproj files
+Indexes objects by ID without tokenizing the whole file, and edits only the lines that change
+"""
+
+import re
+from bisect import bisect_right
+
+class PbxprojError(Exception):
+    """Raised when a project file can't be parsed or patched"""
+
+# OpenStep plist tokens: whitespace and comments (no group), quoted strings, punctuation, bare words
+TOKEN_RE = re.compile(r'''
+    \s+ | /\*.*?\*/ | //[^\n]*
+  | "((?:[^"\\]|\\.)*)"
+  | ([{}()=;,])
+  | ([^\s{}()=;,"]+)
+''', re.S | re.X)
+
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', '"': '"', '\\': '\\', "'": "'"}
+ESCAPE_RE = re.compile(r'\\(.)', re.S)
+
+# Xcode writes every object on a line of its own, two tabs deep, with isa as the first key;
+# nothing else in the file starts that way, so object boundaries come from one regex pass
+OBJECT_RE = re.compile(r'\n\t\t([0-9A-Za-z_]+) (?:/\*[^\n]*?\*/ )?= \{\s*isa = ([A-Za-z]+);')
+ROOT_RE = re.compile(r'\n\trootObject = ([0-9A-Za-z_]+)')
+SECTION_RE = re.compile(r'/\* Begin ([A-Za-z]+) section \*/\n')
+
+# One-line objects holding only scalars ("{isa = PBXBuildFile; fileRef = ID /* name */; };"), most of a
+# large project, are split into properties by one regex instead of the tokenizer
+SCALAR = r'([0-9A-Za-z_.]+) = ("(?:[^"\\\n]|\\.)*"|[^\s;{}()"]+)(?: /\*[^\n]*?\*/)?; '
+ONE_LINE_RE = re.compile(rf'\{{((?:{SCALAR})*)\}};\n?')
+SCALAR_RE = re.compile(SCALAR)
+
+def _unescape(value):
+    return ESCAPE_RE.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), value) if '\\' in value else value
+
+def _tokens(text, pos=0, endpos=None):
+    """Yield (is_punctuation, value) for every significant token in text[pos:endpos]"""
+    for m in TOKEN_RE.finditer(text, pos, len(text) if endpos is None else endpos):
+        kind = m.lastindex
+        if kind == 2:
+            yield True, m.group(2)
+        elif kind == 3:
+            yield False, m.group(3)
+        elif kind == 1:
+            yield False, _unescape(m.group(1))
+
+def _parse_value(tokens, token):
+    is_punct, value = token
+    if not is_punct:
+        return value
+    if value == '{':
+        result = {}
+        for is_punct, key in tokens:
+            if is_punct:
+                if key == '}':
+                    return result
+                raise PbxprojError(f"expected a key, found '{key}'")
+            if next(tokens) != (True, '='):
+                raise PbxprojError(f"expected '=' after '{key}'")
+            result[key] = _parse_value(tokens, next(tokens))
+            if next(tokens) != (True, ';'):
+                raise PbxprojError(f"expected ';' after the value of '{key}'")
+        raise PbxprojError("unterminated dictionary")
+    if value == '(':
+        result = []
+        for token in tokens:
+            if token == (True, ')'):
+                return result
+            result.append(_parse_value(tokens, token))
+            token = next(tokens)
+            if token == (True, ')'):
+                return result
+            if token != (True, ','):
+                raise PbxprojError(f"expected ',' in array, found '{token[1]}'")
+        raise PbxprojError("unterminated array")
+    raise PbxprojError(f"unexpected '{value}'")
+
+def parse(text, pos=0, endpos=None):
+    """Parse one plist value (normally the whole file) into dicts, lists and strings"""
+    tokens = _tokens(text, pos, endpos)
+    try:
+        return _parse_value(tokens, next(tokens))
+    except StopIteration:
+        raise PbxprojError("unexpected end of input") from None
+
+class PbxObject:
+    """One object in the objects dictionary; its properties are only parsed when asked for"""
+
+    __slots__ = ('project', 'id', 'isa', 'start', 'limit', '_end', '_props')
+
+    def __init__(self, project, object_id, isa, start, limit):
+        self.project = project
+        self.id = object_id
+        self.isa = isa
+        self.start = start    # offset of the object's first line
+        self.limit = limit    # where the next object (or the end of the objects dict) begins
+        self._end = None
+        self._props = None
+
+    @property
+    def end(self):
+        """Offset just past the object's closing "};" line"""
+        if self._end is None:
+            close = self.project.text.rfind('};', self.start, self.limit)
+            newline = self.project.text.find('\n', close)
+            self._end = newline + 1 if newline != -1 else close + 2
+        return self._end
+
+    @property
+    def text(self):
+        return self.project.text[self.start:self.end]
+
+    @property
+    def props(self):
+        """All properties as a dict, parsed on first access"""
+        if self._props is None:
+            text = self.project.text
+            opening = text.index('{', self.start)
+            m = ONE_LINE_RE.match(text, opening, self.end)
+            if m is not None and m.end() == self.end:
+                self._props = {key: _unescape(value[1:-1]) if value.startswith('"') else value
+                               for key, value in SCALAR_RE.findall(m.group(1))}
+            else:
+                self._props = parse(text, opening, self.end)
+        return self._props
+
+    def get(self, key):
+        """A top-level string property, found with one bounded regex search instead of a full parse"""
+        if self._props is not None:
+            return self._props.get(key)
+        m = self.project.scalar_re(key).search(self.project.text, self.start, self.end)
+        if m is None:
+            return None
+        value = m.group(1)
+        return _unescape(value[1:-1]) if value.startswith('"') else value
+
+    def list_bounds(self, key):
+        """(first entry offset, closing line offset) of a multi-line list property, or None"""
+        found = self.project._list_bounds
+        bounds = found.get((self.id, key), False)
+        if bounds is not False:
+            return bounds
+        text = self.project.text
+        opener = f"\n\t\t\t{key} = (\n"
+        at = text.find(opener, self.start, self.end)
+        if at != -1:
+            first = at + len(opener)
+            close = text.find("\n\t\t\t);", first - 1, self.end)
+            if close == -1:
+                raise PbxprojError(f"unterminated '{key}' list in {self.id}")
+            bounds = first, close + 1
+        else:
+            bounds = None
+        # A phase's list can hold every file in the project; patching it entry by entry
+        # shouldn't search the whole list again each time
+        found[(self.id, key)] = bounds
+        return bounds
+
+    def list_ids(self, key):
+        """Object IDs listed in a multi-line list property, in order"""
+        bounds = self.list_bounds(key)
+        if bounds is None:
+            return []
+        return self.project.LIST_ENTRY_RE.findall(self.project.text, *bounds)
+
+    def list_entries(self, key):
+        """(entry ID, line offset) for each entry of a multi-line list property"""
+        bounds = self.list_bounds(key)
+        if bounds is None:
+            return []
+        return [(m.group(1), m.start()) for m in self.project.LIST_ENTRY_RE.finditer(self.project.text, *bounds)]
+
+class PbxProject:
+    """A project.pbxproj indexed by object ID
+
+    Only the object boundaries and isas are found up front (one regex pass over the
+    file); properties are read lazily. This relies on the canonical layout Xcode
+    writes, which is also what makes line-level patching safe.
+    """
+
+    LIST_ENTRY_RE = re.compile(r'^\t\t\t\t([0-9A-Za-z_]+)', re.M)
+
+    def __init__(self, text, strict=True):
+        self.text = text
+        self.objects = {}
+        self.duplicates = []  # (object ID, isa) of repeated IDs; only without strict, which raises instead
+        self._scalar_res = {}
+        self._values_res = {}
+        self._list_bounds = {}  # (object ID, key) -> list_bounds(); the text never changes
+        self._sections = {}     # isa -> section_bounds()
+
+        objects_at = text.find("\tobjects = {\n")
+        root = ROOT_RE.search(text)
+        if objects_at == -1 or root is None:
+            raise PbxprojError("not a project.pbxproj (no objects dictionary or rootObject)")
+        objects_end = root.start()
+
+        matches = list(OBJECT_RE.finditer(text, objects_at, objects_end))
+        if not matches:
+            raise PbxprojError("no objects in Xcode's layout found; open and save the project in Xcode first")
+        limits = [m.start() + 1 for m in matches[1:]] + [objects_end]
+        for m, limit in zip(matches, limits):
+            object_id = m.group(1)
+            if object_id in self.objects:
+                if strict:
+                    raise PbxprojError(f"duplicate object ID {object_id}")
+                self.duplicates.append((object_id, m.group(2)))
+                continue
+            self.objects[object_id] = PbxObject(self, object_id, m.group(2), m.start() + 1, limit)
+
+        self.root_id = root.group(1)
+        if self.root_id not in self.objects:
+            raise PbxprojError(f"rootObject {self.root_id} is not defined")
+        self.objects_end = text.rfind('\n\t};', objects_at, objects_end) + 1
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(f.read())
+
+    @property
+    def root(self):
+        return self.objects[self.root_id]
+
+    def objects_of(self, isa):
+        return [obj for obj in self.objects.values() if obj.isa == isa]
+
+    def values(self, isa, key):
+        """{object ID: value} of a top-level string property across isa's section
+
+        One findall over the section, so the work stays inside the regex engine; much
+        cheaper than calling get() on every object when a whole section is needed.
+        """
+        bounds = self.section_bounds(isa)
+        if bounds is None:
+            return {}
+        pattern = self._values_res.get(key)
+        if pattern is None:
+            # One-line objects: the key follows "{" or "; " on the same line. Multi-line objects:
+            # skip lines three tabs deep (nested values are deeper still) until the key's own line
+            pattern = re.compile(
+                rf'\n\t\t([0-9A-Za-z_]+) (?:/\*[^\n]*?\*/ )?= \{{(?:[^\n]*?(?:\{{|; )|\n(?:\t\t\t[^\n]*\n)*?\t\t\t)'
+                rf'{re.escape(key)} = ("(?:[^"\\\n]|\\.)*"|[^\s;]+)(?: /\*[^\n]*?\*/)?;')
+            self._values_res[key] = pattern
+        start, end = bounds
+        return {object_id: _unescape(value[1:-1]) if value.startswith('"') else value
+                for object_id, value in pattern.findall(self.text, start - 1, end)}
+
+    def scalar_re(self, key):
+        """Regex for a top-level "key = value;" in either one-line or multi-line objects"""
+        pattern = self._scalar_res.get(key)
+        if pattern is None:
+            pattern = re.compile(rf'(?:\n\t\t\t|\{{|; ){re.escape(key)} = ("(?:[^"\\\n]|\\.)*"|[^\s;]+)(?: /\*[^\n]*?\*/)?;')
+            self._scalar_res[key] = pattern
+        return pattern
+
+    def section_bounds(self, isa):
+        """(offset after the Begin marker, offset of the End marker) for isa's section, or None"""
+        if isa not in self._sections:
+            begin = self.text.find(f"/* Begin {isa} section */\n")
+            if begin == -1:
+                self._sections[isa] = None
+            else:
+                end = self.text.find(f"/* End {isa} section */", begin)
+                self._sections[isa] = begin + len(f"/* Begin {isa} section */\n"), end
+        return self._sections[isa]
+
+class Patch:
+    """Line-level edits against a PbxProject, applied in a single pass over the text
+
+    Removed objects take every edit inside them along; everything not edited is
+    copied through byte for byte, so hand-made changes survive.
+    """
+
+    def __init__(self, project):
+        self.project = project
+        self.edits = []        # (start, end, object ID or "", sequence, replacement)
+        self.new_sections = {}  # isa -> [object text]
+        self._members = {}      # isa -> sorted [(object ID, offset)] of existing objects
+
+    def _edit(self, start, end=None, replacement="", object_id=""):
+        """Replace text[start:end], or insert at start when end is None
+
+        Insertions at one offset go in object ID order, then in the order they were made.
+        """
+        self.edits.append((start, start if end is None else end, object_id, len(self.edits), replacement))
+
+    def remove_object(self, object_id):
+        obj = self.project.objects[object_id]
+        self._edit(obj.start, obj.end)
+
+    def add_object(self, isa, object_id, object_text):
+        """Insert an object (its full text, newline-terminated) at its ID's place in isa's section
+
+        Sections Xcode wrote are sorted by ID, so new objects land where Xcode would put
+        them and the diff stays confined to the added lines.
+        """
+        bounds = self.project.section_bounds(isa)
+        if bounds is None:
+            self.new_sections.setdefault(isa, []).append(object_text)
+            return
+        members = self._members.get(isa)
+        if members is None:
+            members = self._members[isa] = sorted((obj.id, obj.start) for obj in self.project.objects_of(isa))
+        at = bisect_right(members, (object_id,))
+        self._edit(members[at][1] if at < len(members) else bounds[1], None, object_text, object_id)
+
+    def remove_list_entry(self, object_id, key, entry_id):
+        obj = self.project.objects[object_id]
+        bounds = obj.list_bounds(key)
+        if bounds is None:
+            return False
+        text = self.project.text
+        at = text.find(f"\t\t\t\t{entry_id} ", bounds[0] - 1, bounds[1])
+        if at == -1:
+            at = text.find(f"\t\t\t\t{entry_id},", bounds[0] - 1, bounds[1])
+        if at == -1:
+            return False
+        self._edit(at, text.index('\n', at) + 1)
+        return True
+
+    def add_list_entry(self, object_id, key, entry_line, at=None):
+        """Insert a newline-terminated entry line into a multi-line list property,
+        before the entry line at offset at (from list_entries), or at the end"""
+        bounds = self.project.objects[object_id].list_bounds(key)
+        if bounds is None:
+            raise PbxprojError(f"{object_id} has no multi-line '{key}' list")
+        self._edit(bounds[1] if at is None else at, None, entry_line)
+
+    def _section_edits(self):
+        """Create sections that don't exist yet, in the alphabetical order Xcode keeps them in"""
+        text = self.project.text
+        markers = [(m.group(1), m.start()) for m in SECTION_RE.finditer(text)]
+        for isa, objects in self.new_sections.items():
+            at = next((start for name, start in markers if name > isa), self.project.objects_end)
+            block = f"/* Begin {isa} section */\n{''.join(sorted(objects))}/* End {isa} section */\n\n"
+            self._edit(at, None, block)
+
+    def apply(self):
+        """Return the patched text"""
+        self._section_edits()
+        text = self.project.text
+        pieces = []
+        cursor = 0
+        for start, end, _, _, replacement in sorted(self.edits):
+            if start < cursor:
+                continue  # inside an object that is being removed
+            pieces.append(text[cursor:start])
+            pieces.append(replacement)
+            cursor = end
+        pieces.append(text[cursor:])
+        return ''.join(pieces)
+
+    def __bool__(self):
+        return bool(self.edits or self.new_sections)
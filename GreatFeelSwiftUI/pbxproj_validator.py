@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+
+"""
+Structural validator for project.pbxproj files
+Walks the object graph once and reports what would make Xcode or xcodebuild fail, without either
+"""
+
+import os
+
+from pbxproj_parser import PbxProject, PbxprojError
+
+FILE_ISAS = frozenset(('PBXFileReference', 'PBXVariantGroup', 'XCVersionGroup', 'PBXReferenceProxy'))
+GROUP_ISAS = frozenset(('PBXGroup', 'PBXVariantGroup', 'XCVersionGroup'))
+TARGET_ISAS = frozenset(('PBXNativeTarget', 'PBXAggregateTarget', 'PBXLegacyTarget'))
+BUILD_PHASE_ISAS = frozenset(('PBXSourcesBuildPhase', 'PBXResourcesBuildPhase', 'PBXFrameworksBuildPhase',
+                              'PBXCopyFilesBuildPhase', 'PBXHeadersBuildPhase', 'PBXShellScriptBuildPhase'))
+CONFIGURATION_LIST = frozenset(('XCConfigurationList',))
+
+# isa -> {key: isas the object it names may have}; list values are checked entry by entry
+REFERENCES = {
+    'PBXProject': {'mainGroup': GROUP_ISAS, 'productRefGroup': GROUP_ISAS, 'targets': TARGET_ISAS,
+                   'buildConfigurationList': CONFIGURATION_LIST},
+    'PBXGroup': {'children': FILE_ISAS | GROUP_ISAS},
+    'PBXVariantGroup': {'children': FILE_ISAS},
+    'XCVersionGroup': {'children': FILE_ISAS, 'currentVersion': FILE_ISAS},
+    'PBXBuildFile': {'fileRef': FILE_ISAS, 'productRef': frozenset(('XCSwiftPackageProductDependency',))},
+    'PBXNativeTarget': {'buildConfigurationList': CONFIGURATION_LIST, 'buildPhases': BUILD_PHASE_ISAS,
+                        'dependencies': frozenset(('PBXTargetDependency',)),
+                        'productReference': frozenset(('PBXFileReference',))},
+    'PBXAggregateTarget': {'buildConfigurationList': CONFIGURATION_LIST, 'buildPhases': BUILD_PHASE_ISAS,
+                           'dependencies': frozenset(('PBXTargetDependency',))},
+    'PBXTargetDependency': {'target': TARGET_ISAS, 'targetProxy': frozenset(('PBXContainerItemProxy',))},
+    'PBXContainerItemProxy': {'containerPortal': frozenset(('PBXProject', 'PBXFileReference'))},
+    'PBXReferenceProxy': {'remoteRef': frozenset(('PBXContainerItemProxy',))},
+    'XCConfigurationList': {'buildConfigurations': frozenset(('XCBuildConfiguration',))},
+    'XCBuildConfiguration': {'baseConfigurationReference': FILE_ISAS},
+}
+for _isa in BUILD_PHASE_ISAS:
+    REFERENCES[_isa] = {'files': frozenset(('PBXBuildFile',))}
+REFERENCE_ITEMS = {isa: tuple(keys.items()) for isa, keys in REFERENCES.items()}
+
+def validate(text, project_root=None):
+    """Every structural problem in a project.pbxproj as (object ID, path or name, message)
+
+    One pass over the objects parses each of them and checks the objects it names
+    exist and have a fitting isa, while recording which group holds each file and
+    which phase builds each build file; the group tree is then walked once from
+    mainGroup. With project_root (the directory holding the .xcodeproj), file
+    references are also resolved and checked on disk.
+    """
+    try:
+        project = PbxProject(text, strict=False)
+    except PbxprojError as e:
+        return [('', '', str(e))]
+    objects = project.objects
+    issues = [(object_id, isa, "object ID is used more than once") for object_id, isa in project.duplicates]
+
+    props = {}
+    parents = {}    # file or group ID -> groups listing it
+    phases = {}     # build file ID -> build phases listing it
+    owners = {}     # build phase ID -> target running it
+    for object_id, obj in objects.items():
+        try:
+            p = props[object_id] = obj.props
+        except PbxprojError as e:
+            issues.append((object_id, obj.isa, f"can't be parsed: {e}"))
+            props[object_id] = {}
+            continue
+        for key, allowed in REFERENCE_ITEMS.get(obj.isa, ()):
+            value = p.get(key)
+            if value is None:
+                continue
+            listed = isinstance(value, list)
+            seen = set() if listed else None
+            for ref in value if listed else (value,):
+                target = objects.get(ref)
+                if target is None:
+                    issues.append((object_id, None, f"{key} names {ref}{comment_of(text, ref)}, which doesn't exist"))
+                    continue
+                if target.isa not in allowed:
+                    issues.append((object_id, None, f"{key} names {ref}, a {target.isa}"))
+                    continue
+                if listed:
+                    if ref in seen:
+                        issues.append((object_id, None, f"{key} lists {ref} more than once"))
+                        continue
+                    seen.add(ref)
+                if key == 'children':
+                    parents.setdefault(ref, []).append(object_id)
+                elif key == 'files':
+                    phases.setdefault(ref, []).append(object_id)
+                elif key == 'buildPhases':
+                    owners[ref] = object_id
+
+        if obj.isa == 'PBXBuildFile' and 'fileRef' not in p and 'productRef' not in p:
+            issues.append((object_id, None, "builds nothing (no fileRef or productRef)"))
+        elif obj.isa == 'PBXFileReference' and not p.get('path') and not p.get('name'):
+            issues.append((object_id, None, "has no path"))
+        elif obj.isa == 'XCConfigurationList':
+            names = [props_of(objects, ref).get('name') for ref in p.get('buildConfigurations', ())]
+            default = p.get('defaultConfigurationName')
+            if default is not None and default not in names:
+                issues.append((object_id, None, f"default configuration {default} is not in the list"))
+        elif obj.isa == 'PBXContainerItemProxy' and p.get('containerPortal') == project.root_id:
+            remote = objects.get(p.get('remoteGlobalIDString'))
+            if remote is None or remote.isa not in TARGET_ISAS:
+                issues.append((object_id, None, f"remoteGlobalIDString {p.get('remoteGlobalIDString')} "
+                                                f"is not a target of this project"))
+
+    root = props.get(project.root_id, {})
+    if project.root.isa != 'PBXProject':
+        issues.append((project.root_id, None, f"rootObject is a {project.root.isa}, not a PBXProject"))
+    main_group = root.get('mainGroup')
+
+    # Walk the group tree once from mainGroup, resolving where each group and file is on disk (None
+    # without project_root or outside the checkout); paths for reports are only built when needed
+    disk_paths = {}
+    if main_group in objects:
+        base = project_root
+        if base is not None and root.get('projectDirPath'):
+            base = os.path.join(base, root['projectDirPath'])
+        disk_paths[main_group] = base
+        pending = [main_group]
+        while pending:
+            group_id = pending.pop()
+            disk = disk_paths[group_id]
+            for child in props[group_id].get('children', ()):
+                if child in disk_paths or child not in objects:
+                    continue  # listed twice (reported below) or dangling (reported above)
+                p = props[child]
+                tree = p.get('sourceTree', '<group>')
+                if project_root is None:
+                    disk_paths[child] = None
+                elif tree == '<group>':
+                    disk_paths[child] = os.path.join(disk, p.get('path', '')) if disk is not None else None
+                elif tree == 'SOURCE_ROOT':
+                    disk_paths[child] = os.path.join(project_root, p.get('path', ''))
+                elif tree == '<absolute>':
+                    disk_paths[child] = p.get('path')
+                else:
+                    disk_paths[child] = None  # BUILT_PRODUCTS_DIR, SDKROOT and the like
+                if objects[child].isa in GROUP_ISAS:
+                    pending.append(child)
+
+    orphans = []
+    for object_id, obj in objects.items():
+        if obj.isa in FILE_ISAS or obj.isa in GROUP_ISAS:
+            holders = parents.get(object_id, ())
+            if object_id == main_group:
+                if holders:
+                    issues.append((object_id, None, "mainGroup is inside another group"))
+            elif not holders:
+                orphans.append(object_id)
+            elif len(holders) > 1:
+                issues.append((object_id, None, f"is in {len(holders)} groups: {', '.join(holders)}"))
+            elif object_id not in disk_paths:
+                issues.append((object_id, None, "is in a group that isn't reachable from mainGroup"))
+            elif obj.isa == 'PBXFileReference':
+                disk = disk_paths[object_id]
+                if disk is not None and not os.path.exists(disk):
+                    issues.append((object_id, None, f"points at {disk}, which doesn't exist"))
+        elif obj.isa == 'PBXBuildFile':
+            in_phases = phases.get(object_id, ())
+            if not in_phases:
+                issues.append((object_id, None, "is in no build phase"))
+            elif len(in_phases) > 1:
+                issues.append((object_id, None, f"is in {len(in_phases)} build phases: {', '.join(in_phases)}"))
+        elif obj.isa in BUILD_PHASE_ISAS:
+            seen = set()
+            for build_file in props[object_id].get('files', ()):
+                ref = props_of(objects, build_file).get('fileRef')
+                if ref in seen:
+                    issues.append((object_id, None, f"builds {ref} more than once"))
+                elif ref is not None:
+                    seen.add(ref)
+
+    if orphans:
+        built = {}  # file ID -> phases building it
+        for build_file, in_phases in phases.items():
+            built.setdefault(props[build_file].get('fileRef'), set()).update(in_phases)
+        products = {p.get('productReference') for object_id, p in props.items() if objects[object_id].isa in TARGET_ISAS}
+        for object_id in orphans:
+            if object_id in built:
+                names = sorted(phase_name(phase, objects, props, owners) for phase in built[object_id])
+                issues.append((object_id, None, f"is in no group, yet built by {', '.join(names)}"))
+            elif object_id not in products:
+                # Xcode keeps products in the Products group, but outside one they're harmless
+                issues.append((object_id, None, "is in no group"))
+
+    return [(object_id, where or describe(object_id, objects, props, parents, owners), message)
+            for object_id, where, message in issues]
+
+def comment_of(text, object_id):
+    """" (name)" from the comment Xcode writes after a reference to object_id, for IDs with no object"""
+    at = text.find(f"{object_id} /* ")
+    if at == -1:
+        return ""
+    start = at + len(object_id) + 4
+    end = text.find(" */", start)
+    return f" ({text[start:end]})" if end != -1 else ""
+
+def props_of(objects, object_id):
+    """Properties of an object, or {} if it doesn't exist or can't be parsed"""
+    obj = objects.get(object_id)
+    if obj is None:
+        return {}
+    try:
+        return obj.props
+    except PbxprojError:
+        return {}
+
+def phase_name(phase_id, objects, props, owners):
+    """A build phase as Xcode shows it: "<target> Sources", or the phase's own name for copy and script phases"""
+    name = props.get(phase_id, {}).get('name') or objects[phase_id].isa[len('PBX'):-len('BuildPhase')]
+    target = props.get(owners.get(phase_id), {}).get('name')
+    return f"{target} {name}" if target else name
+
+def display_path(object_id, props, parents):
+    """A group's or file's path for reports, following its first parent up to mainGroup"""
+    parts = []
+    seen = set()
+    while object_id is not None and object_id not in seen:
+        seen.add(object_id)
+        p = props.get(object_id, {})
+        if p.get('path'):
+            parts.append(p['path'])
+        tree = p.get('sourceTree', '<group>')
+        if tree != '<group>':
+            if tree not in ('SOURCE_ROOT', '<absolute>'):
+                parts.append(f"$({tree})")
+            break
+        holders = parents.get(object_id)
+        object_id = holders[0] if holders else None
+    return '/'.join(reversed(parts))
+
+def describe(object_id, objects, props, parents, owners):
+    """Where an object is, for reports: its path, the file it builds, or its name"""
+    obj = objects.get(object_id)
+    if obj is None:
+        return ''
+    p = props.get(object_id, {})
+    if obj.isa in FILE_ISAS or obj.isa in GROUP_ISAS:
+        return display_path(object_id, props, parents) or p.get('name') or obj.isa
+    ref = p.get('fileRef')
+    if ref is not None:
+        return f"{display_path(ref, props, parents) or ref} (build file)"
+    if obj.isa in BUILD_PHASE_ISAS:
+        return phase_name(object_id, objects, props, owners)
+    return p.get('name') or p.get('path') or obj.isa
+
+def validate_file(path):
+    """validate() for the project.pbxproj at path, resolving file references next to its .xcodeproj"""
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    return validate(text, os.path.dirname(os.path.dirname(os.path.abspath(path))))
@@ -0,0 +1,444 @@
+#!/usr/bin/env python3
+
+"""
+Importable API for the Xcode project generator
+Generates projects in-process from a source tree on disk, in memory or in a tarball, into any of the same
+"""
+
+import io
+import os
+import posixpath
+import time
+
+import generate_xcode_project as gen
+
+def tree_path(path):
+    """path as a key of an in-memory tree: '/'-separated, relative to its root, '' for the root itself"""
+    path = posixpath.normpath(path.replace(os.sep, '/')).lstrip('/')
+    return '' if path == '.' else path
+
+class TreeEntry:
+    """One name in an in-memory directory listing, shaped like the os.DirEntry fields the scanner reads"""
+
+    __slots__ = ('name', 'directory', 'symlink')
+
+    def __init__(self, name, directory=False, symlink=False):
+        self.name = name
+        self.directory = directory
+        self.symlink = symlink
+
+    def is_dir(self):
+        return self.directory
+
+    def is_symlink(self):
+        return self.symlink
+
+class DiskSource:
+    """A source tree on disk below root, scanned the way main() scans it"""
+
+    def __init__(self, root='.'):
+        self.root = root
+
+    def is_dir(self, path):
+        return os.path.isdir(os.path.join(self.root, path))
+
+    def read_text(self, path):
+        """The file at path as text, or None if it can't be read"""
+        try:
+            with open(os.path.join(self.root, path), encoding='utf-8', errors='replace') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def ignore_dirs(self, base_path):
+        """Directories whose .gitignore applies to base_path, relative to root; root stands in for the
+        current directory outside a git repository"""
+        return [os.path.relpath(directory, self.root)
+                for directory in gen.ignore_file_dirs(os.path.join(self.root, base_path), self.root)]
+
+    def find_files(self, base_path, rules, workers=None):
+        return gen.find_swift_files(os.path.join(self.root, base_path), workers, None, rules)
+
+    def analyze(self, base_path, project_files, workers=None):
+        return gen.analyze_sources(os.path.join(self.root, base_path), project_files, workers)
+
+    def resource_sizes(self, base_path, project_files):
+        return gen.resource_sizes(os.path.join(self.root, base_path), project_files)
+
+    def hash_files(self, base_path, paths, workers=None):
+        return gen.hash_resources(os.path.join(self.root, base_path), paths, workers)
+
+class TreeSource:
+    """A source tree held as a directory index; subclasses say where file contents come from
+
+    The index is built once from the tree's paths and walked with the scanner's own
+    classify_entries, so ignore rules, bundles and symlinks are treated as on disk.
+    """
+
+    def __init__(self, paths, dirs=(), symlinks=()):
+        self.index = {'': {}}  # directory -> {name: TreeEntry}
+        for path in dirs:
+            self._add(tree_path(path), TreeEntry(None, directory=True))
+        symlinks = {tree_path(path) for path in symlinks}
+        for path in paths:
+            path = tree_path(path)
+            self._add(path, TreeEntry(None, symlink=path in symlinks))
+
+    def _add(self, path, entry):
+        """Add entry at path along with any parent directories not seen yet"""
+        while path:
+            parent, _, entry.name = path.rpartition('/')
+            listing = self.index.get(parent)
+            if listing is None:
+                listing = self.index[parent] = {}
+            elif entry.name in listing:
+                return
+            listing[entry.name] = entry
+            if entry.directory:
+                self.index.setdefault(path, {})
+            path = parent
+            entry = TreeEntry(None, directory=True)
+
+    def _read(self, path):
+        """The bytes or text of the file at path (a tree_path), or None"""
+        raise NotImplementedError
+
+    def _size(self, path):
+        """The size in bytes of the file at path (a tree_path)"""
+        raise NotImplementedError
+
+    def is_dir(self, path):
+        return tree_path(path) in self.index
+
+    def read_text(self, path):
+        """The file at path as text, or None if the tree has no such file"""
+        data = self._read(tree_path(path))
+        if isinstance(data, bytes):
+            return data.decode('utf-8', errors='replace')
+        return data
+
+    def ignore_dirs(self, base_path):
+        """Directories whose .gitignore applies to base_path: from the nearest one holding .git,
+        else the tree's root, down to base_path"""
+        dirs = []
+        directory = tree_path(base_path)
+        while True:
+            dirs.append(directory)
+            if '.git' in self.index.get(directory, ()):
+                return dirs[::-1]
+            if not directory:
+                break
+            directory = directory.rpartition('/')[0]
+        return [directory for directory in dirs[::-1] if directory in ('', tree_path(base_path))]
+
+    def find_files(self, base_path, rules, workers=None):
+        """find_swift_files() for the tree: {path relative to base_path: name}, sorted by path"""
+        base = tree_path(base_path)
+        found = []
+        pending = ['']
+        while pending:
+            rel_dir = pending.pop()
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            directory = posixpath.join(base, rel_dir) if rel_dir else base
+            file_names, subdir_names = gen.classify_entries(prefix, self.index.get(directory, {}).values(), rules)
+            found.extend((prefix + name, name) for name in file_names)
+            pending.extend(prefix + name for name in subdir_names)
+        found.sort()
+        return dict(found)
+
+    def analyze(self, base_path, project_files, workers=None):
+        """analyze_sources() for the tree, in-process: (scan, file dependency graph)"""
+        import swift_deps
+
+        base = tree_path(base_path)
+        scanned = {}
+        for path in project_files:
+            if path.endswith('.swift'):
+                text = self.read_text(posixpath.join(base, path))
+                scanned[path] = swift_deps.scan_source(text or '')
+        return scanned, swift_deps.build_graph(scanned)
+
+    def resource_sizes(self, base_path, project_files):
+        """resource_sizes() for the tree: {path: bytes}, a bundle counting as each file inside it"""
+        base = tree_path(base_path)
+        start = len(base) + 1 if base else 0  # where a tree path's part below base_path begins
+        sizes = {}
+        for path in gen.resource_paths(project_files):
+            full_path = posixpath.join(base, path) if base else path
+            if full_path not in self.index:
+                sizes[path] = self._size(full_path)
+                continue
+            pending = [full_path]
+            while pending:
+                directory = pending.pop()
+                for name, entry in sorted(self.index[directory].items()):
+                    file_path = f"{directory}/{name}"
+                    if entry.directory:
+                        pending.append(file_path)
+                    else:
+                        sizes[file_path[start:]] = self._size(file_path)
+        return sizes
+
+    def hash_files(self, base_path, paths, workers=None):
+        """hash_resources() for the tree, in-process: {path: content hash}"""
+        import hashlib
+
+        base = tree_path(base_path)
+        hashes = {}
+        for path in paths:
+            data = self._read(posixpath.join(base, path) if base else path)
+            if data is None:
+                continue
+            if isinstance(data, str):
+                data = data.encode('utf-8')
+            hashes[path] = hashlib.blake2b(data, digest_size=16).hexdigest()
+        return hashes
+
+class MemorySource(TreeSource):
+    """A source tree in memory: {path: text or bytes}; directories are implied by the paths"""
+
+    def __init__(self, files):
+        self.files = {tree_path(path): content for path, content in files.items()}
+        super().__init__(self.files)
+
+    def _read(self, path):
+        return self.files.get(path)
+
+    def _size(self, path):
+        data = self.files[path]
+        return len(data.encode('utf-8') if isinstance(data, str) else data)
+
+class TarSource(TreeSource):
+    """A source tree in a tarball (any compression tarfile reads), below root inside the archive
+
+    archive is a path or a binary file object; members are listed once and read when needed.
+    """
+
+    def __init__(self, archive, root=''):
+        import tarfile
+
+        if isinstance(archive, (str, os.PathLike)):
+            self.tar = tarfile.open(archive, 'r:*')
+        else:
+            self.tar = tarfile.open(fileobj=archive, mode='r:*')
+        root = tree_path(root)
+        self.members = {}
+        dirs = []
+        symlinks = []
+        for member in self.tar.getmembers():
+            path = tree_path(member.name)
+            if root:
+                if not path.startswith(root + '/'):
+                    continue
+                path = path[len(root) + 1:]
+            if member.isdir():
+                dirs.append(path)
+            else:
+                self.members[path] = member
+                if member.issym():
+                    symlinks.append(path)
+        super().__init__(self.members, dirs, symlinks)
+
+    def _read(self, path):
+        member = self.members.get(path)
+        if member is None or not member.isfile():
+            return None
+        return self.tar.extractfile(member).read()
+
+    def _size(self, path):
+        return self.members[path].size
+
+    def close(self):
+        self.tar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class DiskOutput:
+    """Writes outputs below root, leaving files that already hold the same bytes untouched"""
+
+    def __init__(self, root='.'):
+        self.root = root
+
+    def write(self, path, content):
+        """Write content (text, or an iterable of text chunks) to path; whether the file changed"""
+        return gen.write_if_changed(os.path.join(self.root, path), content)
+
+class MemoryOutput:
+    """Keeps outputs in memory: files is {path: text}"""
+
+    def __init__(self):
+        self.files = {}
+
+    def write(self, path, content):
+        if not isinstance(content, str):
+            content = ''.join(content)
+        changed = self.files.get(path) != content
+        self.files[path] = content
+        return changed
+
+class TarOutput:
+    """Writes outputs as members of a new tarball, a path or a binary file object
+
+    mode is a tarfile write mode ('w', 'w:gz', ...); close() it (or use it as a context
+    manager) to finish the archive. Every member is new, so every write is a change.
+    """
+
+    def __init__(self, target, mode='w', mtime=None):
+        import tarfile
+
+        self._tarfile = tarfile
+        if isinstance(target, (str, os.PathLike)):
+            self.tar = tarfile.open(target, mode)
+        else:
+            self.tar = tarfile.open(fileobj=target, mode=mode)
+        self.mtime = time.time() if mtime is None else mtime
+
+    def write(self, path, content):
+        if not isinstance(content, str):
+            content = ''.join(content)
+        data = content.encode('utf-8')
+        info = self._tarfile.TarInfo(tree_path(path))
+        info.size = len(data)
+        info.mtime = self.mtime
+        info.mode = 0o644
+        self.tar.addfile(info, io.BytesIO(data))
+        return True
+
+    def close(self):
+        self.tar.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+class ProjectGenerator:
+    """Generates the Xcode project for one source tree in-process, printing nothing
+
+    source is a DiskSource (the current directory by default), MemorySource or TarSource;
+    base_path is the source root inside it. The tree is scanned, and its Swift sources
+    analyzed if a spec needs that, once on first use; every spec generated afterwards
+    reuses the scan, so many variants of a project cost one. Specs are dicts shaped like
+    project_spec.json, DEFAULT_SPEC by default; bad ones raise SpecError.
+
+    --merge, --incremental, the scan cache and the manifests are left to main(): they
+    exist to carry state on disk from one run to the next, which an output backend can't.
+    """
+
+    def __init__(self, source=None, spec=None, base_path="GreatFeelSwiftUI", project_dir=gen.PROJECT_DIR,
+                 compile_timing=None, workers=None):
+        self.source = DiskSource() if source is None else source
+        self.spec = spec
+        self.base_path = base_path
+        self.project_dir = project_dir
+        self.compile_timing = compile_timing
+        self.workers = workers
+        self._files = None
+        self._dir_index = None
+        self._graph = None
+        self._resources = None
+
+    @property
+    def project_files(self):
+        """The scanned files: {path relative to base_path: name}, sorted by path"""
+        if self._files is None:
+            if not self.source.is_dir(self.base_path):
+                raise FileNotFoundError(f"source directory '{self.base_path}' not found")
+            rules = gen.load_scan_rules(self.base_path, source=self.source)
+            self._files = self.source.find_files(self.base_path, rules, self.workers)
+            self._dir_index = gen.build_directory_index(self._files)
+        return self._files
+
+    @property
+    def graph(self):
+        """The Swift files' dependency graph, analyzed on first use"""
+        if self._graph is None:
+            self._graph = self.source.analyze(self.base_path, self.project_files, self.workers)[1]
+        return self._graph
+
+    @property
+    def resources(self):
+        """(sizes, groups of identical content) for the tree's resources, hashed on first use"""
+        if self._resources is None:
+            import resource_audit
+
+            project_files = self.project_files
+            sizes = self.source.resource_sizes(self.base_path, project_files)
+            groups = resource_audit.duplicates(
+                sizes, lambda paths: self.source.hash_files(self.base_path, paths, self.workers),
+                gen.catalog_metadata(sizes, project_files))
+            self._resources = sizes, groups
+        return self._resources
+
+    def prepare(self, spec=None):
+        """The spec as generated: checked, with compile timing flags, target members derived from
+        roots and, with single_copy, identical resources left out"""
+        spec = self._derive(spec)
+        if gen.needs_resource_audit(spec):
+            spec = gen.audit_resources(spec, self.project_files, *self.resources)[0]
+        return spec
+
+    def audit(self, spec=None):
+        """The resource audit for the spec, as --audit-json writes it"""
+        return gen.audit_resources(self._derive(spec), self.project_files, *self.resources)[1]
+
+    def _derive(self, spec):
+        """The spec checked, with compile timing flags and derived members: everything but single_copy"""
+        spec = spec if spec is not None else self.spec
+        if spec is None:
+            spec = gen.DEFAULT_SPEC
+        else:
+            gen.check_spec(spec)
+        if self.compile_timing is not None:
+            spec = gen.with_compile_timing(spec, self.compile_timing)
+        if gen.needs_analysis(spec):
+            spec = gen.derive_members(spec, self.project_files, self.graph)
+        return spec
+
+    def outputs(self, spec=None):
+        """Every file the spec generates: {path: text or a one-shot iterator of text chunks}
+
+        Paths are relative to the output root, as main() writes them to the current
+        directory. Module projects are generated here too, one after the other.
+        """
+        spec = self.prepare(spec)
+        project_files = self.project_files
+        dir_index = self._dir_index
+        main_files = project_files
+        graph = self._graph if gen.needs_analysis(spec) else None
+        shards = []
+        workspace = None
+        if spec.get('shards'):
+            workspace = f"{spec['shards'].get('workspace', spec['name'])}.xcworkspace"
+            spec, main_files, shards = gen.plan_shards(spec, dir_index, project_files, graph)
+            dir_index = gen.build_directory_index(main_files)
+
+        ids = gen.IdAllocator()
+        target_ids = gen.spec_target_ids(spec, ids)
+        contents, checks = gen.create_workspace_files()
+        outputs = {
+            f"{self.project_dir}/project.pbxproj": gen.iter_pbxproj(main_files, dir_index, ids, spec),
+            f"{self.project_dir}/project.xcworkspace/contents.xcworkspacedata": contents,
+            f"{self.project_dir}/project.xcworkspace/xcshareddata/IDEWorkspaceChecks.plist": checks,
+        }
+        outputs.update(gen.scheme_outputs(spec, target_ids, self.project_dir))
+        if workspace:
+            projects = [self.project_dir] + [os.path.dirname(shard['path']) for shard in shards]
+            contents, checks = gen.create_workspace_files(projects)
+            outputs[f"{workspace}/contents.xcworkspacedata"] = contents
+            outputs[f"{workspace}/xcshareddata/IDEWorkspaceChecks.plist"] = checks
+        for shard in shards:
+            shard_ids = gen.IdAllocator()
+            shard_target_ids = gen.spec_target_ids(shard['spec'], shard_ids)
+            outputs[shard['path']] = gen.iter_pbxproj(shard['files'], None, shard_ids, shard['spec'])
+            outputs.update(gen.scheme_outputs(shard['spec'], shard_target_ids, os.path.dirname(shard['path'])))
+        return outputs
+
+    def generate(self, output, spec=None):
+        """Write the spec's outputs through output (DiskOutput, MemoryOutput, TarOutput): {path: changed}"""
+        return {path: output.write(path, content) for path, content in self.outputs(spec).items()}
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+
+"""
+Watch mode for the Xcode project generator
+Keeps the scanned tree and object IDs in memory and patches project.pbxproj when files are added, removed or renamed
+"""
+
+import os
+import sys
+import time
+import errno
+import select
+import struct
+
+import generate_xcode_project as gen
+
+# Quiet period that ends a burst of changes, and the longest a burst may delay an update
+DEBOUNCE_SECONDS = 0.15
+MAX_BATCH_SECONDS = 2.0
+
+# Polling fallback: the interval doubles while nothing changes and drops back on activity
+POLL_MIN_SECONDS = 0.1
+POLL_MAX_SECONDS = 2.0
+
+# Returned by a change source when it lost track (inotify queue overflow): rescan everything
+RESCAN_ALL = None
+
+class SourceTree:
+    """In-memory listing of every scanned directory, refreshed one directory at a time"""
+
+    def __init__(self, base_path, rules):
+        self.base_path = base_path
+        self.rules = rules
+        self.listings = {}  # rel_dir -> (mtime_ns, [(rel_path, name)], [subdir rel paths])
+        self.racy = set()
+        self.files = {}
+
+    def _list(self, rel_dir):
+        """List rel_dir from disk, or return None if it no longer exists"""
+        try:
+            mtime_ns = os.stat(os.path.join(self.base_path, rel_dir)).st_mtime_ns
+        except OSError:
+            return None
+        files, subdirs = gen.scan_directory(self.base_path, rel_dir, self.rules)
+        # A change within the same mtime tick as this listing would go unnoticed by polling
+        if mtime_ns >= time.time_ns() - gen.RACY_WINDOW_NS:
+            self.racy.add(rel_dir)
+        else:
+            self.racy.discard(rel_dir)
+        return mtime_ns, files, subdirs
+
+    def _drop(self, rel_dir, removed):
+        """Forget rel_dir and everything below it"""
+        listing = self.listings.pop(rel_dir, None)
+        self.racy.discard(rel_dir)
+        if listing is None:
+            return
+        for path, _ in listing[1]:
+            if self.files.pop(path, None) is not None:
+                removed.append(path)
+        for sub in listing[2]:
+            self._drop(sub, removed)
+
+    def refresh(self, rel_dirs=RESCAN_ALL):
+        """Re-list the given directories (all of them for RESCAN_ALL), returning (added, removed) paths"""
+        if rel_dirs is RESCAN_ALL:
+            rel_dirs = set(self.listings) | {''}
+        added = []
+        removed = []
+        pending = sorted(rel_dirs)
+        while pending:
+            rel_dir = pending.pop()
+            if rel_dir and rel_dir not in self.listings and rel_dir.rpartition('/')[0] not in self.listings:
+                continue  # parent was dropped or never scanned; the parent's refresh covers it
+            old = self.listings.get(rel_dir)
+            new = self._list(rel_dir)
+            if new is None:
+                self._drop(rel_dir, removed)
+                continue
+            self.listings[rel_dir] = new
+
+            old_files = dict(old[1]) if old else {}
+            new_files = dict(new[1])
+            for path in old_files.keys() - new_files.keys():
+                del self.files[path]
+                removed.append(path)
+            for path in new_files.keys() - old_files.keys():
+                self.files[path] = new_files[path]
+                added.append(path)
+
+            old_subdirs = set(old[2]) if old else set()
+            for sub in old_subdirs - set(new[2]):
+                self._drop(sub, removed)
+            # New subdirectories are scanned now; known ones only when they change themselves
+            pending.extend(set(new[2]) - old_subdirs)
+        return added, removed
+
+    def changed_dirs(self):
+        """Directories whose mtime moved (or that were listed too recently to trust), for polling"""
+        changed = set(self.racy)
+        for rel_dir, listing in self.listings.items():
+            try:
+                mtime_ns = os.stat(os.path.join(self.base_path, rel_dir)).st_mtime_ns
+            except OSError:
+                changed.add(rel_dir)
+                continue
+            if mtime_ns != listing[0]:
+                changed.add(rel_dir)
+        return changed
+
+    def project_files(self):
+        """The scanned files in find_swift_files order: {rel_path: name}, sorted by path"""
+        return dict(sorted(self.files.items()))
+
+    def store(self, cache):
+        """Replace the scan cache's listings with this tree's, so saving the cache keeps every
+        directory a later run can reuse; listings too recent to trust are left out as in a scan"""
+        cache.dirs = {}
+        cache.started_ns = time.time_ns()
+        for rel_dir, (mtime_ns, files, subdirs) in self.listings.items():
+            if rel_dir not in self.racy:
+                cache.store(rel_dir, mtime_ns, [name for _, name in files],
+                            [sub.rpartition('/')[2] for sub in subdirs])
+
+class PollingSource:
+    """Change source that stats every known directory, backing off while the tree is idle"""
+
+    name = "polling"
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.interval = POLL_MIN_SECONDS
+
+    def sync(self, rel_dirs):
+        return set()
+
+    def wait(self, timeout=None):
+        """Block until directories change (or timeout passes) and return them"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            delay = self.interval
+            if deadline is not None:
+                delay = max(0.0, min(delay, deadline - time.monotonic()))
+            time.sleep(delay)
+            changed = self.tree.changed_dirs()
+            if changed:
+                self.interval = POLL_MIN_SECONDS
+                return changed
+            self.interval = min(self.interval * 2, POLL_MAX_SECONDS)
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+
+    def close(self):
+        pass
+
+class InotifySource:
+    """Change source backed by Linux inotify, called through ctypes; one watch per directory"""
+
+    name = "inotify"
+
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_DONT_FOLLOW = 0x02000000
+    IN_EXCL_UNLINK = 0x04000000
+    # Only directory entry changes matter; edits inside Swift files never touch the pbxproj
+    MASK = (IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF |
+            IN_ONLYDIR | IN_DONT_FOLLOW | IN_EXCL_UNLINK)
+    EVENT = struct.Struct('iIII')
+
+    def __init__(self, tree):
+        import ctypes
+        import ctypes.util
+
+        self.tree = tree
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # wd -> rel_dir
+        self.dirs = {}     # rel_dir -> wd
+
+    def sync(self, rel_dirs):
+        """Watch exactly rel_dirs, returning the directories that were newly added"""
+        import ctypes
+
+        for rel_dir in set(self.dirs) - set(rel_dirs):
+            wd = self.dirs.pop(rel_dir)
+            self.watches.pop(wd, None)
+            self.libc.inotify_rm_watch(self.fd, wd)
+
+        added = set()
+        for rel_dir in set(rel_dirs) - set(self.dirs):
+            path = os.path.join(self.tree.base_path, rel_dir).encode()
+            wd = self.libc.inotify_add_watch(self.fd, path, self.MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    raise OSError(err, "inotify watch limit reached (raise fs.inotify.max_user_watches)")
+                continue  # directory vanished since it was listed; its parent's event covers it
+            self.watches[wd] = rel_dir
+            self.dirs[rel_dir] = wd
+            added.add(rel_dir)
+        return added
+
+    def wait(self, timeout=None):
+        """Block until events arrive (or timeout passes) and return the directories they touched"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+                offset += self.EVENT.size + length
+                if mask & self.IN_Q_OVERFLOW:
+                    return RESCAN_ALL
+                if mask & self.IN_IGNORED:
+                    rel_dir = self.watches.pop(wd, None)
+                    if rel_dir is not None and self.dirs.get(rel_dir) == wd:
+                        del self.dirs[rel_dir]
+                    continue
+                rel_dir = self.watches.get(wd)
+                if rel_dir is not None:
+                    changed.add(rel_dir)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+def open_source(tree, polling=False):
+    """inotify where available, the adaptive poller everywhere else (macOS included)"""
+    if not polling and sys.platform.startswith('linux'):
+        try:
+            return InotifySource(tree)
+        except (OSError, AttributeError) as e:
+            print(f"   ⚠️  inotify unavailable ({e}), falling back to polling")
+    return PollingSource(tree)
+
+def collect_batch(source):
+    """Wait for a change, then keep collecting until the tree has been quiet for DEBOUNCE_SECONDS"""
+    changed = source.wait()
+    deadline = time.monotonic() + MAX_BATCH_SECONDS
+    while changed is not RESCAN_ALL and time.monotonic() < deadline:
+        more = source.wait(DEBOUNCE_SECONDS)
+        if more is RESCAN_ALL:
+            return RESCAN_ALL
+        if not more:
+            break
+        changed |= more
+    return changed
+
+def watch(args):
+    """Run until interrupted, rewriting the project whenever the scanned file set changes"""
+    base_path = "GreatFeelSwiftUI"
+    spec = gen.load_spec(args.spec)
+    if args.compile_timing is not None:
+        spec = gen.with_compile_timing(spec, args.compile_timing)
+    settings = gen.generator_settings(base_path, spec)
+    pbxproj_path = f"{gen.PROJECT_DIR}/project.pbxproj"
+    outputs = [
+        pbxproj_path,
+        f"{gen.PROJECT_DIR}/project.xcworkspace/contents.xcworkspacedata",
+        f"{gen.PROJECT_DIR}/project.xcworkspace/xcshareddata/IDEWorkspaceChecks.plist",
+    ]
+
+    # IDs stay in memory for the whole session, seeded with the salted IDs the last run memoized,
+    # so a file that is removed and re-added gets its old ID back
+    rules = gen.load_scan_rules(base_path)
+    cache = None if args.no_cache else gen.ScanCache.load(base_path, rules)
+    ids = gen.IdAllocator(cache.id_memo if cache is not None else None)
+    profiler = gen.Profiler(enabled=False)
+
+    tree = SourceTree(base_path, rules)
+    source = open_source(tree, args.watch_poll)
+    tree.refresh()
+    for new_dir in source.sync(tree.listings):
+        tree.refresh({new_dir})
+    print(f"👀 Watching {base_path}/ for added, removed and renamed files ({source.name}, Ctrl-C to stop)")
+
+    try:
+        while True:
+            changed = collect_batch(source)
+            start = time.perf_counter()
+            added, removed = tree.refresh(changed)
+            # Directories that appeared are watched now and re-listed once, catching files
+            # created inside them before the watch existed
+            for new_dir in source.sync(tree.listings):
+                more_added, more_removed = tree.refresh({new_dir})
+                added += more_added
+                removed += more_removed
+            if not added and not removed:
+                continue
+
+            project_files = tree.project_files()
+            dir_index = gen.build_directory_index(project_files)
+            main_spec, main_files, shards = spec, project_files, []
+            graph = None
+            try:
+                # Added files may be needed by a target's roots; edits to existing files are
+                # picked up by the next full run
+                if gen.needs_analysis(spec):
+                    _, graph = gen.analyze_sources(base_path, project_files, args.jobs)
+                    main_spec = gen.derive_members(spec, project_files, graph)
+                    settings = gen.generator_settings(base_path, main_spec)
+                if gen.needs_resource_audit(spec):
+                    # An added resource may duplicate one the targets already bundle
+                    sizes = gen.resource_sizes(base_path, project_files)
+                    groups = gen.duplicate_resources(base_path, project_files, sizes, args.jobs)
+                    main_spec = gen.audit_resources(main_spec, project_files, sizes, groups)[0]
+                    settings = gen.generator_settings(base_path, main_spec)
+                if spec.get('shards'):
+                    # Files may have moved between modules, or a "/*" module directory appeared: re-plan.
+                    # Module projects are small, so they are regenerated here rather than by a process
+                    # pool per batch, and write_if_changed leaves the untouched ones alone
+                    main_spec, main_files, shards = gen.plan_shards(main_spec, dir_index, project_files, graph)
+            except gen.SpecError as e:
+                print(f"   ❌ Can't apply the spec: {e}")
+                continue
+            if shards:
+                dir_index = gen.build_directory_index(main_files)
+            target_ids = gen.spec_target_ids(main_spec, ids)
+            merged = None
+            content = None
+            # Each batch patches the project the last one wrote, so edits made in Xcode meanwhile
+            # survive; without --merge an unreadable project is regenerated instead
+            if os.path.exists(pbxproj_path):
+                from pbxproj_parser import PbxprojError
+                try:
+                    with open(pbxproj_path, encoding='utf-8') as f:
+                        content, _, _ = gen.merge_pbxproj(f.read(), main_files, ids, main_spec, base_path,
+                                                          project_files.keys() - main_files.keys())
+                    merged = content
+                    for shard in shards:
+                        gen.build_shard((shard['path'], shard['files'], shard['spec'], 'write', True))
+                except PbxprojError as e:
+                    if args.merge:
+                        print(f"   ❌ Can't merge into {pbxproj_path}: {e}")
+                        continue
+                    print(f"   ⚠️  Can't merge into {pbxproj_path} ({e}), regenerating it")
+                    content = merged = None
+            if content is None:
+                content = gen.iter_pbxproj(main_files, dir_index, ids, main_spec)
+                for shard in shards:
+                    gen.build_shard((shard['path'], shard['files'], shard['spec'], 'write', False))
+            written = gen.write_if_changed(pbxproj_path, content)
+            schemes = gen.scheme_outputs(main_spec, target_ids, gen.PROJECT_DIR, merged)
+            for path, xml in schemes.items():
+                gen.write_if_changed(path, xml)
+            if shards:
+                workspace = f"{spec['shards'].get('workspace', spec['name'])}.xcworkspace"
+                projects = [gen.PROJECT_DIR] + [os.path.dirname(shard['path']) for shard in shards]
+                gen.write_if_changed(f"{workspace}/contents.xcworkspacedata", gen.create_workspace_files(projects)[0])
+            gen.save_manifest(settings, gen.scan_inputs(project_files),
+                              outputs + list(schemes) + [shard['path'] for shard in shards])
+            # Builds decide between clean and incremental from the build manifest, so it follows every batch
+            gen.record_build_inputs(args, base_path, project_files, settings, profiler)
+            elapsed = (time.perf_counter() - start) * 1000
+            status = "updated" if written else "unchanged"
+            print(f"🔄 +{len(added)} −{len(removed)} files, project.pbxproj {status} in {elapsed:.0f} ms")
+    except KeyboardInterrupt:
+        print()
+        print("👋 Stopped watching")
+    finally:
+        source.close()
+        if cache is not None:
+            tree.store(cache)
+            cache.id_memo = ids.salted()
+            cache.save()
+    return 0
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Resource audit for the generated project
+Finds resources with identical content and resources over their size budgets, for reports CI can gate on
+"""
+
+import heapq
+
+def duplicates(sizes, digest, ignore=()):
+    """Groups of resources with identical content: [(bytes, hash, sorted paths)], most bytes wasted first
+
+    sizes is {path: bytes}; digest(paths) returns {path: content hash} and only gets
+    the files that share their size with another, since no other file can have a
+    copy. Empty files and the paths in ignore are never reported.
+    """
+    by_size = {}
+    for path, size in sizes.items():
+        if size and path not in ignore:
+            by_size.setdefault(size, []).append(path)
+    candidates = [path for paths in by_size.values() if len(paths) > 1 for path in paths]
+    hashes = digest(candidates) if candidates else {}
+
+    groups = {}
+    for path in sorted(candidates):
+        content_hash = hashes.get(path)
+        if content_hash is not None:
+            groups.setdefault((sizes[path], content_hash), []).append(path)
+    return sorted(((size, content_hash, paths) for (size, content_hash), paths in groups.items() if len(paths) > 1),
+                  key=lambda group: (-group[0] * (len(group[2]) - 1), group[2][0]))
+
+def report(sizes, groups, omitted=(), budget_of=None, total_budget=None, limit=None):
+    """Machine-readable audit: totals, resources over budget, identical copies and the largest
+    resources (the limit largest; all of them without a limit)
+
+    omitted are the copies left out of every Resources phase (the spec's single_copy) and
+    count against no budget; budget_of(path) returns (bytes, rule) or (None, None). The
+    audit is ok when nothing bundled is over budget and no content is bundled twice.
+    """
+    omitted = set(omitted)
+    total = sum(sizes.values())
+    bundled = total - sum(sizes[path] for path in omitted if path in sizes)
+
+    over_budget = []
+    if budget_of is not None:
+        for path, size in sizes.items():
+            if path in omitted:
+                continue  # not bundled, so it costs nothing
+            budget, rule = budget_of(path)
+            if budget is not None and size > budget:
+                over_budget.append({'path': path, 'bytes': size, 'budget': budget, 'rule': rule})
+    over_budget.sort(key=lambda entry: (entry['budget'] - entry['bytes'], entry['path']))
+
+    copies = []
+    for size, content_hash, paths in groups:
+        left_out = [path for path in paths if path in omitted]
+        copies.append({'bytes': size, 'hash': content_hash, 'paths': paths, 'omitted': left_out,
+                       'wasted_bytes': size * max(0, len(paths) - len(left_out) - 1)})
+    copies.sort(key=lambda entry: (-entry['wasted_bytes'], -entry['bytes'], entry['paths'][0]))
+    wasted = sum(entry['wasted_bytes'] for entry in copies)
+
+    order = lambda item: (-item[1], item[0])
+    largest = sorted(sizes.items(), key=order) if limit is None else heapq.nsmallest(limit, sizes.items(), key=order)
+    over_total = total_budget is not None and bundled > total_budget
+
+    return {
+        'ok': not over_budget and not over_total and not wasted,
+        'resources': len(sizes),
+        'total_bytes': total,
+        'bundled_bytes': bundled,
+        'max_total_bytes': total_budget,
+        'over_total': over_total,
+        'wasted_bytes': wasted,
+        'over_budget': over_budget,
+        'duplicates': copies,
+        'largest': [{'path': path, 'bytes': size} for path, size in largest],
+    }
+
+def format_bytes(size):
+    """Byte count for people, in the decimal units Finder and the App Store use: "2.2 MB", "63 B" """
+    for unit, scale in (('GB', 10**9), ('MB', 10**6), ('KB', 10**3)):
+        if size >= scale:
+            return f"{size / scale:.1f} {unit}"
+    return f"{size} B"
+
+def report_lines(analysis, limit=10):
+    """Human-readable summary of report(), at most limit entries per list"""
+    lines = [f"   {analysis['resources']} resource files, {format_bytes(analysis['total_bytes'])}"]
+    if analysis['bundled_bytes'] != analysis['total_bytes']:
+        lines[0] += f" ({format_bytes(analysis['bundled_bytes'])} bundled after single_copy)"
+    if analysis['max_total_bytes'] is not None:
+        state = "over" if analysis['over_total'] else "within"
+        lines.append(f"   Bundled resources are {state} the {format_bytes(analysis['max_total_bytes'])} budget")
+    if analysis['largest']:
+        lines.append("   Largest:")
+        for entry in analysis['largest'][:limit]:
+            lines.append(f"      {format_bytes(entry['bytes']):>10}  {entry['path']}")
+    if analysis['over_budget']:
+        lines.append(f"   Over budget: {len(analysis['over_budget'])}")
+        for entry in analysis['over_budget'][:limit]:
+            lines.append(f"      {format_bytes(entry['bytes']):>10}  {entry['path']} "
+                         f"(budget {format_bytes(entry['budget'])} from {entry['rule']})")
+    if analysis['duplicates']:
+        lines.append(f"   Identical content: {len(analysis['duplicates'])} group(s), "
+                     f"{format_bytes(analysis['wasted_bytes'])} bundled more than once")
+        for entry in analysis['duplicates'][:limit]:
+            lines.append(f"      {format_bytes(entry['bytes']):>10}  × {len(entry['paths'])}: "
+                         f"{', '.join(entry['paths'])}")
+            if entry['omitted']:
+                lines.append(f"{'':>18}left out by single_copy: {', '.join(entry['omitted'])}")
+    else:
+        lines.append("   No identical resources")
+    return lines
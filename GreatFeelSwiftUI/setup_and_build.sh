@@ -38,8 +38,18 @@ if [ -d "GreatFeelSwiftUI.xcodeproj" ]; then
     rm -rf GreatFeelSwiftUI.xcodeproj
 fi
 
+# COMPILE_TIMING=1 adds Swift type-checking timers to Debug builds; Step 4 then ranks the slowest code
+GENERATOR_FLAGS=""
+if [ -n "$COMPILE_TIMING" ]; then
+    GENERATOR_FLAGS="--compile-timing"
+fi
+# RESOURCE_AUDIT=1 writes resource_audit.json and stops here if a resource is over its budget or bundled twice
+if [ -n "$RESOURCE_AUDIT" ]; then
+    GENERATOR_FLAGS="$GENERATOR_FLAGS --audit-json resource_audit.json --audit-strict"
+fi
+
 if command -v python3 &> /dev/null; then
-    python3 generate_xcode_project.py
+    python3 generate_xcode_project.py $GENERATOR_FLAGS
 else
     echo -e "${RED}❌ Error: Python 3 not found${NC}"
     echo "Please install Python 3 to generate the project"
@@ -51,6 +61,18 @@ if [ ! -d "GreatFeelSwiftUI.xcodeproj" ]; then
     exit 1
 fi
 
+# Dangling references or files missing from groups fail here in milliseconds, not after xcodebuild
+if ! python3 generate_xcode_project.py --validate; then
+    echo -e "${RED}❌ Error: The generated project is inconsistent (see above)${NC}"
+    exit 1
+fi
+
+# clean, incremental or none: what changed since the last successful build by this script
+BUILD_NEEDED=$(python3 generate_xcode_project.py --build-status setup)
+if [ -n "$FULL_BUILD" ]; then
+    BUILD_NEEDED="clean"
+fi
+
 echo ""
 echo -e "${GREEN}✅ Project generated successfully!${NC}"
 echo ""
@@ -99,22 +121,36 @@ echo ""
 BUILD_LOG="build_log.txt"
 BUILD_SUCCESS=false
 
-echo "   🔨 Running xcodebuild (this may take a minute)..."
-echo ""
-
-if xcodebuild -project GreatFeelSwiftUI.xcodeproj \
-    -scheme GreatFeelSwiftUI \
-    -destination 'platform=iOS Simulator,name=iPhone 15 Pro' \
-    clean build \
-    CODE_SIGN_IDENTITY="" \
-    CODE_SIGNING_REQUIRED=NO \
-    CODE_SIGNING_ALLOWED=NO \
-    > "$BUILD_LOG" 2>&1; then
+# Settings changed: clean build. Only sources or resources changed: incremental build.
+# Nothing changed since the last successful build (FULL_BUILD=1 overrides): no build at all.
+if [ "$BUILD_NEEDED" = "none" ] && [ -f "$BUILD_LOG" ]; then
     BUILD_SUCCESS=true
-    echo -e "${GREEN}✅ Build succeeded!${NC}"
+    echo -e "   ${GREEN}✓${NC} Nothing changed since the last successful build, skipping xcodebuild"
 else
-    echo -e "${YELLOW}⚠️  Build completed with errors/warnings${NC}"
-    echo "   (This is expected - signing needs to be configured)"
+    BUILD_ACTIONS="build"
+    if [ "$BUILD_NEEDED" = "clean" ]; then
+        BUILD_ACTIONS="clean build"
+    fi
+
+    echo "   🔨 Running xcodebuild $BUILD_ACTIONS (this may take a minute)..."
+    echo ""
+
+    if xcodebuild -project GreatFeelSwiftUI.xcodeproj \
+        -scheme GreatFeelSwiftUI \
+        -destination 'platform=iOS Simulator,name=iPhone 15 Pro' \
+        $BUILD_ACTIONS \
+        -showBuildTimingSummary \
+        CODE_SIGN_IDENTITY="" \
+        CODE_SIGNING_REQUIRED=NO \
+        CODE_SIGNING_ALLOWED=NO \
+        > "$BUILD_LOG" 2>&1; then
+        BUILD_SUCCESS=true
+        python3 generate_xcode_project.py --mark-built setup > /dev/null
+        echo -e "${GREEN}✅ Build succeeded!${NC}"
+    else
+        echo -e "${YELLOW}⚠️  Build completed with errors/warnings${NC}"
+        echo "   (This is expected - signing needs to be configured)"
+    fi
 fi
 
 echo ""
@@ -141,6 +177,11 @@ else
     echo "   Build log saved to: $BUILD_LOG"
 fi
 
+if [ -n "$COMPILE_TIMING" ]; then
+    echo ""
+    python3 generate_xcode_project.py --build-log "$BUILD_LOG" --build-log-json build_timing.json
+fi
+
 echo ""
 
 # Step 5: Summary and Next Steps
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+
+"""
+Dependency scanner for Swift sources
+Tokenizes each file just far enough to find its imports, its declarations (file scope and extensions) and the
+names it mentions, and turns that into a file-level dependency graph without parsing Swift
+"""
+
+import os
+import re
+
+# Everything the scanner cares about in one alternation; the first group that matched says which.
+# String literals are skipped whole (an interpolation's closing quote may end one early, which at
+# worst turns a few string characters into identifiers), block comments are handed to
+# _skip_block_comment because Swift lets them nest.
+TOKEN_RE = re.compile(r'''
+    (//[^\n]*)
+  | (/\*)
+  | (\#*"""[\s\S]*?"""\#*)
+  | (\#+"(?:[^"\n]|"(?!\#))*"\#+ | "(?:[^"\\\n]|\\.)*")
+  | ([{}])
+  | (\.\s*)?(`?[A-Za-z_][A-Za-z0-9_]*`?)
+''', re.X)
+COMMENT_MARK_RE = re.compile(r'/\*|\*/')
+
+# Keywords that start a top-level declaration, and the kinds an import may name before the module
+DECLARATION_KEYWORDS = frozenset(('class', 'struct', 'enum', 'protocol', 'actor', 'typealias',
+                                  'func', 'let', 'var', 'macro'))
+IMPORT_KINDS = frozenset(('typealias', 'struct', 'class', 'enum', 'protocol', 'let', 'var', 'func'))
+
+# Words that never name a declaration in another file, dropped so workers send back less
+KEYWORDS = frozenset('''
+    actor any as associatedtype async await break case catch class continue convenience default
+    defer deinit didSet do dynamic else enum extension fallthrough false fileprivate final for func
+    get guard if import in indirect infix init inout internal is isolated lazy let mutating nil
+    nonisolated nonmutating open operator optional override postfix precedencegroup prefix private
+    protocol public repeat required rethrows return self Self set some static struct subscript super
+    switch throw throws true try typealias unowned var weak where while willSet
+'''.split())
+
+# Below this many files the process pool costs more to start than it saves
+PARALLEL_MIN_FILES = 512
+
+def _skip_block_comment(text, pos):
+    """Index just past the (possibly nested) block comment whose "/*" ends at pos"""
+    depth = 1
+    for m in COMMENT_MARK_RE.finditer(text, pos):
+        depth += 1 if m.group() == '/*' else -1
+        if depth == 0:
+            return m.end()
+    return len(text)
+
+def tokens(text):
+    """Yield (brace depth, token, is member access) for every brace and identifier outside
+    comments and string literals, in one pass over text"""
+    depth = 0
+    pos = 0
+    end = len(text)
+    search = TOKEN_RE.search
+    while pos < end:
+        m = search(text, pos)
+        if m is None:
+            return
+        pos = m.end()
+        kind = m.lastindex
+        if kind == 2:
+            pos = _skip_block_comment(text, pos)
+        elif kind == 5:
+            if m.group(5) == '{':
+                yield depth, '{', False
+                depth += 1
+            else:
+                depth = max(depth - 1, 0)
+                yield depth, '}', False
+        elif kind == 7:
+            yield depth, m.group(7).strip('`'), m.group(6) is not None
+
+def scan_source(text):
+    """Imports, declarations and used names of one Swift file
+
+    Returns (imports, declarations, references, accessed, extensions): module names in
+    import order, names declared at file scope (types, typealiases, functions, constants
+    and variables), every other non-keyword name the file uses, the names it uses after
+    a dot, and {type it extends: (members, names)} for types declared elsewhere. A file
+    needs such an extension if it uses one of the members declared directly in its body
+    after a dot (colorScheme.isDark), or references one of the names: the first argument
+    label of each of its initializers ("hex" for Color(hex:)), or the type itself for an
+    initializer without a label or a subscript, since nothing else gives those away.
+    Names the file declares at any depth are left out of accessed: self.placeholder in a
+    view with its own placeholder property doesn't use another file's View.placeholder.
+    """
+    imports = []
+    declarations = []
+    extensions = {}
+    references = set()
+    accessed = set()
+    local = set()  # every name declared in the file, members and locals included
+    declaring = False
+    expect = None  # 'import', 'import kind', 'declaration', 'extension' or None: what the next top-level word is
+    extended = None  # the type whose extension body depth-1 words are in, or that the next top-level brace opens
+    in_extension = False
+    for depth, token, member in tokens(text):
+        if token == '{' or token == '}':
+            if token == '{' and depth == 0:
+                in_extension = expect != 'extension' and extended is not None
+            elif token == '}' and depth == 0:
+                extended = None
+                in_extension = False
+            expect = None
+            declaring = False
+            continue
+        if member:
+            if token not in KEYWORDS:
+                accessed.add(token)
+            continue
+        if declaring and token not in KEYWORDS:
+            local.add(token)
+        declaring = token in DECLARATION_KEYWORDS
+        if depth:
+            if depth == 1 and in_extension:
+                members, names = extensions[extended]
+                if expect == 'declaration':
+                    expect = None
+                    if token not in KEYWORDS:
+                        members.append(token)
+                        continue
+                elif expect == 'init':
+                    expect = None
+                    names.append(extended if token in KEYWORDS or token == '_' else token)
+                if token in DECLARATION_KEYWORDS:
+                    expect = 'declaration'
+                    continue
+                if token == 'init':
+                    expect = 'init'
+                    continue
+                if token == 'subscript':
+                    names.append(extended)
+            if token not in KEYWORDS:
+                references.add(token)
+            continue
+        if expect == 'import':
+            if token in IMPORT_KINDS:
+                expect = 'import kind'
+                continue
+            imports.append(token)
+            expect = None
+            continue
+        if expect == 'import kind':
+            imports.append(token)
+            expect = None
+            continue
+        if expect == 'extension':
+            expect = None
+            extended = token
+            extensions.setdefault(token, ([], []))
+            # The extended type is still used, so the file keeps depending on where it's declared
+            references.add(token)
+            continue
+        if expect == 'declaration':
+            expect = None
+            if token not in KEYWORDS:
+                declarations.append(token)
+                continue
+        if token == 'import':
+            expect = 'import'
+        elif token == 'extension':
+            expect = 'extension'
+        elif token in DECLARATION_KEYWORDS:
+            expect = 'declaration'
+        elif token not in KEYWORDS:
+            references.add(token)
+    # A file referring to its own declarations isn't a dependency, and extending a type it
+    # declares itself adds nothing the type's users don't already get from this file
+    references.difference_update(declarations)
+    accessed.difference_update(local)
+    extensions = {name: (list(dict.fromkeys(members)), list(dict.fromkeys(names)))
+                  for name, (members, names) in extensions.items()
+                  if name not in declarations and (members or names)}
+    return list(dict.fromkeys(imports)), list(dict.fromkeys(declarations)), references, accessed, extensions
+
+def scan_file(path):
+    """scan_source for the file at path; unreadable files declare and use nothing"""
+    try:
+        with open(path, encoding='utf-8', errors='replace') as f:
+            return scan_source(f.read())
+    except OSError:
+        return scan_source('')
+
+def _scan_chunk(job):
+    """Process-pool worker: scan a chunk of files below base_path"""
+    base_path, paths = job
+    return [(path, scan_file(os.path.join(base_path, path))) for path in paths]
+
+def scan_sources(base_path, paths, workers=None):
+    """Scan the given Swift files (relative to base_path) on a process pool
+
+    Paths are sent in chunks so each worker reads and tokenizes many files per
+    round trip; small trees are scanned in-process. Returns {path: scan_source result}.
+    """
+    paths = [path for path in paths if path.endswith('.swift')]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(paths) < PARALLEL_MIN_FILES:
+        return dict(_scan_chunk((base_path, paths)))
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    size = max(64, len(paths) // (workers * 4))
+    jobs = [(base_path, paths[i:i + size]) for i in range(0, len(paths), size)]
+    scanned = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for chunk in pool.map(_scan_chunk, jobs):
+            scanned.update(chunk)
+    return scanned
+
+def build_graph(scanned):
+    """File-level dependency graph: {path: set of files declaring a name it uses}
+
+    A file depends on the files declaring a name it references at file scope, and on
+    the files extending a type with a member it uses after a dot or an initializer it
+    calls, even when it never names the type (colorScheme.isDark). A name declared in
+    several files makes the file depend on all of them, so nothing it may need is left out.
+    """
+    declared_in = {}
+    member_of = {}    # member name -> files whose extensions declare it
+    extended_by = {}  # initializer label or type -> files whose extensions need it referenced
+    for path, (_, declarations, _, _, extensions) in scanned.items():
+        for name in declarations:
+            declared_in.setdefault(name, []).append(path)
+        for members, names in extensions.values():
+            for name in members:
+                member_of.setdefault(name, []).append(path)
+            for name in names:
+                extended_by.setdefault(name, []).append(path)
+    graph = {}
+    for path, (_, _, references, accessed, _) in scanned.items():
+        deps = set()
+        for name in declared_in.keys() & references:
+            deps.update(declared_in[name])
+        for name in extended_by.keys() & references:
+            deps.update(extended_by[name])
+        for name in member_of.keys() & accessed:
+            deps.update(member_of[name])
+        deps.discard(path)
+        graph[path] = deps
+    return graph
+
+def strongly_connected(graph):
+    """Cycles in graph: its strongly connected components with more than one node, sorted
+
+    Iterative Tarjan, so deep dependency chains don't hit the recursion limit.
+    """
+    index = {}
+    low = {}
+    on_stack = set()
+    stack = []
+    components = []
+    counter = 0
+    for root in sorted(graph):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(graph[root])))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in graph:
+                    continue
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(graph[child]))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        components.append(sorted(component))
+    return sorted(components)
+
+def closure(graph, roots, allowed=None):
+    """roots and every file they depend on, directly or not, only following files in allowed if given"""
+    seen = set(roots)
+    pending = list(seen)
+    while pending:
+        for dep in graph.get(pending.pop(), ()):
+            if dep not in seen and (allowed is None or dep in allowed):
+                seen.add(dep)
+                pending.append(dep)
+    return seen
+
+def module_graph(graph, module_of):
+    """Collapse the file graph onto modules: {(module, dependency): [(file, file it uses)]}"""
+    edges = {}
+    for path, deps in graph.items():
+        module = module_of(path)
+        for dep in deps:
+            dep_module = module_of(dep)
+            if dep_module != module:
+                edges.setdefault((module, dep_module), []).append((path, dep))
+    return edges
+
+def suggest_cuts(edges):
+    """Module dependencies to remove so the modules form no cycle, lightest first
+
+    Removing the fewest file references that break every cycle is NP-hard, so this
+    greedily drops the edge with the fewest references until no cycle is left.
+    Returns [(module, dependency, [(file, file it uses)])].
+    """
+    remaining = dict(edges)
+    cuts = []
+    while True:
+        graph = {}
+        for module, dep in remaining:
+            graph.setdefault(module, set()).add(dep)
+            graph.setdefault(dep, set())
+        components = strongly_connected(graph)
+        if not components:
+            return cuts
+        inside = {module: n for n, component in enumerate(components) for module in component}
+        module, dep = min((edge for edge in remaining if edge[0] in inside and inside[edge[0]] == inside.get(edge[1])),
+                          key=lambda edge: (len(remaining[edge]), edge))
+        cuts.append((module, dep, remaining.pop((module, dep))))
+
+def directory_module(depth):
+    """module_of for build reports: the first depth directories of a path ("." for the source root)"""
+    def module_of(path):
+        parts = path.split('/')[:-1]
+        return '/'.join(parts[:depth]) or '.'
+    return module_of
+
+def report(scanned, graph, module_of, targets=None):
+    """Machine-readable analysis: imports, file and module cycles, suggested cuts, target sizes"""
+    imports = {}
+    for modules, *_ in scanned.values():
+        for module in modules:
+            imports[module] = imports.get(module, 0) + 1
+    edges = module_graph(graph, module_of)
+    module_deps = {}
+    for module, dep in edges:
+        module_deps.setdefault(module, []).append(dep)
+    module_nodes = {module: set(deps) for module, deps in module_deps.items()}
+    return {
+        'files': len(scanned),
+        'edges': sum(len(deps) for deps in graph.values()),
+        'imports': dict(sorted(imports.items(), key=lambda item: (-item[1], item[0]))),
+        'file_cycles': strongly_connected(graph),
+        'modules': {module: sorted(deps) for module, deps in sorted(module_deps.items())},
+        'module_cycles': strongly_connected(module_nodes),
+        'cuts': [{'module': module, 'dependency': dep, 'references': len(pairs),
+                  'files': [f"{path} -> {used}" for path, used in sorted(pairs)]}
+                 for module, dep, pairs in suggest_cuts(edges)],
+        'targets': targets or {},
+    }
+
+def report_lines(analysis, limit=10):
+    """Human-readable summary of report(), at most limit entries per list"""
+    lines = [f"   {analysis['files']} Swift files, {analysis['edges']} file dependencies"]
+    if analysis['imports']:
+        imported = ', '.join(f"{module} ({count})" for module, count in list(analysis['imports'].items())[:limit])
+        lines.append(f"   Imports: {imported}")
+    for name, (selected, derived) in analysis['targets'].items():
+        lines.append(f"   Target {name}: {derived} of {selected} Swift files needed")
+    for label, cycles in (("File cycles", analysis['file_cycles']), ("Module cycles", analysis['module_cycles'])):
+        lines.append(f"   {label}: {len(cycles)}")
+        for cycle in cycles[:limit]:
+            shown = ', '.join(cycle[:5]) + (f" and {len(cycle) - 5} more" if len(cycle) > 5 else "")
+            lines.append(f"      • {shown}")
+    if analysis['cuts']:
+        lines.append("   Suggested cuts (remove these uses to make the modules acyclic):")
+        for cut in analysis['cuts'][:limit]:
+            lines.append(f"      • {cut['module']} -> {cut['dependency']} "
+                         f"({cut['references']} reference{'s' if cut['references'] != 1 else ''}, "
+                         f"e.g. {cut['files'][0]})")
+    return lines
@@ -0,0 +1,198 @@
+"""Tests for generate_xcode_project: object IDs, merging scanned files into a project, single_copy
+resources, incremental runs and quiet output"""
+
+import os
+import time
+
+import resource_audit
+import generate_xcode_project as gen
+from pbxproj_parser import PbxProject
+from pbxproj_validator import validate
+
+def write_tree(base, paths):
+    """Create Swift files below base, returning them as scanned project files"""
+    for path in paths:
+        full_path = base / path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text("import SwiftUI\n")
+    return {path: path.rpartition('/')[2] for path in sorted(paths)}
+
+def built_paths(text):
+    """Source paths by name in the project's Sources phase"""
+    project = PbxProject(text)
+    refs = {obj.id: obj.get('path') for obj in project.objects_of('PBXFileReference')}
+    build_refs = project.values('PBXBuildFile', 'fileRef')
+    phase = project.objects_of('PBXSourcesBuildPhase')[0]
+    return sorted(refs[build_refs[build_id]] for build_id in phase.list_ids('files'))
+
+def test_allocator_gives_a_key_the_same_id_every_time():
+    ids = gen.IdAllocator()
+    first = ids.allocate_many(['FILE_a', 'FILE_b', 'FILE_a'])
+    assert first[0] == first[2] == gen.generate_uuid('FILE_a')
+    assert ids.allocate('FILE_b') == first[1]
+    assert ids.salted() == {}
+
+def test_allocator_resalts_taken_ids_and_remembers_them():
+    ids = gen.IdAllocator()
+    ids.reserve([gen.generate_uuid('FILE_a')])
+    salted = ids.allocate('FILE_a')
+    assert salted == gen.generate_uuid('FILE_a#1')
+    assert ids.salted() == {'FILE_a': salted}
+    # The memo keeps the salted ID even once the colliding object is gone
+    assert gen.IdAllocator(ids.salted()).allocate_many(['FILE_b', 'FILE_a'])[1] == salted
+
+def test_allocator_never_hands_out_fixed_ids():
+    ids = gen.IdAllocator()
+    allocated = ids.allocate_many(f"FILE_{n}" for n in range(1000))
+    assert len(set(allocated)) == 1000
+    assert set(allocated).isdisjoint(gen.FIXED_IDS)
+
+def test_merge_adds_new_files_and_groups(tmp_path, monkeypatch):
+    # merge_pbxproj finds the source group by its path, relative to the working directory
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "GreatFeelSwiftUI"
+    before = write_tree(base, ['App.swift', 'Models/Mood.swift'])
+    text = gen.create_pbxproj(before)
+    after = write_tree(base, ['App.swift', 'Models/Mood.swift', 'Models/Goal.swift', 'Views/Home.swift'])
+
+    merged, added, removed = gen.merge_pbxproj(text, after, gen.IdAllocator())
+
+    assert added == ['Models/Goal.swift', 'Views/Home.swift']
+    assert removed == []
+    assert validate(merged) == []
+    assert built_paths(merged) == ['App.swift', 'Goal.swift', 'Home.swift', 'Mood.swift']
+    # Everything already there is copied through unchanged
+    assert set(text.splitlines()) <= set(merged.splitlines())
+
+def test_merge_removes_deleted_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "GreatFeelSwiftUI"
+    files = write_tree(base, ['App.swift', 'Models/Mood.swift', 'Views/Home.swift'])
+    text = gen.create_pbxproj(files)
+    (base / 'Views/Home.swift').unlink()
+    (base / 'Views').rmdir()
+    del files['Views/Home.swift']
+
+    merged, added, removed = gen.merge_pbxproj(text, files, gen.IdAllocator())
+
+    assert added == []
+    assert removed == ['Views/Home.swift']
+    assert validate(merged) == []
+    assert built_paths(merged) == ['App.swift', 'Mood.swift']
+    assert 'Views' not in {obj.get('path') for obj in PbxProject(merged).objects_of('PBXGroup')}
+
+def test_merge_without_changes_is_a_no_op(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "GreatFeelSwiftUI"
+    files = write_tree(base, ['App.swift', 'Models/Mood.swift'])
+    text = gen.create_pbxproj(files)
+    assert gen.merge_pbxproj(text, files, gen.IdAllocator()) == (text, [], [])
+
+def test_single_copy_keeps_the_copy_inside_a_bundle():
+    project_files = {
+        'Assets.xcassets': 'Assets.xcassets',
+        'Media/intro.mp4': 'intro.mp4',
+        'Media/loop.mp4': 'loop.mp4',
+        'Sounds/tap.caf': 'tap.caf',
+        'Sounds/tap2.caf': 'tap2.caf',
+    }
+    sizes = {
+        'Assets.xcassets/Night.dataset/night-sky.mp4': 2000,
+        'Media/intro.mp4': 2000,
+        'Media/loop.mp4': 2000,
+        'Sounds/tap.caf': 500,
+        'Sounds/tap2.caf': 500,
+    }
+    groups = [(2000, 'video', ['Assets.xcassets/Night.dataset/night-sky.mp4', 'Media/intro.mp4', 'Media/loop.mp4']),
+              (500, 'tap', ['Sounds/tap.caf', 'Sounds/tap2.caf'])]
+
+    spec, omitted = gen.single_copy_resources(gen.DEFAULT_SPEC, groups, project_files)
+
+    # The catalog can't drop its copy, so both loose copies go; otherwise the first loose copy stays
+    assert omitted == {'Media/intro.mp4', 'Media/loop.mp4', 'Sounds/tap2.caf'}
+    assert spec['targets'][0]['omit'] == sorted(omitted)
+    bundled = gen.select_sources(spec['targets'][0], sorted(project_files))
+    assert bundled == ['Assets.xcassets', 'Sounds/tap.caf']
+
+    report = resource_audit.report(sizes, groups, omitted)
+    assert [entry['wasted_bytes'] for entry in report['duplicates']] == [0, 0]
+    assert report['wasted_bytes'] == 0
+
+def test_single_copy_leaves_targets_without_the_bundle_alone():
+    project_files = {'Assets.xcassets': 'Assets.xcassets', 'Media/intro.mp4': 'intro.mp4', 'Media/loop.mp4': 'loop.mp4'}
+    groups = [(2000, 'video', ['Assets.xcassets/night-sky.mp4', 'Media/intro.mp4', 'Media/loop.mp4'])]
+    spec = dict(gen.DEFAULT_SPEC, targets=[dict(gen.DEFAULT_SPEC['targets'][0], exclude=['*.xcassets'])])
+
+    spec, omitted = gen.single_copy_resources(spec, groups, project_files)
+
+    assert omitted == {'Media/loop.mp4'}
+
+def test_check_prints_only_a_one_line_reason(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    write_tree(tmp_path / "GreatFeelSwiftUI", ['App.swift', 'Models/Mood.swift'])
+    assert gen.main(['--no-build-manifest']) == 0
+    capsys.readouterr()
+
+    assert gen.main(['--check', '--no-build-manifest']) == 0
+    assert capsys.readouterr() == ('', '')
+
+    write_tree(tmp_path / "GreatFeelSwiftUI", ['Views/Home.swift'])
+    assert gen.main(['--check', '--no-build-manifest']) == 1
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert err == f"⚠️  1 file(s) would change: {gen.PROJECT_DIR}/project.pbxproj\n"
+
+def test_quiet_reports_a_spec_error_on_stderr(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    write_tree(tmp_path / "GreatFeelSwiftUI", ['App.swift'])
+    (tmp_path / "spec.json").write_text("{not json")
+
+    assert gen.main(['--quiet', '--no-build-manifest', '--spec', 'spec.json']) == 1
+    out, err = capsys.readouterr()
+    assert out == ''
+    assert err.startswith("❌ Error:") and err.count("\n") == 1
+
+def settle(base):
+    """Backdate everything below base so no mtime falls in the racy window the caches distrust"""
+    settled = time.time() - 3600
+    for root, dirs, files in os.walk(base):
+        for name in dirs + files:
+            os.utime(os.path.join(root, name), (settled, settled))
+    os.utime(base, (settled, settled))
+
+def state_mtimes():
+    paths = [gen.SCAN_CACHE_PATH, gen.MANIFEST_PATH, gen.BUILD_MANIFEST_PATH]
+    for root, _, files in os.walk(gen.PROJECT_DIR):
+        paths.extend(os.path.join(root, name) for name in files)
+    return {path: os.stat(path).st_mtime_ns for path in paths}
+
+def test_incremental_run_without_changes_writes_nothing(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "GreatFeelSwiftUI"
+    write_tree(base, ['App.swift', 'Models/Mood.swift'])
+    settle(base)
+    assert gen.main(['--incremental']) == 0
+    # The second run clears the first one's list of added build inputs
+    assert gen.main(['--incremental']) == 0
+    before = state_mtimes()
+    capsys.readouterr()
+
+    assert gen.main(['--incremental']) == 0
+
+    assert state_mtimes() == before
+    # Returned before the build manifest was even looked at again
+    assert "Build inputs" not in capsys.readouterr().out
+
+def test_incremental_run_records_changed_contents(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "GreatFeelSwiftUI"
+    write_tree(base, ['App.swift', 'Models/Mood.swift'])
+    settle(base)
+    assert gen.main(['--incremental']) == 0
+    assert gen.main(['--mark-built', 'simulator']) == 0
+
+    (base / 'App.swift').write_text("import SwiftUI\n@main struct App {}\n")
+    assert gen.main(['--incremental']) == 0
+
+    assert gen.load_build_manifest()['changed'] == ['GreatFeelSwiftUI/App.swift']
+    assert gen.build_status('simulator') == 'incremental'
@@ -0,0 +1,70 @@
+"""Tests for pbxproj_parser: parsing generated projects and patching them line by line"""
+
+import pytest
+
+import generate_xcode_project as gen
+from pbxproj_parser import Patch, PbxProject, PbxprojError
+
+PROJECT_FILES = {
+    'App.swift': 'App.swift',
+    'Models/Mood.swift': 'Mood.swift',
+    'Views/HomeScreen.swift': 'HomeScreen.swift',
+}
+
+NEW_FILE_ID = "AAAAAAAAAAAAAAAAAAAAAAAA"
+
+def generated():
+    return gen.create_pbxproj(PROJECT_FILES)
+
+def file_ref_ids(project):
+    return {obj.get('path'): obj.id for obj in project.objects_of('PBXFileReference')}
+
+def test_unpatched_project_serializes_byte_for_byte():
+    text = generated()
+    assert Patch(PbxProject(text)).apply() == text
+
+def test_parse_indexes_objects_and_properties():
+    project = PbxProject(generated())
+    assert project.root.isa == 'PBXProject'
+    refs = file_ref_ids(project)
+    assert {'App.swift', 'Mood.swift', 'HomeScreen.swift'} <= set(refs)
+    group = next(obj for obj in project.objects_of('PBXGroup') if obj.get('path') == 'Models')
+    assert group.list_ids('children') == [refs['Mood.swift']]
+
+def test_added_object_and_list_entry_round_trip():
+    text = generated()
+    project = PbxProject(text)
+    group = next(obj for obj in project.objects_of('PBXGroup') if obj.get('path') == 'Models')
+    patch = Patch(project)
+    patch.add_object('PBXFileReference', NEW_FILE_ID,
+                     f"\t\t{NEW_FILE_ID} /* Goal.swift */ = {{isa = PBXFileReference; lastKnownFileType = "
+                     f"sourcecode.swift; path = Goal.swift; sourceTree = \"<group>\"; }};\n")
+    patch.add_list_entry(group.id, 'children', f"\t\t\t\t{NEW_FILE_ID} /* Goal.swift */,\n")
+    patched = patch.apply()
+
+    reparsed = PbxProject(patched)
+    assert reparsed.objects[NEW_FILE_ID].get('path') == 'Goal.swift'
+    assert reparsed.objects[group.id].list_ids('children')[-1] == NEW_FILE_ID
+    # Only the two added lines differ
+    assert len(patched.splitlines()) == len(text.splitlines()) + 2
+
+    # Removing what was added gives back the original text exactly
+    undo = Patch(reparsed)
+    undo.remove_object(NEW_FILE_ID)
+    assert undo.remove_list_entry(group.id, 'children', NEW_FILE_ID)
+    assert undo.apply() == text
+
+def test_removed_object_takes_its_edits_along():
+    project = PbxProject(generated())
+    group = next(obj for obj in project.objects_of('PBXGroup') if obj.get('path') == 'Models')
+    mood = file_ref_ids(project)['Mood.swift']
+    patch = Patch(project)
+    patch.remove_list_entry(group.id, 'children', mood)
+    patch.remove_object(group.id)
+    patched = PbxProject(patch.apply())
+    assert group.id not in patched.objects
+    assert mood in patched.objects
+
+def test_not_a_project_is_an_error():
+    with pytest.raises(PbxprojError):
+        PbxProject("// !$*UTF8*$!\n{\n}\n")
@@ -0,0 +1,45 @@
+"""Tests for pbxproj_validator: dangling references and orphaned objects"""
+
+import generate_xcode_project as gen
+from pbxproj_parser import Patch, PbxProject
+from pbxproj_validator import validate
+
+PROJECT_FILES = {
+    'App.swift': 'App.swift',
+    'Models/Mood.swift': 'Mood.swift',
+}
+
+def generated():
+    text = gen.create_pbxproj(PROJECT_FILES)
+    project = PbxProject(text)
+    mood = next(obj for obj in project.objects_of('PBXFileReference') if obj.get('path') == 'Mood.swift')
+    group = next(obj for obj in project.objects_of('PBXGroup') if obj.get('path') == 'Models')
+    return project, mood.id, group.id
+
+def messages(issues, object_id):
+    return [message for issue_id, _, message in issues if issue_id == object_id]
+
+def test_generated_project_is_valid():
+    assert validate(gen.create_pbxproj(PROJECT_FILES)) == []
+
+def test_dangling_reference_is_reported():
+    project, mood, group = generated()
+    patch = Patch(project)
+    patch.remove_object(mood)
+    issues = validate(patch.apply())
+    assert any("names " + mood in message and "doesn't exist" in message for message in messages(issues, group))
+
+def test_file_in_no_group_is_an_orphan():
+    project, mood, group = generated()
+    patch = Patch(project)
+    patch.remove_list_entry(group, 'children', mood)
+    issues = validate(patch.apply())
+    assert any(message.startswith("is in no group") for message in messages(issues, mood))
+
+def test_unreachable_group_is_reported():
+    project, mood, group = generated()
+    parent = next(obj.id for obj in project.objects_of('PBXGroup') if group in obj.list_ids('children'))
+    patch = Patch(project)
+    patch.remove_list_entry(parent, 'children', group)
+    issues = validate(patch.apply())
+    assert messages(issues, group)
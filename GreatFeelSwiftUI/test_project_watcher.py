@@ -0,0 +1,63 @@
+"""Tests for project_watcher: what a watch session leaves in the project and the scan cache"""
+
+import json
+import os
+import time
+
+import pytest
+
+import generate_xcode_project as gen
+import project_watcher
+
+SOURCES = ['App.swift', 'Models/Mood.swift', 'Views/Home.swift']
+
+@pytest.fixture
+def generated(tmp_path, monkeypatch):
+    """A generated project whose directories are old enough for the scan cache to keep"""
+    monkeypatch.chdir(tmp_path)
+    base = tmp_path / "GreatFeelSwiftUI"
+    for path in SOURCES:
+        (base / path).parent.mkdir(parents=True, exist_ok=True)
+        (base / path).write_text("import SwiftUI\n")
+    settled = time.time() - 3600
+    for directory in (base, base / 'Models', base / 'Views'):
+        os.utime(directory, (settled, settled))
+    assert gen.main(['--no-build-manifest']) == 0
+    return base
+
+def cached_dirs():
+    with open(gen.SCAN_CACHE_PATH) as f:
+        return json.load(f)['dirs']
+
+def run_session(monkeypatch, batches):
+    """Run watch() with batches (functions returning changed directories), then stop it like Ctrl-C"""
+    pending = list(batches)
+
+    def collect_batch(source):
+        if not pending:
+            raise KeyboardInterrupt
+        return pending.pop(0)()
+    monkeypatch.setattr(project_watcher, 'collect_batch', collect_batch)
+    return project_watcher.watch(gen.parse_args(['--watch', '--watch-poll', '--no-build-manifest']))
+
+def test_idle_session_keeps_the_scan_cache(generated, monkeypatch):
+    before = cached_dirs()
+    assert sorted(before) == ['', 'Models', 'Views']
+
+    assert run_session(monkeypatch, []) == 0
+
+    assert cached_dirs() == before
+
+def test_session_with_changes_keeps_unchanged_directories(generated, monkeypatch):
+    before = cached_dirs()
+
+    def add_file():
+        (generated / 'Models/Goal.swift').write_text("struct Goal {}\n")
+        return {'Models'}
+    assert run_session(monkeypatch, [add_file]) == 0
+
+    after = cached_dirs()
+    # Models changed moments ago, so like a scan the session doesn't trust its mtime yet
+    assert after == {rel_dir: entry for rel_dir, entry in before.items() if rel_dir != 'Models'}
+    with open(f"{gen.PROJECT_DIR}/project.pbxproj", encoding='utf-8') as f:
+        assert 'Goal.swift' in f.read()
@@ -0,0 +1,90 @@
+"""Tests for swift_deps: the file graph across extensions of types declared elsewhere"""
+
+import swift_deps
+
+SOURCES = {
+    'Models/Mood.swift': '''
+import SwiftUI
+
+struct Mood {
+    let name: String
+    var color: Color { Color(hex: "#FFAA00") }
+}
+''',
+    'Theme/Colors.swift': '''
+import SwiftUI
+
+extension Color {
+    init(hex: String) {
+        self.init(red: 1, green: 1, blue: 1)
+    }
+}
+''',
+    'Theme/Spacing.swift': '''
+import SwiftUI
+
+extension View {
+    func cardShadow() -> some View {
+        shadow(radius: 4)
+    }
+}
+''',
+    'Views/MoodCard.swift': '''
+import SwiftUI
+
+struct MoodCard: View {
+    let mood: Mood
+    var body: some View {
+        Text(mood.name).cardShadow()
+    }
+}
+''',
+    'Views/PlaceholderField.swift': '''
+import SwiftUI
+
+struct PlaceholderField: View {
+    let hint: String
+    var body: some View {
+        Text(self.hint)
+    }
+}
+''',
+    'Views/Discover.swift': '''
+import SwiftUI
+
+extension View {
+    func hint(when shown: Bool) -> some View {
+        opacity(shown ? 1 : 0)
+    }
+}
+''',
+}
+
+def graph():
+    return swift_deps.build_graph({path: swift_deps.scan_source(text) for path, text in SOURCES.items()})
+
+def test_extension_members_are_recorded():
+    _, declarations, _, _, extensions = swift_deps.scan_source(SOURCES['Theme/Colors.swift'])
+    assert declarations == []
+    assert extensions == {'Color': ([], ['hex'])}
+    assert swift_deps.scan_source(SOURCES['Theme/Spacing.swift'])[4] == {'View': (['cardShadow'], [])}
+
+def test_closure_follows_extension_initializer():
+    assert swift_deps.closure(graph(), ['Models/Mood.swift']) == {'Models/Mood.swift', 'Theme/Colors.swift'}
+
+def test_closure_follows_extension_member_and_declarations():
+    assert swift_deps.closure(graph(), ['Views/MoodCard.swift']) == {
+        'Views/MoodCard.swift', 'Models/Mood.swift', 'Theme/Colors.swift', 'Theme/Spacing.swift'}
+
+def test_own_member_of_the_same_name_is_not_an_extension_use():
+    assert graph()['Views/PlaceholderField.swift'] == set()
+
+def test_extension_of_own_type_adds_no_dependency():
+    _, declarations, _, _, extensions = swift_deps.scan_source('''
+struct Goal {}
+extension Goal {
+    var done: Bool { false }
+}
+''')
+    assert declarations == ['Goal']
+    assert extensions == {}